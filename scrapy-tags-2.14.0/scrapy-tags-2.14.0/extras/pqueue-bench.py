@@ -0,0 +1,76 @@
+"""
+Micro-benchmark of scheduler priority queues with many distinct priorities
+
+usage:
+
+    python extras/pqueue-bench.py --priorities 10000 --requests 50000
+
+Each priority queue class is fed the same requests, with priorities drawn
+from ``--priorities`` distinct values, in two workloads: pushing all
+requests and then popping them all, and interleaving pushes and pops (as a
+crawl does, where every response yields new requests).
+"""
+
+import argparse
+import random
+from time import perf_counter
+
+from scrapy import Request, Spider
+from scrapy.crawler import Crawler
+from scrapy.pqueues import HeapPriorityQueue, ScrapyPriorityQueue
+from scrapy.squeues import FifoMemoryQueue
+
+QUEUE_CLASSES = (ScrapyPriorityQueue, HeapPriorityQueue)
+
+
+def make_requests(count, priorities, seed):
+    rng = random.Random(seed)  # noqa: S311
+    return [
+        Request(f"https://example.com/{i}", priority=rng.randrange(priorities))
+        for i in range(count)
+    ]
+
+
+def push_then_pop(pq_cls, crawler, requests):
+    queue = pq_cls.from_crawler(crawler, FifoMemoryQueue, "")
+    start = perf_counter()
+    for request in requests:
+        queue.push(request)
+    while queue.pop() is not None:
+        pass
+    return perf_counter() - start
+
+
+def interleaved(pq_cls, crawler, requests):
+    queue = pq_cls.from_crawler(crawler, FifoMemoryQueue, "")
+    start = perf_counter()
+    for i, request in enumerate(requests):
+        queue.push(request)
+        if i % 2:
+            queue.pop()
+    while queue.pop() is not None:
+        pass
+    return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--priorities", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    crawler = Crawler(Spider)
+    requests = make_requests(args.requests, args.priorities, args.seed)
+    print(f"{args.requests} requests, {args.priorities} distinct priorities")
+    for workload in (push_then_pop, interleaved):
+        for pq_cls in QUEUE_CLASSES:
+            elapsed = workload(pq_cls, crawler, requests)
+            print(
+                f"{workload.__name__:>14} {pq_cls.__name__:>20}: "
+                f"{elapsed:8.3f}s ({args.requests / elapsed:10.0f} requests/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from scrapy.extensions.httpcache import _SHARED_CACHE_NAME
+from scrapy.spiderloader import get_spider_loader
+from scrapy.utils.misc import load_object
+
+if TYPE_CHECKING:
+    import argparse
+
+
+class Command(ScrapyCommand):
+    requires_crawler_process = False
+    default_settings = {"LOG_ENABLED": False}
+
+    def syntax(self) -> str:
+        return "[options] [spider ...]"
+
+    def short_desc(self) -> str:
+        return "Remove expired and excess responses from the HTTP cache"
+
+    def long_desc(self) -> str:
+        return (
+            "Remove the expired responses from the HTTP cache of the given "
+            "spiders, or of all spiders of the project, and evict responses "
+            "until the cache fits in HTTPCACHE_MAX_SIZE and HTTPCACHE_MAX_ENTRIES. "
+            "If HTTPCACHE_SHARED is enabled, compact the cache shared by all spiders."
+        )
+
+    def run(self, args: list[str], opts: argparse.Namespace) -> None:
+        assert self.settings is not None
+        storage = load_object(self.settings["HTTPCACHE_STORAGE"])(self.settings)
+        if not hasattr(storage, "collect_garbage"):
+            raise UsageError(
+                f"{self.settings['HTTPCACHE_STORAGE']} does not support removing "
+                f"responses from the cache",
+                print_help=False,
+            )
+        if self.settings.getbool("HTTPCACHE_SHARED"):
+            names = [_SHARED_CACHE_NAME]
+        else:
+            names = args or sorted(get_spider_loader(self.settings).list())
+        if not names:
+            raise UsageError("No spider given and no spider found in the project")
+        for name in names:
+            removed = storage.collect_garbage(name)
+            print(f"{name}: removed {removed} cached responses")
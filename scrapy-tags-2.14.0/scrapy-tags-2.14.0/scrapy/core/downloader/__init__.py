@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import heapq
 import random
 from collections import deque
 from datetime import datetime
+from functools import partial
 from time import time
 from typing import TYPE_CHECKING, Any
 
@@ -12,6 +14,7 @@ from twisted.python.failure import Failure
 from scrapy import Request, Spider, signals
 from scrapy.core.downloader.handlers import DownloadHandlers
 from scrapy.core.downloader.middleware import DownloaderMiddlewareManager
+from scrapy.http.response.stream import _when_downloaded
 from scrapy.resolver import dnscache
 from scrapy.utils.asyncio import (
     AsyncioLoopingCall,
@@ -43,6 +46,18 @@ if TYPE_CHECKING:
 class Slot:
     """Downloader slot"""
 
+    __slots__ = (
+        "__weakref__",
+        "active",
+        "concurrency",
+        "delay",
+        "lastseen",
+        "latercall",
+        "queue",
+        "randomize_delay",
+        "transferring",
+    )
+
     def __init__(
         self,
         concurrency: int,
@@ -125,10 +140,15 @@ class Downloader:
         self.middleware: DownloaderMiddlewareManager = (
             DownloaderMiddlewareManager.from_crawler(crawler)
         )
+        self._slot_gc_age: float = self.settings.getfloat("DOWNLOAD_SLOTS_GC_AGE")
+        # (lastseen + delay, key) of idle slots, oldest first; entries are
+        # checked against the current slot state when they expire.
+        self._slot_gc_heap: list[tuple[float, str]] = []
+        self._slot_gc_keys: set[str] = set()
         self._slot_gc_loop: AsyncioLoopingCall | LoopingCall = create_looping_call(
             self._slot_gc
         )
-        self._slot_gc_loop.start(60)
+        self._slot_gc_loop.start(self.settings.getfloat("DOWNLOAD_SLOTS_GC_INTERVAL"))
         self.per_slot_settings: dict[str, dict[str, Any]] = self.settings.getdict(
             "DOWNLOAD_SLOTS"
         )
@@ -139,14 +159,16 @@ class Downloader:
         self, request: Request, spider: Spider | None = None
     ) -> Generator[Deferred[Any], Any, Response | Request]:
         self.active.add(request)
+        result: Response | Request | None = None
         try:
-            return (
-                yield deferred_from_coro(
-                    self.middleware.download_async(self._enqueue_request, request)
-                )
+            result = yield deferred_from_coro(
+                self.middleware.download_async(self._enqueue_request, request)
             )
+            return result
         finally:
-            self.active.remove(request)
+            # Streaming responses count until their body is downloaded.
+            if not _when_downloaded(result, lambda: self.active.remove(request)):
+                self.active.remove(request)
 
     def needs_backout(self) -> bool:
         return len(self.active) >= self.total_concurrency
@@ -198,10 +220,23 @@ class Downloader:
         d: Deferred[Response] = Deferred()
         slot.queue.append((request, d))
         self._process_queue(slot)
+        release = partial(self._release_active, key, slot, request)
         try:
-            return await maybe_deferred_to_future(d)  # fired in _wait_for_download()
-        finally:
-            slot.active.remove(request)
+            # Fired in _wait_for_download().
+            response = await maybe_deferred_to_future(d)
+        except BaseException:
+            release()
+            raise
+        # Streaming responses count until their body is downloaded.
+        if not _when_downloaded(response, release):
+            release()
+        return response
+
+    def _release_active(self, key: str, slot: Slot, request: Request) -> None:
+        slot.active.remove(request)
+        if not slot.active and key not in self._slot_gc_keys:
+            self._slot_gc_keys.add(key)
+            heapq.heappush(self._slot_gc_heap, (slot.lastseen + slot.delay, key))
 
     def _process_queue(self, slot: Slot) -> None:
         if slot.latercall:
@@ -234,9 +269,10 @@ class Downloader:
     async def _download(self, slot: Slot, request: Request) -> Response:
         # The order is very important for the following logic. Do not change!
         slot.transferring.add(request)
+        response: Response | None = None
         try:
             # 1. Download the response
-            response: Response = await self.handlers.download_request_async(request)
+            response = await self.handlers.download_request_async(request)
             # 2. Notify response_downloaded listeners about the recent download
             # before querying queue for next request
             self.signals.send_catch_log(
@@ -250,17 +286,22 @@ class Downloader:
             await _defer_sleep_async()
             raise
         finally:
-            # 3. After response arrives, remove the request from transferring
-            # state to free up the transferring slot so it can be used by the
-            # following requests (perhaps those which came from the downloader
-            # middleware itself)
-            slot.transferring.remove(request)
-            self._process_queue(slot)
-            self.signals.send_catch_log(
-                signal=signals.request_left_downloader,
-                request=request,
-                spider=self.crawler.spider,
-            )
+            # 3. After response arrives, or its body if it is streamed, remove
+            # the request from transferring state to free up the transferring
+            # slot so it can be used by the following requests (perhaps those
+            # which came from the downloader middleware itself)
+            release = partial(self._release_transferring, slot, request)
+            if not _when_downloaded(response, release):
+                release()
+
+    def _release_transferring(self, slot: Slot, request: Request) -> None:
+        slot.transferring.remove(request)
+        self._process_queue(slot)
+        self.signals.send_catch_log(
+            signal=signals.request_left_downloader,
+            request=request,
+            spider=self.crawler.spider,
+        )
 
     async def _wait_for_download(
         self, slot: Slot, request: Request, queue_dfd: Deferred[Response]
@@ -277,8 +318,28 @@ class Downloader:
         for slot in self.slots.values():
             slot.close()
 
-    def _slot_gc(self, age: float = 60) -> None:
+    def _slot_gc(self, age: float | None = None) -> None:
+        """Remove slots that have been idle for more than *age* seconds
+        (:setting:`DOWNLOAD_SLOTS_GC_AGE` by default).
+
+        Only slots that have become idle since they were last checked are
+        visited, in the order in which they expire.
+        """
+        if age is None:
+            age = self._slot_gc_age
         mintime = time() - age
-        for key, slot in list(self.slots.items()):
-            if not slot.active and slot.lastseen + slot.delay < mintime:
+        heap = self._slot_gc_heap
+        while heap and heap[0][0] < mintime:
+            _, key = heapq.heappop(heap)
+            slot = self.slots.get(key)
+            if slot is None or slot.active:
+                # The slot is gone or in use, it will be pushed again when
+                # it becomes idle.
+                self._slot_gc_keys.discard(key)
+                continue
+            if slot.lastseen + slot.delay < mintime:
+                self._slot_gc_keys.discard(key)
                 self.slots.pop(key).close()
+            else:
+                # The slot was used after it was pushed.
+                heapq.heappush(heap, (slot.lastseen + slot.delay, key))
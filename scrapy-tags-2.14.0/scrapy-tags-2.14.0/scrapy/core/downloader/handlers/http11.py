@@ -5,8 +5,9 @@ from __future__ import annotations
 import ipaddress
 import logging
 import re
+import weakref
 from contextlib import suppress
-from io import BytesIO
+from functools import partial
 from time import time
 from typing import TYPE_CHECKING, Any, TypedDict, TypeVar, cast
 from urllib.parse import urldefrag, urlparse
@@ -15,14 +16,17 @@ from twisted.internet import ssl
 from twisted.internet.defer import CancelledError, Deferred, succeed
 from twisted.internet.endpoints import TCP4ClientEndpoint
 from twisted.internet.error import TimeoutError as TxTimeoutError
+from twisted.internet.interfaces import IHandshakeListener
 from twisted.internet.protocol import Factory, Protocol, connectionDone
 from twisted.python.failure import Failure
+from twisted.web._newclient import HTTP11ClientProtocol
 from twisted.web.client import (
     URI,
     Agent,
     HTTPConnectionPool,
     ResponseDone,
     ResponseFailed,
+    _HTTP11ClientFactory,
 )
 from twisted.web.client import Response as TxResponse
 from twisted.web.http import PotentialDataLoss, _DataLoss
@@ -33,9 +37,17 @@ from zope.interface import implementer
 from scrapy import Request, signals
 from scrapy.core.downloader.contextfactory import load_context_factory_from_settings
 from scrapy.core.downloader.handlers.base import BaseDownloadHandler
-from scrapy.exceptions import StopDownload
-from scrapy.http import Headers, Response
+from scrapy.exceptions import IgnoreRequest, StopDownload
+from scrapy.http import Headers, Response, StreamingResponse
+from scrapy.http.response.stream import ResponseBodyStream
 from scrapy.responsetypes import responsetypes
+from scrapy.utils._compression import (
+    _SUPPORTED_ENCODINGS,
+    _DecompressionMaxSizeExceeded,
+    _DecompressorChain,
+    _get_decompressor,
+    _split_encodings,
+)
 from scrapy.utils.defer import maybe_deferred_to_future
 from scrapy.utils.deprecate import warn_on_deprecated_spider_attribute
 from scrapy.utils.httpobj import urlparse_cached
@@ -43,13 +55,20 @@ from scrapy.utils.python import to_bytes, to_unicode
 from scrapy.utils.url import add_http_if_no_scheme
 
 if TYPE_CHECKING:
+    from collections.abc import Hashable
+
     from twisted.internet.base import ReactorBase
-    from twisted.internet.interfaces import IConsumer
+    from twisted.internet.interfaces import (
+        IConsumer,
+        IDelayedCall,
+        IStreamClientEndpoint,
+    )
 
     # typing.NotRequired requires Python 3.11
     from typing_extensions import NotRequired
 
     from scrapy.crawler import Crawler
+    from scrapy.statscollectors import StatsCollector
 
 
 logger = logging.getLogger(__name__)
@@ -64,6 +83,85 @@ class _ResultT(TypedDict):
     certificate: ssl.Certificate | None
     ip_address: ipaddress.IPv4Address | ipaddress.IPv6Address | None
     failure: NotRequired[Failure | None]
+    stream: NotRequired[ResponseBodyStream]
+    compressed_size: NotRequired[int | None]
+
+
+@implementer(IHandshakeListener)
+class _ScrapyHTTP11ClientProtocol(HTTP11ClientProtocol):
+    """HTTP/1.1 client protocol that records the duration of TLS handshakes."""
+
+    def __init__(self, quiescentCallback: Any, stats: StatsCollector):
+        super().__init__(quiescentCallback)
+        self._stats: StatsCollector = stats
+        self._connected_at: float = 0.0
+
+    def connectionMade(self) -> None:
+        super().connectionMade()
+        self._connected_at = time()
+
+    def handshakeCompleted(self) -> None:
+        handshake_time = time() - self._connected_at
+        self._stats.inc_value("downloader/tls_handshake_count")
+        self._stats.set_value(
+            "downloader/tls_handshake_time",
+            self._stats.get_value("downloader/tls_handshake_time", 0.0)
+            + handshake_time,
+        )
+        self._stats.max_value("downloader/tls_handshake_time_max", handshake_time)
+
+
+class _ScrapyHTTP11ClientFactory(_HTTP11ClientFactory):
+    noisy = False
+
+    def __init__(self, quiescentCallback: Any, metadata: Any, stats: StatsCollector):
+        super().__init__(quiescentCallback, metadata)
+        self._stats: StatsCollector = stats
+
+    def buildProtocol(self, addr: Any) -> _ScrapyHTTP11ClientProtocol:
+        return _ScrapyHTTP11ClientProtocol(self._quiescentCallback, self._stats)
+
+
+class _ScrapyHTTPConnectionPool(HTTPConnectionPool):
+    """Connection pool that keeps stats about the reuse of connections."""
+
+    def __init__(
+        self, reactor: ReactorBase, persistent: bool = True, *, stats: StatsCollector
+    ):
+        super().__init__(reactor, persistent)
+        self._stats: StatsCollector = stats
+        self._factory = partial(_ScrapyHTTP11ClientFactory, stats=stats)  # type: ignore[assignment]
+
+    def getConnection(
+        self, key: Hashable, endpoint: IStreamClientEndpoint
+    ) -> Deferred[HTTP11ClientProtocol]:
+        if any(
+            connection.state == "QUIESCENT"
+            for connection in self._connections.get(key, ())
+        ):
+            self._stats.inc_value("downloader/connections/reused")
+        return super().getConnection(key, endpoint)
+
+    def _newConnection(
+        self, key: Hashable, endpoint: IStreamClientEndpoint
+    ) -> Deferred[HTTP11ClientProtocol]:
+        self._stats.inc_value("downloader/connections/new")
+        return super()._newConnection(key, endpoint)
+
+    def _removeConnection(self, key: Hashable, connection: Any) -> None:
+        # Called when an idle connection times out. Connections that the
+        # server already closed are only removed from the pool here.
+        if connection.state == "QUIESCENT":
+            self._stats.inc_value("downloader/connections/expired")
+        super()._removeConnection(key, connection)
+
+    def _putConnection(self, key: Hashable, connection: Any) -> None:
+        if (
+            connection.state == "QUIESCENT"
+            and len(self._connections.get(key, ())) >= self.maxPersistentPerHost
+        ):
+            self._stats.inc_value("downloader/connections/discarded")
+        super()._putConnection(key, connection)
 
 
 class HTTP11DownloadHandler(BaseDownloadHandler):
@@ -73,11 +171,20 @@ class HTTP11DownloadHandler(BaseDownloadHandler):
 
         from twisted.internet import reactor
 
-        self._pool: HTTPConnectionPool = HTTPConnectionPool(reactor, persistent=True)
-        self._pool.maxPersistentPerHost = crawler.settings.getint(
-            "CONCURRENT_REQUESTS_PER_DOMAIN"
+        pool_size = crawler.settings.get("DOWNLOAD_POOL_MAXSIZE_PER_HOST")
+        if pool_size is None:
+            pool_size = crawler.settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN")
+        else:
+            pool_size = int(pool_size)
+        assert crawler.stats
+        self._pool: HTTPConnectionPool = _ScrapyHTTPConnectionPool(
+            reactor, persistent=pool_size > 0, stats=crawler.stats
+        )
+        self._pool.maxPersistentPerHost = pool_size
+        # Annotated as int, but any number of seconds works.
+        self._pool.cachedConnectionTimeout = crawler.settings.getfloat(  # type: ignore[assignment]
+            "DOWNLOAD_POOL_IDLE_TIMEOUT"
         )
-        self._pool._factory.noisy = False
 
         self._contextFactory: IPolicyForHTTPS = load_context_factory_from_settings(
             crawler.settings, crawler
@@ -548,8 +655,14 @@ class ScrapyAgent:
             txresponse._transport._producer.abortConnection()
 
         d: Deferred[_ResultT] = Deferred(_cancel)
-        txresponse.deliverBody(
-            _ResponseReader(
+
+        if request.meta.get("download_stream"):
+            stream = ResponseBodyStream(
+                pause=txresponse._transport.pauseProducing,
+                resume=txresponse._transport.resumeProducing,
+                cancel=d.cancel,
+            )
+            reader: _ResponseReader = _StreamingResponseReader(
                 finished=d,
                 txresponse=txresponse,
                 request=request,
@@ -557,8 +670,38 @@ class ScrapyAgent:
                 warnsize=warnsize,
                 fail_on_dataloss=fail_on_dataloss,
                 crawler=self._crawler,
+                stream=stream,
+                # The download timeout also covers the body, after
+                # _cb_timeout() has stopped the timeout call of the headers.
+                timeout=request.meta.get("download_timeout") or self._connectTimeout,
+                deadline=self._timeout_cl.getTime(),
             )
+            txresponse.deliverBody(reader)
+            # The response is returned right away, the body is delivered
+            # through the stream.
+            return {
+                "txresponse": txresponse,
+                "body": b"",
+                "flags": None,
+                "certificate": reader._certificate,
+                "ip_address": reader._ip_address,
+                "stream": stream,
+            }
+
+        reader = _ResponseReader(
+            finished=d,
+            txresponse=txresponse,
+            request=request,
+            maxsize=maxsize,
+            warnsize=warnsize,
+            fail_on_dataloss=fail_on_dataloss,
+            crawler=self._crawler,
         )
+        if request.meta.get("_decompress_body") and request.method != "HEAD":
+            reader._set_decompressor(
+                txresponse.headers.getRawHeaders(b"Content-Encoding", [])
+            )
+        txresponse.deliverBody(reader)
 
         # save response for timeouts
         self._txresponse = txresponse
@@ -569,7 +712,20 @@ class ScrapyAgent:
         self, result: _ResultT, request: Request, url: str
     ) -> Response | Failure:
         headers = self._headers_from_twisted_response(result["txresponse"])
-        respcls = responsetypes.from_args(headers=headers, url=url, body=result["body"])
+        compressed_size = result.get("compressed_size")
+        if compressed_size is not None:
+            del headers[b"Content-Encoding"]
+            # Lets DownloaderStats count the bytes received.
+            request.meta["_compressed_body_size"] = compressed_size
+        kwargs: dict[str, Any] = {}
+        respcls: type[Response]
+        if "stream" in result:
+            respcls = StreamingResponse
+            kwargs["stream"] = result["stream"]
+        else:
+            respcls = responsetypes.from_args(
+                headers=headers, url=url, body=result["body"]
+            )
         try:
             version = result["txresponse"].version
             protocol = f"{to_unicode(version[0])}/{version[1]}.{version[2]}"
@@ -584,6 +740,7 @@ class ScrapyAgent:
             certificate=result["certificate"],
             ip_address=result["ip_address"],
             protocol=protocol,
+            **kwargs,
         )
         if result.get("failure"):
             assert result["failure"]
@@ -623,7 +780,8 @@ class _ResponseReader(Protocol):
         self._finished: Deferred[_ResultT] = finished
         self._txresponse: TxResponse = txresponse
         self._request: Request = request
-        self._bodybuf: BytesIO = BytesIO()
+        # Received body chunks, joined once when the response is finished.
+        self._bodybuf: list[bytes] = []
         self._maxsize: int = maxsize
         self._warnsize: int = warnsize
         self._fail_on_dataloss: bool = fail_on_dataloss
@@ -633,21 +791,91 @@ class _ResponseReader(Protocol):
         self._certificate: ssl.Certificate | None = None
         self._ip_address: ipaddress.IPv4Address | ipaddress.IPv6Address | None = None
         self._crawler: Crawler = crawler
+        self._decompressor: _DecompressorChain | None = None
+
+    def _set_decompressor(self, content_encoding: list[bytes]) -> None:
+        """Decompress the body as it is received, if all its content
+        encodings are supported.
+
+        Otherwise, the body is kept as is, and left for
+        :class:`~scrapy.downloadermiddlewares.httpcompression.HttpCompressionMiddleware`
+        to decompress.
+        """
+        to_decode, to_keep = _split_encodings(content_encoding, _SUPPORTED_ENCODINGS)
+        if not to_decode or to_keep:
+            return
+        self._decompressor = _DecompressorChain(
+            _get_decompressor(encoding, max_size=self._maxsize)
+            for encoding in to_decode
+        )
 
     def _finish_response(
         self, flags: list[str] | None = None, failure: Failure | None = None
     ) -> None:
+        if self._decompressor is not None:
+            try:
+                self._bodybuf.extend(self._decompressor.flush())
+            except _DecompressionMaxSizeExceeded as e:
+                self._fail_decompression(e)
+                return
+            except Exception:
+                self._fail(Failure())
+                return
+            self._log_decompressed_size()
         self._finished.callback(
             {
                 "txresponse": self._txresponse,
-                "body": self._bodybuf.getvalue(),
+                "body": b"".join(self._bodybuf),
                 "flags": flags,
                 "certificate": self._certificate,
                 "ip_address": self._ip_address,
                 "failure": failure,
+                "compressed_size": (
+                    self._bytes_received if self._decompressor is not None else None
+                ),
             }
         )
 
+    def _log_decompressed_size(self) -> None:
+        assert self._decompressor is not None
+        decompressed_size = self._decompressor.decompressed_size
+        stats = self._crawler.stats
+        if stats:
+            stats.inc_value("httpcompression/response_bytes", decompressed_size)
+            stats.inc_value("httpcompression/response_count")
+        if self._bytes_received < self._warnsize <= decompressed_size:
+            logger.warning(
+                "%(request)s response body size after decompression "
+                "(%(size)s B) is larger than the download warning size "
+                "(%(warnsize)s B).",
+                {
+                    "request": self._request,
+                    "size": decompressed_size,
+                    "warnsize": self._warnsize,
+                },
+            )
+
+    def _fail(self, failure: Failure) -> None:
+        self._bodybuf.clear()
+        if self.transport:
+            self.transport.stopProducing()
+            self.transport.loseConnection()
+        self._finished.errback(failure)
+
+    def _fail_decompression(self, exception: _DecompressionMaxSizeExceeded) -> None:
+        self._fail(
+            Failure(
+                IgnoreRequest(
+                    f"Ignored response to {self._request} because its body "
+                    f"({self._bytes_received} B compressed, "
+                    f"{exception.decompressed_size} B decompressed so far) "
+                    f"exceeded DOWNLOAD_MAXSIZE ({self._maxsize} B) during "
+                    f"decompression."
+                ),
+                exc_tb=exception.__traceback__,
+            )
+        )
+
     def connectionMade(self) -> None:
         assert self.transport
         if self._certificate is None:
@@ -661,14 +889,29 @@ class _ResponseReader(Protocol):
                 self.transport._producer.getPeer().host
             )
 
+    def _write_body(self, data: bytes) -> None:
+        if self._decompressor is None:
+            self._bodybuf.append(data)
+            return
+        # Only the decompressed data is kept, so that the compressed and
+        # decompressed bodies are never both in memory.
+        try:
+            self._bodybuf.extend(self._decompressor.decompress(data))
+        except _DecompressionMaxSizeExceeded as e:
+            self._fail_decompression(e)
+        except Exception:
+            self._fail(Failure())
+
     def dataReceived(self, bodyBytes: bytes) -> None:
         # This maybe called several times after cancel was called with buffered data.
         if self._finished.called:
             return
 
         assert self.transport
-        self._bodybuf.write(bodyBytes)
         self._bytes_received += len(bodyBytes)
+        self._write_body(bodyBytes)
+        if self._finished.called:
+            return
 
         bytes_received_result = self._crawler.signals.send_catch_log(
             signal=signals.bytes_received,
@@ -698,7 +941,7 @@ class _ResponseReader(Protocol):
                 },
             )
             # Clear buffer earlier to avoid keeping data in memory for a long time.
-            self._bodybuf.truncate(0)
+            self._bodybuf.clear()
             self._finished.cancel()
 
         if (
@@ -742,3 +985,60 @@ class _ResponseReader(Protocol):
                 self._fail_on_dataloss_warned = True
 
         self._finished.errback(reason)
+
+
+class _StreamingResponseReader(_ResponseReader):
+    """Pass body chunks to a :class:`~scrapy.http.response.stream.ResponseBodyStream`
+    as they are received, instead of buffering the whole body."""
+
+    def __init__(
+        self,
+        *args: Any,
+        stream: ResponseBodyStream,
+        timeout: float,
+        deadline: float,
+        **kwargs: Any,
+    ):
+        from twisted.internet import reactor
+
+        super().__init__(*args, **kwargs)
+        # A weak reference, so that dropping the stream cancels the download.
+        self._stream: weakref.ref[ResponseBodyStream] = weakref.ref(stream)
+        # Kept even if the stream is dropped, to report the end of the
+        # download.
+        self._downloaded: Deferred[None] = stream._downloaded
+        self._finished.addBoth(self._finish_stream)
+        self._timeout: float = timeout
+        self._timeout_call: IDelayedCall = reactor.callLater(
+            max(deadline - reactor.seconds(), 0), self._timed_out
+        )
+
+    def _timed_out(self) -> None:
+        self._fail(
+            Failure(
+                TxTimeoutError(
+                    f"Getting {self._request.url} took longer than "
+                    f"{self._timeout} seconds."
+                )
+            )
+        )
+
+    def _write_body(self, data: bytes) -> None:
+        stream = self._stream()
+        if stream is not None:
+            stream._feed(data)
+
+    def _finish_stream(self, result: _ResultT | Failure) -> None:
+        if self._timeout_call.active():
+            self._timeout_call.cancel()
+        stream = self._stream()
+        if stream is None:
+            if not self._downloaded.called:
+                self._downloaded.callback(None)
+            return
+        if isinstance(result, Failure):
+            stream._finish(result.value)
+        elif result.get("failure"):
+            stream._finish(result["failure"].value)  # type: ignore[union-attr]
+        else:
+            stream._finish()
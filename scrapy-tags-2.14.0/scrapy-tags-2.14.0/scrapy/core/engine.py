@@ -27,6 +27,7 @@ from scrapy.exceptions import (
     ScrapyDeprecationWarning,
 )
 from scrapy.http import Request, Response
+from scrapy.http.response.stream import _when_downloaded
 from scrapy.utils.asyncio import (
     AsyncioLoopingCall,
     create_looping_call,
@@ -325,8 +326,12 @@ class ExecutionEngine:
             return
 
         while not self.needs_backout():
-            if not self._start_scheduled_request():
+            requests = self._next_scheduled_requests()
+            if not requests:
+                self.signals.send_catch_log(signals.scheduler_empty)
                 break
+            for request in requests:
+                self._start_scheduled_request(request)
 
         if self.spider_is_idle() and self._slot.close_if_idle:
             self._spider_idle()
@@ -346,47 +351,48 @@ class ExecutionEngine:
             or self.scraper.slot.needs_backout()
         )
 
-    def _start_scheduled_request(self) -> bool:
+    def _next_scheduled_requests(self) -> list[Request]:
+        """Return as many requests from the scheduler as the downloader can
+        take at once, at least 1."""
+        assert self._slot is not None  # typing
+        scheduler = self._slot.scheduler
+        if not hasattr(scheduler, "next_requests"):
+            request = scheduler.next_request()
+            return [request] if request is not None else []
+        count = self.downloader.total_concurrency - len(self.downloader.active)
+        return scheduler.next_requests(max(count, 1))
+
+    def _start_scheduled_request(self, request: Request) -> None:
         assert self._slot is not None  # typing
-        assert self.spider is not None  # typing
-
-        request = self._slot.scheduler.next_request()
-        if request is None:
-            self.signals.send_catch_log(signals.scheduler_empty)
-            return False
-
         d: Deferred[Response | Request] = self._download(request)
         d.addBoth(self._handle_downloader_output, request)
-        d.addErrback(
-            lambda f: logger.info(
+        d.addBoth(self._finish_scheduled_request, request, self._slot)
+
+    def _finish_scheduled_request(
+        self, result: Failure | None, request: Request, slot: _Slot
+    ) -> None:
+        if isinstance(result, Failure):
+            logger.info(
                 "Error while handling downloader output",
-                exc_info=failure_to_exc_info(f),
+                exc_info=failure_to_exc_info(result),
                 extra={"spider": self.spider},
             )
-        )
-
-        def _remove_request(_: Any) -> None:
-            assert self._slot
-            self._slot.remove_request(request)
-
-        d2: Deferred[None] = d.addBoth(_remove_request)
-        d2.addErrback(
-            lambda f: logger.info(
+        try:
+            slot.remove_request(request)
+        except Exception:
+            logger.info(
                 "Error while removing request from slot",
-                exc_info=failure_to_exc_info(f),
+                exc_info=True,
                 extra={"spider": self.spider},
             )
-        )
-        slot = self._slot
-        d2.addBoth(lambda _: slot.nextcall.schedule())
-        d2.addErrback(
-            lambda f: logger.info(
+        try:
+            slot.nextcall.schedule()
+        except Exception:
+            logger.info(
                 "Error while scheduling new request",
-                exc_info=failure_to_exc_info(f),
+                exc_info=True,
                 extra={"spider": self.spider},
             )
-        )
-        return True
 
     @inlineCallbacks
     def _handle_downloader_output(
@@ -506,10 +512,17 @@ class ExecutionEngine:
                     request=result.request,
                     spider=self.spider,
                 )
+            # The downloader counts streaming responses until their body is
+            # downloaded, more requests can be sent then.
+            _when_downloaded(result, self._schedule_next_request)
             return result
         finally:
             self._slot.nextcall.schedule()
 
+    def _schedule_next_request(self) -> None:
+        if self._slot is not None:
+            self._slot.nextcall.schedule()
+
     def open_spider(self, spider: Spider, close_if_idle: bool = True) -> Deferred[None]:
         warnings.warn(
             "ExecutionEngine.open_spider() is deprecated, use open_spider_async() instead",
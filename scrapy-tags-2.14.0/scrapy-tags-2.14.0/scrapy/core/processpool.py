@@ -0,0 +1,187 @@
+"""Run spider callbacks in a pool of worker processes.
+
+See :ref:`process-pool`.
+"""
+
+from __future__ import annotations
+
+import inspect
+import logging
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from twisted.internet.defer import Deferred
+
+from scrapy.http import Request, Response, TextResponse
+from scrapy.http.request import _find_method
+from scrapy.utils.defer import maybe_deferred_to_future
+from scrapy.utils.misc import load_object
+from scrapy.utils.python import global_object_name
+from scrapy.utils.request import request_from_dict
+from scrapy.utils.spider import iterate_spider_output
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from concurrent.futures import Future
+
+    from scrapy import Spider
+
+
+logger = logging.getLogger(__name__)
+
+#: Spider attributes that are never copied into worker processes.
+_SKIPPED_SPIDER_ATTRIBUTES = frozenset({"crawler", "settings"})
+
+#: Copy of the spider in a worker process, set by :func:`_init_worker`.
+_worker_spider: Spider | None = None
+
+
+def is_offloaded(callback: Callable[..., Any], request: Request) -> bool:
+    """Return ``True`` if *callback* must be called in the process pool for
+    *request*."""
+    return bool(
+        request.meta.get("process_pool")
+        or getattr(callback, "_scrapy_process_pool", False)
+    )
+
+
+def _spider_state(spider: Spider) -> dict[str, Any]:
+    """Return the spider attributes that can be copied into a worker
+    process."""
+    state = {}
+    for key, value in vars(spider).items():
+        if key in _SKIPPED_SPIDER_ATTRIBUTES:
+            continue
+        try:
+            pickle.dumps(value)
+        except Exception as e:
+            logger.warning(
+                "Spider attribute %(key)r cannot be pickled, it will not be "
+                "available in process pool workers: %(error)s",
+                {"key": key, "error": e},
+                extra={"spider": spider},
+            )
+            continue
+        state[key] = value
+    return state
+
+
+def _init_worker(spidercls: type[Spider], state: dict[str, Any]) -> None:
+    global _worker_spider  # noqa: PLW0603
+    spider = spidercls.__new__(spidercls)
+    spider.__dict__.update(state)
+    _worker_spider = spider
+
+
+def _response_to_dict(response: Response) -> dict[str, Any]:
+    d = {
+        "_class": global_object_name(type(response)),
+        "url": response.url,
+        "status": response.status,
+        "headers": dict(response.headers),
+        "body": response.body,
+        "flags": response.flags,
+        "protocol": response.protocol,
+    }
+    if isinstance(response, TextResponse):
+        d["encoding"] = response.encoding
+    return d
+
+
+def _call_in_worker(
+    callback_name: str, response_dict: dict[str, Any], request_dict: dict[str, Any]
+) -> list[tuple[bool, Any]]:
+    """Call the spider callback named *callback_name* in a worker process.
+
+    Return a list of ``(is_request, value)`` tuples, where requests are
+    serialized with :meth:`~scrapy.Request.to_dict`.
+    """
+    spider = _worker_spider
+    assert spider is not None
+    request = request_from_dict(request_dict, spider=spider)
+    responsecls = load_object(response_dict.pop("_class"))
+    response = responsecls(request=request, **response_dict)
+    callback = getattr(spider, callback_name)
+    output = callback(response, **request.cb_kwargs)
+    if inspect.iscoroutine(output) or inspect.isasyncgen(output):
+        if inspect.iscoroutine(output):
+            output.close()
+        raise TypeError(
+            f"{global_object_name(callback)} cannot run in a process pool: "
+            f"coroutine and asynchronous generator callbacks are not supported."
+        )
+    return [
+        (True, value.to_dict(spider=spider))
+        if isinstance(value, Request)
+        else (False, value)
+        for value in iterate_spider_output(output)
+    ]
+
+
+def _future_to_deferred(future: Future[Any]) -> Deferred[Any]:
+    from twisted.internet import reactor
+
+    d: Deferred[Any] = Deferred()
+
+    def _fire(future: Future[Any]) -> None:
+        try:
+            result = future.result()
+        except BaseException as e:
+            d.errback(e)
+        else:
+            d.callback(result)
+
+    def _done(future: Future[Any]) -> None:
+        reactor.callFromThread(_fire, future)  # type: ignore[attr-defined]
+
+    future.add_done_callback(_done)
+    return d
+
+
+class SpiderProcessPool:
+    """Pool of worker processes where spider callbacks are called.
+
+    Each worker process gets a copy of the spider taken when the pool starts,
+    without its :attr:`~scrapy.Spider.crawler` and with only those
+    attributes that can be pickled. Changes that callbacks make to the spider
+    are not seen by other processes.
+    """
+
+    def __init__(self, spider: Spider, max_workers: int = 0):
+        self.spider: Spider = spider
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(type(self.spider), _spider_state(self.spider)),
+            )
+        return self._executor
+
+    async def call(self, callback: Callable[..., Any], response: Response) -> list[Any]:
+        """Call *callback* with *response* in a worker process, and return its
+        output as a list of items and requests."""
+        request = response.request
+        assert request is not None
+        callback_name = _find_method(self.spider, callback)
+        request_dict = request.to_dict(spider=self.spider)
+        future = self._get_executor().submit(
+            _call_in_worker, callback_name, _response_to_dict(response), request_dict
+        )
+        output = await maybe_deferred_to_future(_future_to_deferred(future))
+        return [
+            request_from_dict(value, spider=self.spider) if is_request else value
+            for is_request, value in output
+        ]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 import json
 import logging
+import os
+import shutil
+import sys
+import tempfile
 from abc import abstractmethod
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, cast
@@ -11,6 +15,7 @@ from warnings import warn
 from twisted.internet.defer import Deferred  # noqa: TC002
 
 from scrapy.exceptions import ScrapyDeprecationWarning
+from scrapy.pqueues import DownloaderAwarePriorityQueue, ScrapyPriorityQueue, _is_lifo
 from scrapy.spiders import Spider  # noqa: TC001
 from scrapy.utils.job import job_dir
 from scrapy.utils.misc import build_from_crawler, load_object
@@ -26,12 +31,13 @@ if TYPE_CHECKING:
     from scrapy.crawler import Crawler
     from scrapy.dupefilters import BaseDupeFilter
     from scrapy.http.request import Request
-    from scrapy.pqueues import ScrapyPriorityQueue
     from scrapy.statscollectors import StatsCollector
 
 
 logger = logging.getLogger(__name__)
 
+_TMP_DQDIR_PREFIX = "scrapy-requests-"
+
 
 class BaseSchedulerMeta(type):
     """
@@ -126,6 +132,26 @@ class BaseScheduler(metaclass=BaseSchedulerMeta):
         """
         raise NotImplementedError
 
+    def next_requests(self, count: int) -> list[Request]:
+        """
+        Return a list of up to ``count`` :class:`~scrapy.Request` objects to be
+        processed. An empty list has the same meaning as ``None`` in
+        :meth:`next_request`.
+
+        The engine uses this method, if defined, to get as many requests as
+        the downloader can take at once. The default implementation calls
+        :meth:`next_request` up to ``count`` times.
+
+        .. versionadded:: VERSION
+        """
+        requests: list[Request] = []
+        while len(requests) < count:
+            request = self.next_request()
+            if request is None:
+                break
+            requests.append(request)
+        return requests
+
 
 class Scheduler(BaseScheduler):
     """Default scheduler.
@@ -219,6 +245,40 @@ class Scheduler(BaseScheduler):
     order. Lowering those settings to ``1`` enforces the desired order except
     for the very first request, but it significantly slows down the crawl as a
     whole.
+
+
+    .. _scheduler-memory-limit:
+
+    Limiting memory usage
+    =====================
+
+    If :setting:`SCHEDULER_MEMORY_QUEUE_MAX_REQUESTS` or
+    :setting:`SCHEDULER_MEMORY_QUEUE_MAX_BYTES` are set, requests are stored
+    in the memory-based priority queue first, and only requests received
+    while that queue is over any of those limits are stored in the disk-based
+    priority queue, from where they are read once the memory-based priority
+    queue is empty.
+
+    Requests are still read in priority order across both priority queues:
+    whenever the memory-based priority queue is empty, or the disk-based
+    priority queue holds requests with a higher priority, requests of the
+    next priority of the disk-based priority queue are moved to the
+    memory-based priority queue, as many as fit within those limits, and
+    read from there. For a given priority value, requests in memory take
+    precedence over requests in disk. This requires
+    :setting:`SCHEDULER_PRIORITY_QUEUE` to be
+    :class:`~scrapy.pqueues.ScrapyPriorityQueue` or a subclass.
+
+    Without :setting:`JOBDIR`, the disk-based priority queue is created in a
+    temporary directory that is removed when the spider closes, or when a
+    later crawl starts if the crawl that created it did not close. With
+    :setting:`JOBDIR`, requests left in the memory-based priority queue are
+    moved to the disk-based priority queue when the spider closes, so that
+    the crawl can be resumed.
+
+    Use ``scrapy.squeues.CompactLifoDiskQueue`` or
+    ``scrapy.squeues.CompactFifoDiskQueue`` as :setting:`SCHEDULER_DISK_QUEUE`
+    to write and read those requests in batches.
     """
 
     @classmethod
@@ -296,6 +356,32 @@ class Scheduler(BaseScheduler):
         self._smqclass: type[BaseQueue] | None = self._get_start_queue_cls(
             crawler, "MEMORY"
         )
+        self._mq_max_requests: int = (
+            crawler.settings.getint("SCHEDULER_MEMORY_QUEUE_MAX_REQUESTS")
+            if crawler
+            else 0
+        )
+        self._mq_max_bytes: int = (
+            crawler.settings.getint("SCHEDULER_MEMORY_QUEUE_MAX_BYTES")
+            if crawler
+            else 0
+        )
+        self._memory_first: bool = bool(self._mq_max_requests or self._mq_max_bytes)
+        if (
+            self._memory_first
+            and pqclass is not None
+            and not issubclass(pqclass, ScrapyPriorityQueue)
+        ):
+            raise ValueError(
+                f"SCHEDULER_MEMORY_QUEUE_MAX_REQUESTS and "
+                f"SCHEDULER_MEMORY_QUEUE_MAX_BYTES require "
+                f"SCHEDULER_PRIORITY_QUEUE to be a subclass of "
+                f"scrapy.pqueues.ScrapyPriorityQueue, got "
+                f"{global_object_name(pqclass)}."
+            )
+        self._mq_requests: int = 0
+        self._mq_bytes: int = 0
+        self._tmp_dqdir: str | None = None
 
     def _get_start_queue_cls(
         self, crawler: Crawler | None, queue: str
@@ -318,6 +404,11 @@ class Scheduler(BaseScheduler):
         """
         self.spider: Spider = spider
         self.mqs: ScrapyPriorityQueue = self._mq()
+        if self._memory_first and not self.dqdir:
+            _remove_stale_tmp_dqdirs()
+            self.dqdir = self._tmp_dqdir = tempfile.mkdtemp(
+                prefix=f"{_TMP_DQDIR_PREFIX}{os.getpid()}-"
+            )
         self.dqs: ScrapyPriorityQueue | None = self._dq() if self.dqdir else None
         return self.df.open()
 
@@ -327,9 +418,15 @@ class Scheduler(BaseScheduler):
         (2) return the result of the dupefilter's ``close`` method
         """
         if self.dqs is not None:
-            state = self.dqs.close()
-            assert isinstance(self.dqdir, str)
-            self._write_dqs_state(self.dqdir, state)
+            if self._tmp_dqdir:
+                self.dqs.close()
+                shutil.rmtree(self._tmp_dqdir, ignore_errors=True)
+            else:
+                if self._memory_first:
+                    self._move_mqs_to_dqs()
+                state = self.dqs.close()
+                assert isinstance(self.dqdir, str)
+                self._write_dqs_state(self.dqdir, state)
         return self.df.close(reason)
 
     def enqueue_request(self, request: Request) -> bool:
@@ -345,7 +442,7 @@ class Scheduler(BaseScheduler):
         if not request.dont_filter and self.df.request_seen(request):
             self.df.log(request, self.spider)
             return False
-        dqok = self._dqpush(request)
+        dqok = (not self._memory_first or self._mq_is_full()) and self._dqpush(request)
         assert self.stats is not None
         if dqok:
             self.stats.inc_value("scheduler/enqueued/disk")
@@ -364,17 +461,57 @@ class Scheduler(BaseScheduler):
         Increment the appropriate stats, such as: ``scheduler/dequeued``,
         ``scheduler/dequeued/disk``, ``scheduler/dequeued/memory``.
         """
-        request: Request | None = self.mqs.pop()
+        requests = self.next_requests(1)
+        return requests[0] if requests else None
+
+    def next_requests(self, count: int) -> list[Request]:
+        """
+        Return a list of up to ``count`` :class:`~scrapy.Request` objects,
+        taken as in :meth:`next_request`.
+
+        Stats are incremented once per call instead of once per request.
+
+        If :setting:`SCHEDULER_PRIORITY_QUEUE` is
+        :class:`~scrapy.pqueues.DownloaderAwarePriorityQueue`, each request is
+        counted as an active download of its slot while the next ones are
+        taken, so requests are spread across slots as if they had been taken
+        one at a time and sent to the downloader.
+        """
+        # self.mqs and self.dqs are not always ScrapyPriorityQueue instances
+        pending = cast(
+            "list[DownloaderAwarePriorityQueue]",
+            [
+                pqueue
+                for pqueue in (self.mqs, self.dqs)
+                if isinstance(pqueue, DownloaderAwarePriorityQueue)
+            ],
+        )
+        requests: list[Request] = []
+        memory = 0
+        try:
+            while len(requests) < count:
+                request = self._mqpop()
+                if request is not None:
+                    memory += 1
+                else:
+                    request = self._dqpop()
+                    if request is None:
+                        break
+                requests.append(request)
+                for pqueue in pending:
+                    pqueue.add_pending_download(request)
+        finally:
+            for pqueue in pending:
+                for request in requests:
+                    pqueue.remove_pending_download(request)
         assert self.stats is not None
-        if request is not None:
-            self.stats.inc_value("scheduler/dequeued/memory")
-        else:
-            request = self._dqpop()
-            if request is not None:
-                self.stats.inc_value("scheduler/dequeued/disk")
-        if request is not None:
-            self.stats.inc_value("scheduler/dequeued")
-        return request
+        if memory:
+            self.stats.inc_value("scheduler/dequeued/memory", memory)
+        if len(requests) > memory:
+            self.stats.inc_value("scheduler/dequeued/disk", len(requests) - memory)
+        if requests:
+            self.stats.inc_value("scheduler/dequeued", len(requests))
+        return requests
 
     def __len__(self) -> int:
         """
@@ -408,6 +545,83 @@ class Scheduler(BaseScheduler):
 
     def _mqpush(self, request: Request) -> None:
         self.mqs.push(request)
+        if self._memory_first:
+            self._mq_requests += 1
+            self._mq_bytes += _request_size(request)
+
+    def _mqpop(self) -> Request | None:
+        if self._memory_first:
+            self._page_in()
+        request: Request | None = self.mqs.pop()
+        if request is not None:
+            self._mq_popped(request)
+        return request
+
+    def _mq_popped(self, request: Request) -> None:
+        if self._memory_first:
+            self._mq_requests -= 1
+            self._mq_bytes = max(0, self._mq_bytes - _request_size(request))
+
+    def _page_in(self) -> None:
+        """Move requests of the next priority of the disk queue to the memory
+        queue, as many as fit, if the memory queue is empty or the disk queue
+        has requests with a higher priority."""
+        if not self.dqs:
+            return
+        priority = self.dqs.curprio
+        if self.mqs and (
+            priority is None or self.mqs.curprio is None or priority >= self.mqs.curprio
+        ):
+            return
+        requests: list[Request] = []
+        size = 0
+        while self.dqs.curprio == priority and not (
+            requests and self._mq_is_full(len(requests), size)
+        ):
+            request = self.dqs.pop()
+            if request is None:
+                break
+            requests.append(request)
+            size += _request_size(request)
+        # Keep the order in which the disk queue returned them.
+        fifo: list[Request] = []
+        lifo: list[Request] = []
+        for request in requests:
+            (lifo if self._is_lifo_in_memory(request) else fifo).append(request)
+        for request in (*fifo, *reversed(lifo)):
+            self._mqpush(request)
+        if requests:
+            assert self.stats is not None
+            self.stats.inc_value("scheduler/moved_to_memory", len(requests))
+
+    def _is_lifo_in_memory(self, request: Request) -> bool:
+        if request.meta.get("is_start_request", False) and self._smqclass:
+            return _is_lifo(self._smqclass)
+        assert self.mqclass is not None
+        return _is_lifo(self.mqclass)
+
+    def _mq_is_full(self, requests: int = 0, size: int = 0) -> bool:
+        """Return ``True`` if the memory queue, with *requests* more requests
+        of *size* bytes, reaches its limits."""
+        return bool(
+            (
+                self._mq_max_requests
+                and self._mq_requests + requests >= self._mq_max_requests
+            )
+            or (self._mq_max_bytes and self._mq_bytes + size >= self._mq_max_bytes)
+        )
+
+    def _move_mqs_to_dqs(self) -> None:
+        """Move requests from the memory queue to the disk queue, to keep
+        them for the next run."""
+        assert self.stats is not None
+        moved = 0
+        while (request := self.mqs.pop()) is not None:
+            self._mq_popped(request)
+            if self._dqpush(request):
+                moved += 1
+        if moved:
+            self.stats.inc_value("scheduler/moved_to_disk", moved)
 
     def _dqpop(self) -> Request | None:
         if self.dqs is not None:
@@ -496,3 +710,29 @@ class Scheduler(BaseScheduler):
     def _write_dqs_state(self, dqdir: str, state: list[int]) -> None:
         with Path(dqdir, "active.json").open("w", encoding="utf-8") as f:
             json.dump(state, f)
+
+
+def _remove_stale_tmp_dqdirs() -> None:
+    """Remove the temporary disk queue directories of crawls that did not
+    close, e.g. because their process was killed."""
+    if sys.platform == "win32":
+        # os.kill() terminates the process instead of checking if it exists.
+        return
+    for path in Path(tempfile.gettempdir()).glob(f"{_TMP_DQDIR_PREFIX}*-*"):
+        pid = path.name[len(_TMP_DQDIR_PREFIX) :].partition("-")[0]
+        if not pid.isdigit():
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass  # e.g. the process belongs to another user
+
+
+def _request_size(request: Request) -> int:
+    """Return an estimate of the memory used by ``request``, in bytes."""
+    size = len(request.url) + len(request.body)
+    for key, values in request.headers.items():
+        size += len(key) + sum(len(value) for value in values)
+    return size
@@ -7,12 +7,14 @@ import logging
 import warnings
 from collections import deque
 from collections.abc import AsyncIterator
+from time import monotonic
 from typing import TYPE_CHECKING, Any, TypeAlias, TypeVar
 
 from twisted.internet.defer import Deferred, inlineCallbacks
 from twisted.python.failure import Failure
 
 from scrapy import Spider, signals
+from scrapy.core.processpool import SpiderProcessPool, is_offloaded
 from scrapy.core.spidermw import SpiderMiddlewareManager
 from scrapy.exceptions import (
     CloseSpider,
@@ -42,11 +44,12 @@ from scrapy.utils.python import global_object_name
 from scrapy.utils.spider import iterate_spider_output
 
 if TYPE_CHECKING:
-    from collections.abc import Generator, Iterable
+    from collections.abc import Callable, Generator, Iterable
 
     from scrapy.crawler import Crawler
     from scrapy.logformatter import LogFormatter
     from scrapy.signalmanager import SignalManager
+    from scrapy.statscollectors import StatsCollector
 
 
 logger = logging.getLogger(__name__)
@@ -61,8 +64,11 @@ class Slot:
 
     MIN_RESPONSE_SIZE = 1024
 
-    def __init__(self, max_active_size: int = 5000000):
+    def __init__(self, max_active_size: int = 5000000, max_offloaded: int = 0):
         self.max_active_size: int = max_active_size
+        self.max_offloaded: int = max_offloaded
+        self.offloaded: int = 0
+        self.max_itemproc_size: int = 0
         self.queue: deque[QueueTuple] = deque()
         self.active: set[Request] = set()
         self.active_size: int = 0
@@ -97,7 +103,52 @@ class Slot:
         return not (self.queue or self.active)
 
     def needs_backout(self) -> bool:
-        return self.active_size > self.max_active_size
+        return (
+            self.active_size > self.max_active_size
+            or bool(self.max_offloaded and self.offloaded >= self.max_offloaded)
+            or bool(
+                self.max_itemproc_size and self.itemproc_size >= self.max_itemproc_size
+            )
+        )
+
+
+class _ItemProcessingController:
+    """Adapt the number of items allowed in the item pipelines to their
+    latency.
+
+    The limit grows by 1 for every item processed while the average latency is
+    at or below the target, and is halved, at most once per average latency,
+    while it is above the target.
+    """
+
+    def __init__(
+        self, max_limit: int, target_latency: float, stats: StatsCollector
+    ) -> None:
+        self.max_limit: int = max_limit
+        self.limit: int = max_limit
+        self.target_latency: float = target_latency
+        self.latency: float | None = None
+        self.stats: StatsCollector = stats
+        self._decreased_at: float = float("-inf")
+
+    def item_processed(self, latency: float) -> int:
+        """Record the latency of a processed item and return the new limit."""
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = 0.8 * self.latency + 0.2 * latency
+        if self.latency <= self.target_latency:
+            self.limit = min(self.limit + 1, self.max_limit)
+        else:
+            now = monotonic()
+            if now - self._decreased_at >= self.latency and self.limit > 1:
+                self._decreased_at = now
+                self.limit = max(self.limit // 2, 1)
+                self.stats.inc_value("scraper/itemproc/limit_decreased")
+                self.stats.min_value("scraper/itemproc/limit_min", self.limit)
+        self.stats.set_value("scraper/itemproc/limit", self.limit)
+        self.stats.set_value("scraper/itemproc/latency", round(self.latency, 3))
+        return self.limit
 
 
 class Scraper:
@@ -119,6 +170,19 @@ class Scraper:
             self._check_deprecated_itemproc_method(method)
 
         self.concurrent_items: int = crawler.settings.getint("CONCURRENT_ITEMS")
+        self._max_concurrent_items: int = self.concurrent_items
+        self._itemproc_controller: _ItemProcessingController | None = None
+        if crawler.settings.getbool("SCRAPER_ADAPTIVE_ITEMPROC_ENABLED"):
+            assert crawler.stats
+            self._itemproc_controller = _ItemProcessingController(
+                self.concurrent_items * crawler.settings.getint("CONCURRENT_REQUESTS"),
+                crawler.settings.getfloat("SCRAPER_ADAPTIVE_ITEMPROC_TARGET_LATENCY"),
+                crawler.stats,
+            )
+        self._process_pool_size: int = crawler.settings.getint(
+            "SCRAPER_PROCESS_POOL_SIZE"
+        )
+        self._process_pool: SpiderProcessPool | None = None
         self.crawler: Crawler = crawler
         self.signals: SignalManager = crawler.signals
         assert crawler.logformatter
@@ -164,11 +228,17 @@ class Scraper:
 
         .. versionadded:: 2.14
         """
-        self.slot = Slot(self.crawler.settings.getint("SCRAPER_SLOT_MAX_ACTIVE_SIZE"))
         if not self.crawler.spider:
             raise RuntimeError(
                 "Scraper.open_spider() called before Crawler.spider is set."
             )
+        self._process_pool = SpiderProcessPool(
+            self.crawler.spider, self._process_pool_size
+        )
+        self.slot = Slot(
+            self.crawler.settings.getint("SCRAPER_SLOT_MAX_ACTIVE_SIZE"),
+            max_offloaded=2 * self._process_pool.max_workers,
+        )
         if self._itemproc_has_async["open_spider"]:
             await self.itemproc.open_spider_async()
         else:
@@ -194,6 +264,8 @@ class Scraper:
         self.slot.closing = Deferred()
         self._check_if_closing()
         await maybe_deferred_to_future(self.slot.closing)
+        if self._process_pool is not None:
+            self._process_pool.close()
         if self._itemproc_has_async["close_spider"]:
             await self.itemproc.close_spider_async()
         else:
@@ -316,6 +388,8 @@ class Scraper:
                 result.request = request
             assert result.request
             callback = result.request.callback or self.crawler.spider._parse
+            if is_offloaded(callback, result.request):
+                return await self._call_in_process_pool(callback, result)
             warn_on_generator_with_return_value(self.crawler.spider, callback)
             output = callback(result, **result.request.cb_kwargs)
             if isinstance(output, Deferred):
@@ -345,6 +419,20 @@ class Scraper:
                 )
         return await ensure_awaitable(iterate_spider_output(output))
 
+    async def _call_in_process_pool(
+        self, callback: Callable[..., Any], response: Response
+    ) -> list[Any]:
+        assert self.slot is not None  # typing
+        assert self._process_pool is not None  # typing
+        assert self.crawler.stats
+        self.slot.offloaded += 1
+        try:
+            output = await self._process_pool.call(callback, response)
+        finally:
+            self.slot.offloaded -= 1
+        self.crawler.stats.inc_value("scraper/process_pool/responses")
+        return output
+
     @_warn_spider_arg
     def handle_spider_error(
         self,
@@ -493,6 +581,7 @@ class Scraper:
         assert self.slot is not None  # typing
         assert self.crawler.spider is not None  # typing
         self.slot.itemproc_size += 1
+        start_time = monotonic()
         try:
             if self._itemproc_has_async["process_item"]:
                 output = await self.itemproc.process_item_async(item)
@@ -543,3 +632,12 @@ class Scraper:
             )
         finally:
             self.slot.itemproc_size -= 1
+            if self._itemproc_controller is not None:
+                self._adapt_itemproc_limit(monotonic() - start_time)
+
+    def _adapt_itemproc_limit(self, latency: float) -> None:
+        assert self.slot is not None  # typing
+        assert self._itemproc_controller is not None  # typing
+        limit = self._itemproc_controller.item_processed(latency)
+        self.slot.max_itemproc_size = limit
+        self.concurrent_items = min(limit, self._max_concurrent_items)
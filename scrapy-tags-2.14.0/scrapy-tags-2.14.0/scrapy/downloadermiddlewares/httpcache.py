@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import inspect
+from collections import OrderedDict
 from email.utils import formatdate
-from typing import TYPE_CHECKING
+from time import time
+from typing import TYPE_CHECKING, Any, TypeVar
 
 from twisted.internet import defer
 from twisted.internet.error import (
@@ -17,10 +20,15 @@ from twisted.web.client import ResponseFailed
 
 from scrapy import signals
 from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import Headers, StreamingResponse
+from scrapy.responsetypes import responsetypes
 from scrapy.utils.decorators import _warn_spider_arg
+from scrapy.utils.httpobj import urlparse_cached
 from scrapy.utils.misc import load_object
 
 if TYPE_CHECKING:
+    from collections.abc import Awaitable, Coroutine
+
     # typing.Self requires Python 3.11
     from typing_extensions import Self
 
@@ -32,6 +40,74 @@ if TYPE_CHECKING:
     from scrapy.statscollectors import StatsCollector
 
 
+_ResponseT = TypeVar("_ResponseT", bound="Response | None")
+
+
+class _MemoryCache:
+    """LRU cache of responses, bounded by the total size of their headers
+    and bodies.
+
+    Responses are kept as their class, headers and body, so that getting one
+    does not need parsing or unpickling anything.
+    """
+
+    def __init__(self, max_size: int, expiration_secs: int = 0):
+        self.max_size: int = max_size
+        self.expiration_secs: int = expiration_secs
+        self.size: int = 0
+        # Fingerprint: (response class, url, status, headers, body, store
+        # time, size).
+        self._entries: OrderedDict[
+            bytes, tuple[type[Response], str, int, Headers, bytes, float, int]
+        ] = OrderedDict()
+
+    def get(self, key: bytes) -> Response | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        respcls, url, status, headers, body, stored, _ = entry
+        if 0 < self.expiration_secs < time() - stored:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return respcls(url=url, status=status, headers=headers.copy(), body=body)
+
+    def set(self, key: bytes, response: Response, stored: float | None = None) -> int:
+        """Add *response*, stored at *stored* (now by default), and return the
+        number of responses evicted to make room for it."""
+        self._remove(key)
+        size = len(response.url) + len(response.body)
+        for name, values in response.headers.items():
+            size += len(name) + sum(len(value) for value in values)
+        if size > self.max_size:
+            return 0
+        # Like storages, pick the response class from the stored data.
+        respcls = responsetypes.from_args(
+            headers=response.headers, url=response.url, body=response.body
+        )
+        self._entries[key] = (
+            respcls,
+            response.url,
+            response.status,
+            response.headers.copy(),
+            response.body,
+            time() if stored is None else stored,
+            size,
+        )
+        self.size += size
+        evicted = 0
+        while self.size > self.max_size:
+            _, entry = self._entries.popitem(last=False)
+            self.size -= entry[-1]
+            evicted += 1
+        return evicted
+
+    def _remove(self, key: bytes) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[-1]
+
+
 class HttpCacheMiddleware:
     DOWNLOAD_EXCEPTIONS = (
         defer.TimeoutError,
@@ -53,8 +129,28 @@ class HttpCacheMiddleware:
             raise NotConfigured
         self.policy = load_object(settings["HTTPCACHE_POLICY"])(settings)
         self.storage = load_object(settings["HTTPCACHE_STORAGE"])(settings)
-        self.ignore_missing = settings.getbool("HTTPCACHE_IGNORE_MISSING")
+        # Storages may retrieve responses asynchronously.
+        self._async_storage: bool = inspect.iscoroutinefunction(
+            self.storage.retrieve_response
+        )
+        # Storages may retrieve the metadata and headers of responses first,
+        # and their body only if they are going to be used, with policies
+        # that do not need response bodies to decide that.
+        self._two_phase_storage: bool = hasattr(
+            self.storage, "retrieve_response_metadata"
+        ) and getattr(self.policy, "headers_only", False)
+        self.replay: bool = settings.getbool("HTTPCACHE_REPLAY")
+        self.ignore_missing = (
+            settings.getbool("HTTPCACHE_IGNORE_MISSING") or self.replay
+        )
+        self.ignore_schemes: list[str] = settings.getlist("HTTPCACHE_IGNORE_SCHEMES")
         self.stats = stats
+        memory_size = settings.getint("HTTPCACHE_MEMORY_SIZE")
+        self._memory: _MemoryCache | None = (
+            _MemoryCache(memory_size, settings.getint("HTTPCACHE_EXPIRATION_SECS"))
+            if memory_size
+            else None
+        )
 
     @classmethod
     def from_crawler(cls, crawler: Crawler) -> Self:
@@ -65,28 +161,164 @@ class HttpCacheMiddleware:
         o.crawler = crawler
         return o
 
-    def spider_opened(self, spider: Spider) -> None:
-        self.storage.open_spider(spider)
+    def spider_opened(self, spider: Spider) -> Awaitable[None] | None:
+        return self.storage.open_spider(spider)
 
-    def spider_closed(self, spider: Spider) -> None:
-        self.storage.close_spider(spider)
+    def spider_closed(self, spider: Spider) -> Awaitable[None] | None:
+        return self.storage.close_spider(spider)
 
     @_warn_spider_arg
     def process_request(
         self, request: Request, spider: Spider | None = None
-    ) -> Request | Response | None:
+    ) -> Request | Response | Coroutine[Any, Any, Response | None] | None:
         if request.meta.get("dont_cache", False):
+            self._check_replay(request)
             return None
 
         # Skip uncacheable requests
         if not self.policy.should_cache_request(request):
+            self._check_replay(request)
             request.meta["_dont_cache"] = True  # flag as uncacheable
             return None
 
+        if self._memory is not None:
+            cachedresponse = self._memory.get(self._fingerprint(request))
+            if cachedresponse is not None:
+                self.stats.inc_value("httpcache/memory/hit")
+                return self._process_cached_response(request, cachedresponse)
+            self.stats.inc_value("httpcache/memory/miss")
+
+        if self._async_storage:
+            return self._retrieve_response_async(request)
+
         # Look for cached response and check if expired
-        cachedresponse: Response | None = self.storage.retrieve_response(
+        if self._two_phase_storage:
+            cachedresponse = self.storage.retrieve_response_metadata(
+                self.crawler.spider, request
+            )
+            if (
+                self._process_cached_response(request, cachedresponse, count_hit=False)
+                is None
+            ):
+                return None
+            assert cachedresponse is not None
+            return self._body_retrieved(
+                request, self._retrieve_body(request, cachedresponse)
+            )
+        cachedresponse = self.storage.retrieve_response(self.crawler.spider, request)
+        self._remember(request, cachedresponse, retrieved=True)
+        return self._process_cached_response(request, cachedresponse)
+
+    async def _retrieve_response_async(self, request: Request) -> Response | None:
+        cachedresponse: Response | None
+        if self._two_phase_storage:
+            cachedresponse = await self.storage.retrieve_response_metadata(
+                self.crawler.spider, request
+            )
+            if (
+                self._process_cached_response(request, cachedresponse, count_hit=False)
+                is None
+            ):
+                return None
+            assert cachedresponse is not None
+            return self._body_retrieved(
+                request, await self._retrieve_body_async(request, cachedresponse)
+            )
+        cachedresponse = await self.storage.retrieve_response(
             self.crawler.spider, request
         )
+        self._remember(request, cachedresponse, retrieved=True)
+        return self._process_cached_response(request, cachedresponse)
+
+    def _retrieve_body(
+        self, request: Request, cachedresponse: Response
+    ) -> Response | None:
+        """Return *cachedresponse*, retrieved without its body from a
+        two-phase storage, with its body, or None if it is no longer
+        cached."""
+        response: Response | None = self.storage.retrieve_response_body(
+            self.crawler.spider, request, cachedresponse
+        )
+        self._remember(request, response, retrieved=True)
+        return response
+
+    async def _retrieve_body_async(
+        self, request: Request, cachedresponse: Response
+    ) -> Response | None:
+        response: Response | None = await self.storage.retrieve_response_body(
+            self.crawler.spider, request, cachedresponse
+        )
+        self._remember(request, response, retrieved=True)
+        return response
+
+    def _body_retrieved(
+        self, request: Request, response: Response | None
+    ) -> Response | None:
+        """Count *request*, whose fresh cached response was retrieved without
+        its body, as a cache hit if *response*, the response with its body,
+        is not ``None``, or as a cache miss otherwise, and return
+        *response*."""
+        if response is None:
+            return self._process_cached_response(request, None)
+        self.stats.inc_value("httpcache/hit")
+        return response
+
+    def _use_cached_response(
+        self, request: Request, cachedresponse: Response, default: _ResponseT
+    ) -> Response | _ResponseT | Coroutine[Any, Any, Response | _ResponseT]:
+        """Return *cachedresponse*, kept in the request meta, with its body,
+        or *default* if it is no longer cached."""
+        if not self._two_phase_storage:
+            return cachedresponse
+        if self._async_storage:
+            return self._use_cached_response_async(request, cachedresponse, default)
+        response = self._retrieve_body(request, cachedresponse)
+        return default if response is None else response
+
+    async def _use_cached_response_async(
+        self, request: Request, cachedresponse: Response, default: _ResponseT
+    ) -> Response | _ResponseT:
+        response = await self._retrieve_body_async(request, cachedresponse)
+        return default if response is None else response
+
+    def _check_replay(self, request: Request) -> None:
+        """In replay mode, ignore *request*, which cannot be served from the
+        cache, unless its scheme is never cached."""
+        if self.replay and urlparse_cached(request).scheme not in self.ignore_schemes:
+            self.stats.inc_value("httpcache/ignore")
+            raise IgnoreRequest(f"Ignored request not cacheable in replay: {request}")
+
+    def _fingerprint(self, request: Request) -> bytes:
+        assert self.crawler.request_fingerprinter
+        return self.crawler.request_fingerprinter.fingerprint(request)
+
+    def _remember(
+        self, request: Request, response: Response | None, *, retrieved: bool = False
+    ) -> None:
+        """Keep *response* in memory, if enabled.
+
+        A *retrieved* response keeps the time at which the storage stored it,
+        so that memory does not serve it past its expiration. If the storage
+        does not report that time, it is not kept when responses expire.
+        """
+        if self._memory is None or response is None:
+            return
+        stored: float | None = None
+        if retrieved:
+            stored = request.meta.pop("_httpcache_stored", None)
+            if stored is None and self._memory.expiration_secs > 0:
+                return
+        evicted = self._memory.set(self._fingerprint(request), response, stored)
+        if evicted:
+            self.stats.inc_value("httpcache/memory/eviction", evicted)
+
+    def _process_cached_response(
+        self,
+        request: Request,
+        cachedresponse: Response | None,
+        *,
+        count_hit: bool = True,
+    ) -> Response | None:
         if cachedresponse is None:
             self.stats.inc_value("httpcache/miss")
             if self.ignore_missing:
@@ -94,10 +326,11 @@ class HttpCacheMiddleware:
                 raise IgnoreRequest(f"Ignored request not in cache: {request}")
             return None  # first time request
 
-        # Return cached response only if not expired
+        # Return cached response only if not expired, or always in replay mode
         cachedresponse.flags.append("cached")
-        if self.policy.is_cached_response_fresh(cachedresponse, request):
-            self.stats.inc_value("httpcache/hit")
+        if self.replay or self.policy.is_cached_response_fresh(cachedresponse, request):
+            if count_hit:
+                self.stats.inc_value("httpcache/hit")
             return cachedresponse
 
         # Keep a reference to cached response to avoid a second cache lookup on
@@ -109,7 +342,7 @@ class HttpCacheMiddleware:
     @_warn_spider_arg
     def process_response(
         self, request: Request, response: Response, spider: Spider | None = None
-    ) -> Request | Response:
+    ) -> Request | Response | Coroutine[Any, Any, Response]:
         if request.meta.get("dont_cache", False):
             return response
 
@@ -127,32 +360,47 @@ class HttpCacheMiddleware:
         cachedresponse: Response | None = request.meta.pop("cached_response", None)
         if cachedresponse is None:
             self.stats.inc_value("httpcache/firsthand")
-            self._cache_response(response, request)
-            return response
+            return self._cache_response(response, request)
 
         if self.policy.is_cached_response_valid(cachedresponse, response, request):
             self.stats.inc_value("httpcache/revalidate")
-            return cachedresponse
+            return self._use_cached_response(request, cachedresponse, response)
 
         self.stats.inc_value("httpcache/invalidate")
-        self._cache_response(response, request)
-        return response
+        return self._cache_response(response, request)
 
     @_warn_spider_arg
     def process_exception(
         self, request: Request, exception: Exception, spider: Spider | None = None
-    ) -> Request | Response | None:
+    ) -> Request | Response | Coroutine[Any, Any, Response | None] | None:
         cachedresponse: Response | None = request.meta.pop("cached_response", None)
         if cachedresponse is not None and isinstance(
             exception, self.DOWNLOAD_EXCEPTIONS
         ):
             self.stats.inc_value("httpcache/errorrecovery")
-            return cachedresponse
+            return self._use_cached_response(request, cachedresponse, None)
         return None
 
-    def _cache_response(self, response: Response, request: Request) -> None:
-        if self.policy.should_cache_response(response, request):
+    def _cache_response(
+        self, response: Response, request: Request
+    ) -> Response | Coroutine[Any, Any, Response]:
+        """Store *response* if it should be cached, and return it, or a
+        coroutine that returns it once the storage is ready for more
+        responses."""
+        if isinstance(response, StreamingResponse):
+            # The body of a streaming response is never available to store.
+            self.stats.inc_value("httpcache/uncacheable")
+        elif self.policy.should_cache_response(response, request):
             self.stats.inc_value("httpcache/store")
-            self.storage.store_response(self.crawler.spider, request, response)
+            stored = self.storage.store_response(self.crawler.spider, request, response)
+            self._remember(request, response)
+            if stored is not None:
+                return self._wait_stored(stored, response)
         else:
             self.stats.inc_value("httpcache/uncacheable")
+        return response
+
+    @staticmethod
+    async def _wait_stored(stored: Awaitable[None], response: Response) -> Response:
+        await stored
+        return response
@@ -1,23 +1,22 @@
 from __future__ import annotations
 
 import warnings
-from itertools import chain
 from logging import getLogger
 from typing import TYPE_CHECKING, Any
 
 from scrapy import Request, Spider, signals
 from scrapy.exceptions import IgnoreRequest, NotConfigured
-from scrapy.http import Response, TextResponse
+from scrapy.http import Response, StreamingResponse, TextResponse
 from scrapy.responsetypes import responsetypes
 from scrapy.utils._compression import (
+    _decompress,
     _DecompressionMaxSizeExceeded,
-    _inflate,
-    _unbrotli,
-    _unzstd,
+    _DecompressorChain,
+    _get_decompressor,
+    _split_encodings,
 )
 from scrapy.utils.decorators import _warn_spider_arg
 from scrapy.utils.deprecate import warn_on_deprecated_spider_attribute
-from scrapy.utils.gz import gunzip
 
 if TYPE_CHECKING:
     # typing.Self requires Python 3.11
@@ -72,10 +71,13 @@ class HttpCompressionMiddleware:
             self.stats = stats
             self._max_size = 1073741824
             self._warn_size = 33554432
+            self._decompress_in_handler = True
             return
         self.stats = crawler.stats
         self._max_size = crawler.settings.getint("DOWNLOAD_MAXSIZE")
         self._warn_size = crawler.settings.getint("DOWNLOAD_WARNSIZE")
+        # The HTTP cache stores responses as received.
+        self._decompress_in_handler = not crawler.settings.getbool("HTTPCACHE_ENABLED")
         crawler.signals.connect(self.open_spider, signals.spider_opened)
 
     @classmethod
@@ -99,16 +101,29 @@ class HttpCompressionMiddleware:
         self, request: Request, spider: Spider | None = None
     ) -> Request | Response | None:
         request.headers.setdefault("Accept-Encoding", b", ".join(ACCEPTED_ENCODINGS))
+        # Set by the download handler, may be copied from a previous request.
+        request.meta.pop("_compressed_body_size", None)
+        if self._decompress_in_handler:
+            # Let download handlers that support it decompress the response
+            # body as it is received, with the same statistics, warnings and
+            # errors as process_response().
+            request.meta["_decompress_body"] = True
         return None
 
     @_warn_spider_arg
     def process_response(
         self, request: Request, response: Response, spider: Spider | None = None
     ) -> Request | Response:
+        request.meta.pop("_decompress_body", None)
+        request.meta.pop("_compressed_body_size", None)
         if request.method == "HEAD":
             return response
         if isinstance(response, Response):
             content_encoding = response.headers.getlist("Content-Encoding")
+            if content_encoding and isinstance(response, StreamingResponse):
+                return self._process_streaming_response(
+                    request, response, content_encoding
+                )
             if content_encoding:
                 max_size = request.meta.get("download_maxsize", self._max_size)
                 warn_size = request.meta.get("download_warnsize", self._warn_size)
@@ -152,46 +167,50 @@ class HttpCompressionMiddleware:
 
         return response
 
+    def _process_streaming_response(
+        self,
+        request: Request,
+        response: StreamingResponse,
+        content_encoding: list[bytes],
+    ) -> StreamingResponse:
+        """Decompress the body chunks of *response* as they are read from its
+        stream."""
+        max_size = request.meta.get("download_maxsize", self._max_size)
+        to_decode, to_keep = self._split_encodings(content_encoding)
+        if to_decode:
+            response.stream._add_decompressor(
+                _DecompressorChain(
+                    _get_decompressor(encoding, max_size=max_size)
+                    for encoding in to_decode
+                )
+            )
+        if to_keep:
+            self._warn_unknown_encoding(response, to_keep)
+            response.headers["Content-Encoding"] = to_keep
+        else:
+            del response.headers["Content-Encoding"]
+        if self.stats:
+            self.stats.inc_value("httpcompression/response_count")
+        return response
+
     def _handle_encoding(
         self, body: bytes, content_encoding: list[bytes], max_size: int
     ) -> tuple[bytes, list[bytes]]:
         to_decode, to_keep = self._split_encodings(content_encoding)
-        for encoding in to_decode:
-            body = self._decode(body, encoding, max_size)
+        if to_decode:
+            # Chain the decompressors so that the body is only materialized
+            # once, even when several encodings are applied.
+            decompressor = _DecompressorChain(
+                _get_decompressor(encoding, max_size=max_size) for encoding in to_decode
+            )
+            body = _decompress(decompressor, body)
         return body, to_keep
 
     @staticmethod
     def _split_encodings(
         content_encoding: list[bytes],
     ) -> tuple[list[bytes], list[bytes]]:
-        supported_encodings = {*ACCEPTED_ENCODINGS, b"x-gzip"}
-        to_keep: list[bytes] = [
-            encoding.strip().lower()
-            for encoding in chain.from_iterable(
-                encodings.split(b",") for encodings in content_encoding
-            )
-        ]
-        to_decode: list[bytes] = []
-        while to_keep:
-            encoding = to_keep.pop()
-            if encoding not in supported_encodings:
-                to_keep.append(encoding)
-                return to_decode, to_keep
-            to_decode.append(encoding)
-        return to_decode, to_keep
-
-    @staticmethod
-    def _decode(body: bytes, encoding: bytes, max_size: int) -> bytes:
-        if encoding in {b"gzip", b"x-gzip"}:
-            return gunzip(body, max_size=max_size)
-        if encoding == b"deflate":
-            return _inflate(body, max_size=max_size)
-        if encoding == b"br":
-            return _unbrotli(body, max_size=max_size)
-        if encoding == b"zstd":
-            return _unzstd(body, max_size=max_size)
-        # shouldn't be reached
-        return body  # pragma: no cover
+        return _split_encodings(content_encoding, {*ACCEPTED_ENCODINGS, b"x-gzip"})
 
     def _warn_unknown_encoding(
         self, response: Response, encodings: list[bytes]
@@ -62,8 +62,11 @@ class DownloaderStats:
     ) -> Request | Response:
         self.stats.inc_value("downloader/response_count")
         self.stats.inc_value(f"downloader/response_status_count/{response.status}")
+        # Bodies decompressed by the download handler count with their
+        # received size.
+        body_size = request.meta.get("_compressed_body_size", len(response.body))
         reslen = (
-            len(response.body)
+            body_size
             + get_header_size(response.headers)
             + get_status_size(response.status)
             + 4
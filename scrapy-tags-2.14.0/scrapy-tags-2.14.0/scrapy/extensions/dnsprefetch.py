@@ -0,0 +1,100 @@
+"""
+Extension that looks up the hostnames of scheduled requests in the
+background, and collects DNS lookup statistics, with CachingDNSResolver.
+
+See documentation in docs/topics/extensions.rst
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from scrapy import Request, Spider, signals
+from scrapy.exceptions import NotConfigured
+from scrapy.extensions.slotstats import QuantileSketch
+from scrapy.resolver import CachingDNSResolver
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.misc import load_object
+from scrapy.utils.reactor import is_reactor_installed
+
+if TYPE_CHECKING:
+    # typing.Self requires Python 3.11
+    from typing_extensions import Self
+
+    from scrapy.crawler import Crawler
+    from scrapy.statscollectors import StatsCollector
+
+
+class DNSPrefetch:
+    """Look up the hostnames of requests as they are scheduled, and collect
+    the lookup statistics of :class:`~scrapy.resolver.CachingDNSResolver`."""
+
+    QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+    def __init__(self, stats: StatsCollector, prefetch: bool = True):
+        self.stats: StatsCollector = stats
+        self.prefetch: bool = prefetch
+        self.lookup_time: QuantileSketch = QuantileSketch()
+        # Set when the spider is opened, if the resolver is installed.
+        self.resolver: CachingDNSResolver | None = None
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> Self:
+        resolver_class = load_object(crawler.settings["DNS_RESOLVER"])
+        if not issubclass(resolver_class, CachingDNSResolver):
+            raise NotConfigured
+        assert crawler.stats
+        o = cls(crawler.stats, crawler.settings.getbool("DNS_PREFETCH"))
+        crawler.signals.connect(o.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(o.spider_closed, signal=signals.spider_closed)
+        if o.prefetch:
+            crawler.signals.connect(
+                o.request_scheduled, signal=signals.request_scheduled
+            )
+        return o
+
+    def spider_opened(self, spider: Spider) -> None:
+        # CrawlerProcess installs the resolver after creating the extensions,
+        # when starting the reactor, so it is only looked up now.
+        if not is_reactor_installed():
+            return
+        from twisted.internet import reactor
+
+        resolver = getattr(reactor, "resolver", None)
+        if not isinstance(resolver, CachingDNSResolver):
+            return
+        self.resolver = resolver
+        self.resolver.add_stats_listener(self.report)
+
+    def spider_closed(self, spider: Spider, reason: str) -> None:
+        if self.resolver is None:
+            return
+        self.resolver.remove_stats_listener(self.report)
+        self.resolver = None
+        self.update_stats()
+
+    def request_scheduled(self, request: Request, spider: Spider) -> None:
+        if self.resolver is None or request.meta.get("proxy"):
+            return  # not installed, or resolved by the proxy
+        parsed = urlparse_cached(request)
+        if parsed.scheme in {"http", "https"} and parsed.hostname:
+            self.resolver.prefetch(parsed.hostname)
+
+    def report(self, name: str, value: float) -> None:
+        if name == "lookup/time":
+            self.lookup_time.add(value)
+            self.stats.inc_value("dns/lookup/count")
+        else:
+            self.stats.inc_value(f"dns/{name}", int(value))
+
+    def update_stats(self) -> None:
+        for name, q in self.QUANTILES.items():
+            lookup_time = self.lookup_time.quantile(q)
+            if lookup_time is not None:
+                self.stats.set_value(f"dns/lookup/time/{name}", round(lookup_time, 3))
+        hits = self.stats.get_value("dns/cache/hit", 0) + self.stats.get_value(
+            "dns/cache/negative_hit", 0
+        )
+        total = hits + self.stats.get_value("dns/cache/miss", 0)
+        if total:
+            self.stats.set_value("dns/cache/hit_rate", round(hits / total, 3))
@@ -1,28 +1,41 @@
 from __future__ import annotations
 
+import contextlib
 import gzip
+import hashlib
 import logging
+import os
 import pickle
+import shutil
+import struct
 from email.utils import mktime_tz, parsedate_tz
+from functools import lru_cache
 from importlib import import_module
 from pathlib import Path
+from tempfile import mkdtemp
 from time import time
-from typing import IO, TYPE_CHECKING, Any, Concatenate, cast
-from weakref import WeakKeyDictionary
+from typing import IO, TYPE_CHECKING, Any, Concatenate, TypeVar, cast
 
+from twisted.internet.threads import deferToThreadPool
+from twisted.python.threadpool import ThreadPool
 from w3lib.http import headers_dict_to_raw, headers_raw_to_dict
 
 from scrapy.http import Headers, Response
 from scrapy.responsetypes import responsetypes
+from scrapy.utils.defer import maybe_deferred_to_future
 from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.log import failure_to_exc_info
+from scrapy.utils.misc import load_object
 from scrapy.utils.project import data_path
 from scrapy.utils.python import to_bytes, to_unicode
 
 if TYPE_CHECKING:
-    import os
-    from collections.abc import Callable
+    from collections.abc import Awaitable, Callable, Iterator
     from types import ModuleType
 
+    from twisted.internet.defer import Deferred
+    from twisted.python.failure import Failure
+
     from scrapy.http.request import Request
     from scrapy.settings import BaseSettings
     from scrapy.spiders import Spider
@@ -31,8 +44,25 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
+#: Name under which responses are cached, instead of the spider name, when
+#: :setting:`HTTPCACHE_SHARED` is enabled.
+_SHARED_CACHE_NAME = "_shared"
+
+#: Seconds during which garbage collection keeps the temporary files, and the
+#: unused shared files, that another process sharing the cache may be writing
+#: or about to use.
+_GC_GRACE_PERIOD = 3600
+
+#: Number of read times that DbmCacheStorage keeps in memory before writing
+#: them, with the least recently used eviction.
+_DBM_USED_BATCH_SIZE = 1000
+
 
 class DummyPolicy:
+    headers_only: bool = True
+
     def __init__(self, settings: BaseSettings):
         self.ignore_schemes: list[str] = settings.getlist("HTTPCACHE_IGNORE_SCHEMES")
         self.ignore_http_codes: list[int] = [
@@ -58,28 +88,32 @@ class DummyPolicy:
 
 class RFC2616Policy:
     MAXAGE = 3600 * 24 * 365  # one year
+    headers_only: bool = True
 
     def __init__(self, settings: BaseSettings):
         self.always_store: bool = settings.getbool("HTTPCACHE_ALWAYS_STORE")
         self.ignore_schemes: list[str] = settings.getlist("HTTPCACHE_IGNORE_SCHEMES")
-        self._cc_parsed: WeakKeyDictionary[
-            Request | Response, dict[bytes, bytes | None]
-        ] = WeakKeyDictionary()
         self.ignore_response_cache_controls: list[bytes] = [
             to_bytes(cc)
             for cc in settings.getlist("HTTPCACHE_IGNORE_RESPONSE_CACHE_CONTROLS")
         ]
+        # Freshness lifetimes only depend on a few header values, which many
+        # responses share.
+        self._freshness_lifetimes: Callable[..., float] = lru_cache(
+            maxsize=_HEADER_CACHE_SIZE
+        )(self._freshness_lifetime)
 
     def _parse_cachecontrol(self, r: Request | Response) -> dict[bytes, bytes | None]:
-        if r not in self._cc_parsed:
-            cch = r.headers.get(b"Cache-Control", b"")
-            assert cch is not None
-            parsed = parse_cachecontrol(cch)
-            if isinstance(r, Response):
-                for key in self.ignore_response_cache_controls:
-                    parsed.pop(key, None)
-            self._cc_parsed[r] = parsed
-        return self._cc_parsed[r]
+        """Return the parsed Cache-Control header of *r*. The result is
+        shared with other requests and responses with the same header, and
+        must not be modified."""
+        cch = r.headers.get(b"Cache-Control", b"")
+        assert cch is not None
+        if isinstance(r, Response):
+            return _parse_cachecontrol_cached(
+                cch, tuple(self.ignore_response_cache_controls)
+            )
+        return _parse_cachecontrol_cached(cch)
 
     def should_cache_request(self, request: Request) -> bool:
         if urlparse_cached(request).scheme in self.ignore_schemes:
@@ -191,32 +225,59 @@ class RFC2616Policy:
 
     def _compute_freshness_lifetime(
         self, response: Response, request: Request, now: float
+    ) -> float:
+        headers = response.headers
+        cachecontrol: bytes = headers.get(b"Cache-Control") or b""
+        date: bytes | None = headers.get(b"Date")
+        expires: bytes | None = headers.get(b"Expires")
+        lastmodified: bytes | None = headers.get(b"Last-Modified")
+        if _rfc1123_to_epoch_cached(date):
+            return self._freshness_lifetimes(
+                cachecontrol, date, expires, lastmodified, response.status
+            )
+        # Without a valid Date header, the freshness lifetime depends on the
+        # current time.
+        return self._freshness_lifetime(
+            cachecontrol, date, expires, lastmodified, response.status, now=now
+        )
+
+    def _freshness_lifetime(
+        self,
+        cachecontrol: bytes,
+        date_header: bytes | None,
+        expires_header: bytes | None,
+        lastmodified_header: bytes | None,
+        status: int,
+        *,
+        now: float = 0,
     ) -> float:
         # Reference nsHttpResponseHead::ComputeFreshnessLifetime
         # https://dxr.mozilla.org/mozilla-central/source/netwerk/protocol/http/nsHttpResponseHead.cpp#706
-        cc = self._parse_cachecontrol(response)
+        cc = _parse_cachecontrol_cached(
+            cachecontrol, tuple(self.ignore_response_cache_controls)
+        )
         maxage = self._get_max_age(cc)
         if maxage is not None:
             return maxage
 
         # Parse date header or synthesize it if none exists
-        date = rfc1123_to_epoch(response.headers.get(b"Date")) or now
+        date = _rfc1123_to_epoch_cached(date_header) or now
 
         # Try HTTP/1.0 Expires header
-        if b"Expires" in response.headers:
-            expires = rfc1123_to_epoch(response.headers[b"Expires"])
+        if expires_header is not None:
+            expires = _rfc1123_to_epoch_cached(expires_header)
             # When parsing Expires header fails RFC 2616 section 14.21 says we
             # should treat this as an expiration time in the past.
             return max(0, expires - date) if expires else 0
 
         # Fallback to heuristic using last-modified header
         # This is not in RFC but on Firefox caching implementation
-        lastmodified = rfc1123_to_epoch(response.headers.get(b"Last-Modified"))
+        lastmodified = _rfc1123_to_epoch_cached(lastmodified_header)
         if lastmodified and lastmodified <= date:
             return (date - lastmodified) / 10
 
         # This request can be cached indefinitely
-        if response.status in (300, 301, 308):
+        if status in (300, 301, 308):
             return self.MAXAGE
 
         # Insufficient information to compute freshness lifetime
@@ -230,7 +291,7 @@ class RFC2616Policy:
         currentage: float = 0
         # If Date header is not set we assume it is a fast connection, and
         # clock is in sync with the server
-        date = rfc1123_to_epoch(response.headers.get(b"Date")) or now
+        date = _rfc1123_to_epoch_cached(response.headers.get(b"Date")) or now
         if now > date:
             currentage = now - date
 
@@ -249,11 +310,24 @@ class DbmCacheStorage:
         self.cachedir: str = data_path(settings["HTTPCACHE_DIR"], createdir=True)
         self.expiration_secs: int = settings.getint("HTTPCACHE_EXPIRATION_SECS")
         self.dbmodule: ModuleType = import_module(settings["HTTPCACHE_DBM_MODULE"])
+        self.max_size: int = settings.getint("HTTPCACHE_MAX_SIZE")
+        self.max_entries: int = settings.getint("HTTPCACHE_MAX_ENTRIES")
+        self.eviction: str = _get_eviction(settings)
+        self.shared: bool = settings.getbool("HTTPCACHE_SHARED")
         self.db: Any = None  # the real type is private
+        self._db_name: str | None = None
+        self._gc_schedule = _GarbageCollectionSchedule(self.max_size, self.max_entries)
+        # Keys of the responses read since their read time was last written,
+        # and their read time.
+        self._used: dict[str, float] = {}
 
     def open_spider(self, spider: Spider) -> None:
-        dbpath = Path(self.cachedir, f"{spider.name}.db")
+        name = _get_cache_name(spider, self.shared)
+        if self.max_size or self.max_entries:
+            self.collect_garbage(name)
+        dbpath = Path(self.cachedir, f"{name}.db")
         self.db = self.dbmodule.open(str(dbpath), "c")
+        self._db_name = name
 
         logger.debug(
             "Using DBM cache storage in %(cachepath)s",
@@ -267,7 +341,9 @@ class DbmCacheStorage:
         )
 
     def close_spider(self, spider: Spider) -> None:
+        self._write_used()
         self.db.close()
+        self._db_name = None
 
     def retrieve_response(self, spider: Spider, request: Request) -> Response | None:
         data = self._read_data(spider, request)
@@ -292,6 +368,47 @@ class DbmCacheStorage:
         }
         self.db[f"{key}_data"] = pickle.dumps(data, protocol=4)
         self.db[f"{key}_time"] = str(time())
+        if self._gc_schedule.stored(len(response.body)):
+            self.collect_garbage(_get_cache_name(spider, self.shared))
+
+    def collect_garbage(self, name: str) -> int:
+        """Remove the expired responses cached for the spider called *name*,
+        and evict responses until the cache fits in :setting:`HTTPCACHE_MAX_SIZE`
+        and :setting:`HTTPCACHE_MAX_ENTRIES`.
+
+        Return the number of removed responses.
+        """
+        if name == self._db_name:
+            self._write_used()
+            db = self.db
+        else:
+            db = self.dbmodule.open(str(Path(self.cachedir, f"{name}.db")), "c")
+        try:
+            now = time()
+            entries: list[tuple[str, bool, float, int, tuple[Path, ...]]] = []
+            for dbkey in db.keys():  # noqa: SIM118
+                dbkey = to_unicode(dbkey)
+                if not dbkey.endswith("_time"):
+                    continue
+                key = dbkey[: -len("_time")]
+                stored = float(db[dbkey])
+                rank = stored
+                if self.eviction == "lru" and f"{key}_used" in db:
+                    rank = float(db[f"{key}_used"])
+                expired = 0 < self.expiration_secs < now - stored
+                entries.append((key, expired, rank, len(db[f"{key}_data"]), ()))
+            removed, _ = _select_garbage(entries, {}, self.max_size, self.max_entries)
+            for key in removed:
+                for suffix in ("_data", "_time", "_used"):
+                    if f"{key}{suffix}" in db:
+                        del db[f"{key}{suffix}"]
+            if removed and hasattr(db, "reorganize"):
+                # Shrink the database file, with dbm.gnu.
+                db.reorganize()
+        finally:
+            if db is not self.db:
+                db.close()
+        return len(removed)
 
     def _read_data(self, spider: Spider, request: Request) -> dict[str, Any] | None:
         key = self._fingerprinter.fingerprint(request).hex()
@@ -304,14 +421,32 @@ class DbmCacheStorage:
         if 0 < self.expiration_secs < time() - float(ts):
             return None  # expired
 
+        if self.eviction == "lru" and (self.max_size or self.max_entries):
+            # Writing the read time on every read would make reads as slow as
+            # writes, so read times are written in batches.
+            self._used[key] = time()
+            if len(self._used) >= _DBM_USED_BATCH_SIZE:
+                self._write_used()
+        request.meta["_httpcache_stored"] = float(ts)
         return cast("dict[str, Any]", pickle.loads(db[f"{key}_data"]))  # noqa: S301
 
+    def _write_used(self) -> None:
+        for key, used in self._used.items():
+            if f"{key}_time" in self.db:
+                self.db[f"{key}_used"] = str(used)
+        self._used.clear()
+
 
 class FilesystemCacheStorage:
     def __init__(self, settings: BaseSettings):
         self.cachedir: str = data_path(settings["HTTPCACHE_DIR"])
         self.expiration_secs: int = settings.getint("HTTPCACHE_EXPIRATION_SECS")
         self.use_gzip: bool = settings.getbool("HTTPCACHE_GZIP")
+        self.max_size: int = settings.getint("HTTPCACHE_MAX_SIZE")
+        self.max_entries: int = settings.getint("HTTPCACHE_MAX_ENTRIES")
+        self.eviction: str = _get_eviction(settings)
+        self.shared: bool = settings.getbool("HTTPCACHE_SHARED")
+        self._gc_schedule = _GarbageCollectionSchedule(self.max_size, self.max_entries)
         # https://github.com/python/mypy/issues/10740
         self._open: Callable[Concatenate[str | os.PathLike, str, ...], IO[bytes]] = (
             gzip.open if self.use_gzip else open  # type: ignore[assignment]
@@ -326,33 +461,67 @@ class FilesystemCacheStorage:
 
         assert spider.crawler.request_fingerprinter
         self._fingerprinter = spider.crawler.request_fingerprinter
+        name = _get_cache_name(spider, self.shared)
+        if self.max_size or self.max_entries:
+            self.collect_garbage(name)
+        else:
+            self._remove_tmp_files(name, time())
 
     def close_spider(self, spider: Spider) -> None:
         pass
 
     def retrieve_response(self, spider: Spider, request: Request) -> Response | None:
         """Return response if present in cache, or None otherwise."""
+        response = self.retrieve_response_metadata(spider, request)
+        if response is None:
+            return None  # not cached
+        return self.retrieve_response_body(spider, request, response)
+
+    def retrieve_response_metadata(
+        self, spider: Spider, request: Request
+    ) -> Response | None:
+        """Return response without its body if present in cache, or None
+        otherwise."""
         metadata = self._read_meta(spider, request)
         if metadata is None:
             return None  # not cached
         rpath = Path(self._get_request_path(spider, request))
-        with self._open(rpath / "response_body", "rb") as f:
-            body = f.read()
-        with self._open(rpath / "response_headers", "rb") as f:
-            rawheaders = f.read()
+        try:
+            with self._open(rpath / "response_headers", "rb") as f:
+                rawheaders = f.read()
+        except FileNotFoundError:
+            return None  # removed
         url = metadata["response_url"]
         status = metadata["status"]
         headers = Headers(headers_raw_to_dict(rawheaders))
-        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
-        return respcls(url=url, headers=headers, status=status, body=body)
+        respcls = responsetypes.from_args(headers=headers, url=url)
+        return respcls(url=url, headers=headers, status=status)
+
+    def retrieve_response_body(
+        self, spider: Spider, request: Request, response: Response
+    ) -> Response | None:
+        """Return *response*, returned by :meth:`retrieve_response_metadata`,
+        with its body, or None if it is no longer cached."""
+        rpath = Path(self._get_request_path(spider, request))
+        try:
+            with self._open(rpath / "response_body", "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None  # removed
+        return self._with_body(response, body)
+
+    @staticmethod
+    def _with_body(response: Response, body: bytes) -> Response:
+        respcls = responsetypes.from_args(
+            headers=response.headers, url=response.url, body=body
+        )
+        return response.replace(cls=respcls, body=body)
 
     def store_response(
         self, spider: Spider, request: Request, response: Response
     ) -> None:
         """Store the given response in the cache."""
         rpath = Path(self._get_request_path(spider, request))
-        if not rpath.exists():
-            rpath.mkdir(parents=True)
         metadata = {
             "url": request.url,
             "method": request.method,
@@ -360,33 +529,760 @@ class FilesystemCacheStorage:
             "response_url": response.url,
             "timestamp": time(),
         }
-        with self._open(rpath / "meta", "wb") as f:
-            f.write(to_bytes(repr(metadata)))
-        with self._open(rpath / "pickled_meta", "wb") as f:
-            pickle.dump(metadata, f, protocol=4)
-        with self._open(rpath / "response_headers", "wb") as f:
-            f.write(headers_dict_to_raw(response.headers))
-        with self._open(rpath / "response_body", "wb") as f:
-            f.write(response.body)
-        with self._open(rpath / "request_headers", "wb") as f:
-            f.write(headers_dict_to_raw(request.headers))
-        with self._open(rpath / "request_body", "wb") as f:
-            f.write(request.body)
+        self._write_files(
+            rpath,
+            {
+                "meta": to_bytes(repr(metadata)),
+                "pickled_meta": pickle.dumps(metadata, protocol=4),
+                "response_headers": headers_dict_to_raw(response.headers),
+                "response_body": response.body,
+                "request_headers": headers_dict_to_raw(request.headers),
+                "request_body": request.body,
+            },
+        )
+        if self._gc_schedule.stored(len(response.body)):
+            self.collect_garbage(_get_cache_name(spider, self.shared))
+
+    def _write_files(self, rpath: Path, files: dict[str, bytes]) -> None:
+        """Write *files* to a temporary directory, and move it to *rpath*,
+        so that other processes sharing the cache never read a partially
+        written response."""
+        tmpdir = rpath.parent.parent / "tmp"
+        tmpdir.mkdir(parents=True, exist_ok=True)
+        tmppath = Path(mkdtemp(prefix=f"{rpath.name}.", dir=tmpdir))
+        for filename, data in files.items():
+            with self._open(tmppath / filename, "wb") as f:
+                f.write(data)
+        rpath.parent.mkdir(exist_ok=True)
+        try:
+            tmppath.replace(rpath)
+        except OSError:
+            # The response is cached already. Readers miss the cache while it
+            # is being replaced.
+            oldpath = tmppath.with_name(f"{tmppath.name}.old")
+            with contextlib.suppress(FileNotFoundError):
+                rpath.replace(oldpath)
+            try:
+                tmppath.replace(rpath)
+            except OSError:
+                # Another process has cached it in the meantime.
+                shutil.rmtree(tmppath, ignore_errors=True)
+            shutil.rmtree(oldpath, ignore_errors=True)
+
+    def collect_garbage(self, name: str) -> int:
+        """Remove the expired responses cached for the spider called *name*,
+        and evict responses until the cache fits in :setting:`HTTPCACHE_MAX_SIZE`
+        and :setting:`HTTPCACHE_MAX_ENTRIES`.
+
+        Return the number of removed responses.
+        """
+        now = time()
+        entries = []
+        for rpath in Path(self.cachedir, name).glob("??/*"):
+            try:
+                stored = (rpath / "pickled_meta").stat().st_mtime
+                rank = stored
+                if self.eviction == "lru":
+                    # Reading a response updates the modification time of its
+                    # directory.
+                    rank = max(stored, rpath.stat().st_mtime)
+                size = sum(path.stat().st_size for path in rpath.iterdir())
+                shared = self._get_shared_files(rpath)
+            except FileNotFoundError:
+                continue  # being replaced or removed by another process
+            expired = 0 < self.expiration_secs < now - stored
+            entries.append((rpath, expired, rank, size, shared))
+        shared_sizes = {}
+        for path in self._iter_shared_files(name):
+            with contextlib.suppress(FileNotFoundError):
+                shared_sizes[path] = path.stat().st_size
+        removed, unused = _select_garbage(
+            entries, shared_sizes, self.max_size, self.max_entries
+        )
+        for rpath in removed:
+            shutil.rmtree(rpath, ignore_errors=True)
+        for path in unused:
+            with contextlib.suppress(FileNotFoundError):
+                # Another process may have just written it for a response
+                # that it has not stored yet.
+                if path.stat().st_mtime < now - _GC_GRACE_PERIOD:
+                    path.unlink()
+        self._remove_tmp_files(name, now)
+        return len(removed)
+
+    def _remove_tmp_files(self, name: str, now: float) -> None:
+        """Remove the temporary files of the spider called *name* left behind
+        by processes that stopped while writing them."""
+        for path in self._iter_tmp_files(name):
+            with contextlib.suppress(FileNotFoundError):
+                if path.stat().st_mtime >= now - _GC_GRACE_PERIOD:
+                    continue
+                if path.is_dir():
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    path.unlink()
+
+    def _iter_tmp_files(self, name: str) -> Iterator[Path]:
+        """Iterate over the temporary files and directories of the spider
+        called *name*."""
+        return Path(self.cachedir, name, "tmp").glob("*")
+
+    def _get_shared_files(self, rpath: Path) -> tuple[Path, ...]:
+        """Return the files outside *rpath* used by the response cached in
+        it."""
+        return ()
+
+    def _iter_shared_files(self, name: str) -> Iterator[Path]:
+        """Iterate over the files that cached responses of the spider called
+        *name* can share."""
+        return iter(())
 
     def _get_request_path(self, spider: Spider, request: Request) -> str:
         key = self._fingerprinter.fingerprint(request).hex()
-        return str(Path(self.cachedir, spider.name, key[0:2], key))
+        name = _get_cache_name(spider, self.shared)
+        return str(Path(self.cachedir, name, key[0:2], key))
 
     def _read_meta(self, spider: Spider, request: Request) -> dict[str, Any] | None:
         rpath = Path(self._get_request_path(spider, request))
         metapath = rpath / "pickled_meta"
-        if not metapath.exists():
+        try:
+            mtime = metapath.stat().st_mtime
+            if 0 < self.expiration_secs < time() - mtime:
+                return None  # expired
+            if self.eviction == "lru" and (self.max_size or self.max_entries):
+                os.utime(rpath)
+            with self._open(metapath, "rb") as f:
+                metadata = cast("dict[str, Any]", pickle.load(f))  # noqa: S301
+        except FileNotFoundError:
             return None  # not found
-        mtime = metapath.stat().st_mtime
-        if 0 < self.expiration_secs < time() - mtime:
+        request.meta["_httpcache_stored"] = mtime
+        return metadata
+
+
+class DeduplicatingCacheStorage(FilesystemCacheStorage):
+    """Filesystem cache storage that stores each distinct response body only
+    once, content-addressed by its hash, and compressed.
+
+    Bodies are compressed with zstd if the zstandard library is installed,
+    using a dictionary trained on the first cached bodies, or with gzip
+    otherwise.
+    """
+
+    def __init__(self, settings: BaseSettings):
+        super().__init__(settings)
+        self.dict_size: int = settings.getint("HTTPCACHE_DICT_SIZE")
+        try:
+            import zstandard  # noqa: PLC0415
+        except ImportError:
+            self._zstandard: ModuleType | None = None
+        else:
+            self._zstandard = zstandard
+        self._bodies_path: Path = Path(self.cachedir)
+        self._dictionary: Any = None
+        self._compressor: Any = None
+        self._decompressor: Any = None
+        # Bodies to train the dictionary on, and their total size.
+        self._samples: list[bytes] = []
+        self._samples_size: int = 0
+
+    def open_spider(self, spider: Spider) -> None:
+        super().open_spider(spider)
+        name = _get_cache_name(spider, self.shared)
+        self._bodies_path = Path(self.cachedir, name, "bodies")
+        self._bodies_path.mkdir(parents=True, exist_ok=True)
+        self._samples, self._samples_size = [], 0
+        if self._zstandard is None:
+            return
+        self._set_dictionary(self._read_dictionary())
+
+    def retrieve_response_body(
+        self, spider: Spider, request: Request, response: Response
+    ) -> Response | None:
+        rpath = Path(self._get_request_path(spider, request))
+        try:
+            (bodypath,) = self._get_shared_files(rpath)
+            data = bodypath.read_bytes()
+        except FileNotFoundError:
+            return None  # removed
+        if bodypath.suffix == ".zst" and self._zstandard is None:
+            logger.warning(
+                "Ignoring cached body of %(request)s compressed with zstd, "
+                "which requires installing the zstandard library",
+                {"request": request},
+                extra={"spider": spider},
+            )
+            return None
+        try:
+            body = self._decompress(bodypath.suffix, data)
+        except Exception as e:
+            logger.warning(
+                "Removing cached body of %(request)s that cannot be "
+                "decompressed: %(error)s",
+                {"request": request, "error": e},
+                extra={"spider": spider},
+            )
+            # Responses with this body are stored again when downloaded again.
+            bodypath.unlink(missing_ok=True)
+            return None
+        return self._with_body(response, body)
+
+    def store_response(
+        self, spider: Spider, request: Request, response: Response
+    ) -> None:
+        digest = hashlib.sha256(response.body).hexdigest()
+        suffix = ".gz" if self._zstandard is None else ".zst"
+        body = f"{digest[:2]}/{digest}{suffix}"
+        bodypath = self._bodies_path / body
+        try:
+            # Garbage collection keeps recently modified bodies, so that it
+            # does not remove this one before the response is stored.
+            os.utime(bodypath)
+        except FileNotFoundError:
+            bodypath.parent.mkdir(exist_ok=True)
+            self._write(bodypath, self._compress(response.body))
+        rpath = Path(self._get_request_path(spider, request))
+        metadata = {
+            "url": request.url,
+            "method": request.method,
+            "status": response.status,
+            "response_url": response.url,
+            "timestamp": time(),
+            "body": body,
+        }
+        self._write_files(
+            rpath,
+            {
+                "meta": to_bytes(repr(metadata)),
+                "pickled_meta": pickle.dumps(metadata, protocol=4),
+                "response_headers": headers_dict_to_raw(response.headers),
+                "request_headers": headers_dict_to_raw(request.headers),
+                "request_body": request.body,
+            },
+        )
+        if self._gc_schedule.stored(len(response.body)):
+            self.collect_garbage(_get_cache_name(spider, self.shared))
+
+    def _get_shared_files(self, rpath: Path) -> tuple[Path, ...]:
+        with self._open(rpath / "pickled_meta", "rb") as f:
+            metadata = pickle.load(f)  # noqa: S301
+        return (rpath.parent.parent / "bodies" / metadata["body"],)
+
+    def _iter_shared_files(self, name: str) -> Iterator[Path]:
+        for path in Path(self.cachedir, name, "bodies").glob("*/*"):
+            if not path.name.endswith(".tmp"):
+                yield path
+
+    def _iter_tmp_files(self, name: str) -> Iterator[Path]:
+        yield from super()._iter_tmp_files(name)
+        yield from Path(self.cachedir, name, "bodies").glob("*.tmp")
+        yield from Path(self.cachedir, name, "bodies").glob("*/*.tmp")
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        # Write to a temporary file first, so that other processes never read
+        # a partially written file.
+        tmppath = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmppath.write_bytes(data)
+        tmppath.replace(path)
+
+    @staticmethod
+    def _create(path: Path, data: bytes) -> bool:
+        """Write *data* to *path* unless it exists, and return whether it was
+        written.
+
+        Like :meth:`_write`, but if several processes create *path* at the
+        same time, only one of them writes it.
+        """
+        tmppath = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmppath.write_bytes(data)
+        try:
+            os.link(tmppath, path)
+        except FileExistsError:
+            return False
+        finally:
+            tmppath.unlink()
+        return True
+
+    def _read_dictionary(self) -> Any:
+        assert self._zstandard is not None
+        dict_path = self._bodies_path / "dictionary"
+        if not dict_path.exists():
+            return None
+        return self._zstandard.ZstdCompressionDict(dict_path.read_bytes())
+
+    def _set_dictionary(self, dict_data: Any) -> None:
+        assert self._zstandard is not None
+        self._compressor = self._zstandard.ZstdCompressor(dict_data=dict_data)
+        self._decompressor = self._zstandard.ZstdDecompressor(dict_data=dict_data)
+        self._dictionary = dict_data
+
+    def _compress(self, body: bytes) -> bytes:
+        if self._zstandard is None:
+            return gzip.compress(body)
+        if self._dictionary is None and self.dict_size:
+            self._add_sample(body)
+        return cast("bytes", self._compressor.compress(body))
+
+    def _decompress(self, suffix: str, data: bytes) -> bytes:
+        if suffix == ".gz":
+            return gzip.decompress(data)
+        assert self._zstandard is not None
+        dict_id = self._zstandard.get_frame_parameters(data).dict_id
+        if dict_id and (
+            self._dictionary is None or self._dictionary.dict_id() != dict_id
+        ):
+            # Another process sharing the cache may have trained the
+            # dictionary after this one opened it.
+            dict_data = self._read_dictionary()
+            if dict_data is not None:
+                self._set_dictionary(dict_data)
+        return cast("bytes", self._decompressor.decompress(data))
+
+    def _add_sample(self, body: bytes) -> None:
+        """Keep *body* to train the dictionary on, and train it once there
+        are enough samples."""
+        assert self._zstandard is not None
+        self._samples.append(body)
+        self._samples_size += len(body)
+        # zstd recommends about 100 times the dictionary size of samples.
+        if self._samples_size < self.dict_size * 100:
+            return
+        samples, self._samples, self._samples_size = self._samples, [], 0
+        try:
+            dict_data = self._zstandard.train_dictionary(self.dict_size, samples)
+        except self._zstandard.ZstdError as e:
+            logger.debug("Could not train an HTTP cache dictionary: %s", e)
+            return
+        if not self._create(self._bodies_path / "dictionary", dict_data.as_bytes()):
+            # Another process sharing the cache trained one already.
+            dict_data = self._read_dictionary()
+        self._set_dictionary(dict_data)
+
+
+class PackedCacheStorage:
+    """Cache storage that appends responses to a few large segment files,
+    with a DBM index that maps request fingerprints to their location, so
+    that retrieving a response takes an index lookup and a single read.
+
+    Segments are compacted once enough of their records have been replaced
+    or have expired.
+    """
+
+    # Store time, key length and payload length.
+    _RECORD_HEADER = struct.Struct("<dII")
+    # Segment number, record offset, record size and store time.
+    _INDEX_ENTRY = struct.Struct("<IQId")
+    _SEGMENTS_KEY = "segments"
+
+    def __init__(self, settings: BaseSettings):
+        self.cachedir: str = data_path(settings["HTTPCACHE_DIR"], createdir=True)
+        self.expiration_secs: int = settings.getint("HTTPCACHE_EXPIRATION_SECS")
+        self.dbmodule: ModuleType = import_module(settings["HTTPCACHE_DBM_MODULE"])
+        self.segment_size: int = settings.getint("HTTPCACHE_SEGMENT_SIZE")
+        self.compact_ratio: float = settings.getfloat("HTTPCACHE_COMPACT_RATIO")
+        self.shared: bool = settings.getbool("HTTPCACHE_SHARED")
+        self.db: Any = None  # the real type is private
+        self._path: Path = Path(self.cachedir)
+        # Size, replaced bytes and newest store time of each segment.
+        self._segments: dict[int, dict[str, float]] = {}
+        self._segment: int = 0
+        self._writer: IO[bytes] | None = None
+        self._readers: dict[int, IO[bytes]] = {}
+        self._compacting: bool = False
+
+    def open_spider(self, spider: Spider) -> None:
+        self._path = Path(self.cachedir, _get_cache_name(spider, self.shared))
+        self._path.mkdir(parents=True, exist_ok=True)
+        self.db = self.dbmodule.open(str(self._path / "index.db"), "c")
+        if self._SEGMENTS_KEY in self.db:
+            self._segments = pickle.loads(self.db[self._SEGMENTS_KEY])  # noqa: S301
+        for path in self._path.glob("*.seg"):
+            segment = int(path.stem)
+            stat = path.stat()
+            info = self._segments.setdefault(
+                segment, {"size": 0, "dead": 0, "newest": stat.st_mtime}
+            )
+            # Records may have been written after the segment info was last
+            # saved.
+            info["size"] = stat.st_size
+        for segment in list(self._segments):
+            if not self._segment_path(segment).exists():
+                del self._segments[segment]
+        self._segment = max(self._segments, default=1)
+        self._open_writer()
+
+        logger.debug(
+            "Using packed cache storage in %(cachepath)s",
+            {"cachepath": self._path},
+            extra={"spider": spider},
+        )
+
+        assert spider.crawler.request_fingerprinter
+        self._fingerprinter: RequestFingerprinterProtocol = (
+            spider.crawler.request_fingerprinter
+        )
+        self._compact()
+
+    def close_spider(self, spider: Spider) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        for reader in self._readers.values():
+            reader.close()
+        self._readers.clear()
+        self._save_segments()
+        self.db.close()
+
+    def retrieve_response(self, spider: Spider, request: Request) -> Response | None:
+        key = self._fingerprinter.fingerprint(request).hex()
+        entry = self._get_entry(key)
+        if entry is None:
+            return None  # not found
+        segment, offset, size, timestamp = entry
+        if 0 < self.expiration_secs < time() - timestamp:
             return None  # expired
-        with self._open(metapath, "rb") as f:
-            return cast("dict[str, Any]", pickle.load(f))  # noqa: S301
+        request.meta["_httpcache_stored"] = timestamp
+        reader = self._get_reader(segment)
+        if reader is None:
+            return None  # removed segment
+        reader.seek(offset)
+        record = reader.read(size)
+        # The record header is followed by the key and the payload.
+        key_end = self._RECORD_HEADER.size + len(key)
+        if len(record) != size or record[self._RECORD_HEADER.size : key_end] != (
+            key.encode()
+        ):
+            logger.warning(
+                "Ignoring corrupted cache entry for %(request)s",
+                {"request": request},
+                extra={"spider": spider},
+            )
+            return None
+        data = pickle.loads(record[key_end:])  # noqa: S301
+        url = data["url"]
+        status = data["status"]
+        headers = Headers(data["headers"])
+        body = data["body"]
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=status, body=body)
+
+    def store_response(
+        self, spider: Spider, request: Request, response: Response
+    ) -> None:
+        key = self._fingerprinter.fingerprint(request).hex()
+        data = {
+            "status": response.status,
+            "url": response.url,
+            "headers": dict(response.headers),
+            "body": response.body,
+        }
+        payload = pickle.dumps(data, protocol=4)
+        timestamp = time()
+        key_bytes = key.encode()
+        record = b"".join(
+            (
+                self._RECORD_HEADER.pack(timestamp, len(key_bytes), len(payload)),
+                key_bytes,
+                payload,
+            )
+        )
+        self._append(key, record, timestamp)
+
+    def _segment_path(self, segment: int) -> Path:
+        return self._path / f"{segment:08d}.seg"
+
+    def _open_writer(self) -> None:
+        self._writer = self._segment_path(self._segment).open("ab")
+        self._segments.setdefault(self._segment, {"size": 0, "dead": 0, "newest": 0})
+
+    def _get_reader(self, segment: int) -> IO[bytes] | None:
+        reader = self._readers.get(segment)
+        if reader is None:
+            try:
+                reader = self._segment_path(segment).open("rb", buffering=0)
+            except FileNotFoundError:
+                return None
+            self._readers[segment] = reader
+        return reader
+
+    def _get_entry(self, key: str) -> tuple[int, int, int, float] | None:
+        try:
+            value = self.db[key]
+        except KeyError:
+            return None
+        return cast("tuple[int, int, int, float]", self._INDEX_ENTRY.unpack(value))
+
+    def _append(self, key: str, record: bytes, timestamp: float) -> None:
+        assert self._writer is not None
+        info = self._segments[self._segment]
+        rolled = bool(info["size"]) and info["size"] + len(record) > self.segment_size
+        if rolled:
+            self._roll()
+            info = self._segments[self._segment]
+        offset = int(info["size"])
+        self._writer.write(record)
+        # Flush so that the record can be read from the segment right away.
+        self._writer.flush()
+        info["size"] += len(record)
+        info["newest"] = max(info["newest"], timestamp)
+        old_entry = self._get_entry(key)
+        if old_entry is not None and old_entry[0] in self._segments:
+            self._segments[old_entry[0]]["dead"] += old_entry[2]
+        self.db[key] = self._INDEX_ENTRY.pack(
+            self._segment, offset, len(record), timestamp
+        )
+        if rolled:
+            self._compact()
+
+    def _roll(self) -> None:
+        assert self._writer is not None
+        self._writer.close()
+        self._segment += 1
+        self._open_writer()
+
+    def _save_segments(self) -> None:
+        self.db[self._SEGMENTS_KEY] = pickle.dumps(self._segments, protocol=4)
+
+    def _iter_records(self, segment: int) -> Iterator[tuple[int, float, str, bytes]]:
+        """Yield the offset, store time, key and whole record of each record
+        of *segment*."""
+        with self._segment_path(segment).open("rb") as f:
+            offset = 0
+            while True:
+                header = f.read(self._RECORD_HEADER.size)
+                if len(header) < self._RECORD_HEADER.size:
+                    return  # end of segment, or incomplete record
+                timestamp, key_size, payload_size = self._RECORD_HEADER.unpack(header)
+                rest = f.read(key_size + payload_size)
+                if len(rest) < key_size + payload_size:
+                    return
+                yield offset, timestamp, rest[:key_size].decode(), header + rest
+                offset += len(header) + len(rest)
+
+    def _compact(self) -> None:
+        """Remove the segments whose records have all expired, and rewrite
+        the segments in which the share of replaced records reaches
+        ``compact_ratio``, keeping only their current and fresh records."""
+        if self._compacting:
+            return
+        self._compacting = True
+        try:
+            now = time()
+            for segment, info in list(self._segments.items()):
+                if segment == self._segment:
+                    continue
+                expired = 0 < self.expiration_secs < now - info["newest"]
+                if expired or info["dead"] >= info["size"] * self.compact_ratio:
+                    self._compact_segment(segment, now)
+        finally:
+            self._compacting = False
+        self._save_segments()
+
+    def _compact_segment(self, segment: int, now: float) -> None:
+        for offset, timestamp, key, record in self._iter_records(segment):
+            entry = self._get_entry(key)
+            if entry is None or entry[:2] != (segment, offset):
+                continue  # replaced
+            if 0 < self.expiration_secs < now - timestamp:
+                del self.db[key]
+            else:
+                self._append(key, record, timestamp)
+        reader = self._readers.pop(segment, None)
+        if reader is not None:
+            reader.close()
+        self._segment_path(segment).unlink()
+        del self._segments[segment]
+
+
+class ThreadedCacheStorage:
+    """Cache storage that runs the blocking calls of the storage set in
+    :setting:`HTTPCACHE_THREADED_STORAGE` in a worker thread, so that disk
+    I/O and (de)serialization never block the reactor.
+
+    Responses are retrieved asynchronously and stored in the background. Up
+    to :setting:`HTTPCACHE_WRITE_QUEUE_SIZE` responses can be waiting to be
+    stored, further calls to :meth:`store_response` return an awaitable that
+    is done when their response is stored.
+
+    All calls run in the same thread, in the order in which they are made, so
+    the wrapped storage does not need to be thread-safe, and a response is
+    retrieved after any pending write of it.
+    """
+
+    def __init__(self, settings: BaseSettings):
+        self.storage: Any = load_object(settings["HTTPCACHE_THREADED_STORAGE"])(
+            settings
+        )
+        self.write_queue_size: int = settings.getint("HTTPCACHE_WRITE_QUEUE_SIZE")
+        self._threadpool: ThreadPool | None = None
+        self._pending_writes: int = 0
+
+    def _call(self, f: Callable[..., _T], *args: Any) -> Deferred[_T]:
+        from twisted.internet import reactor
+
+        assert self._threadpool is not None
+        return deferToThreadPool(reactor, self._threadpool, f, *args)
+
+    def collect_garbage(self, name: str) -> int:
+        return cast("int", self.storage.collect_garbage(name))
+
+    def open_spider(self, spider: Spider) -> Deferred[None]:
+        self._threadpool = ThreadPool(minthreads=1, maxthreads=1, name="httpcache")
+        self._threadpool.start()
+        return self._call(self.storage.open_spider, spider)
+
+    async def close_spider(self, spider: Spider) -> None:
+        assert self._threadpool is not None
+        try:
+            # Pending writes are done before the storage is closed.
+            await maybe_deferred_to_future(
+                self._call(self.storage.close_spider, spider)
+            )
+        finally:
+            self._threadpool.stop()
+            self._threadpool = None
+
+    async def retrieve_response(
+        self, spider: Spider, request: Request
+    ) -> Response | None:
+        return await maybe_deferred_to_future(
+            self._call(self.storage.retrieve_response, spider, request)
+        )
+
+    async def retrieve_response_metadata(
+        self, spider: Spider, request: Request
+    ) -> Response | None:
+        # Storages without a two-phase API return the whole response.
+        retrieve = getattr(
+            self.storage, "retrieve_response_metadata", self.storage.retrieve_response
+        )
+        return await maybe_deferred_to_future(self._call(retrieve, spider, request))
+
+    async def retrieve_response_body(
+        self, spider: Spider, request: Request, response: Response
+    ) -> Response | None:
+        if not hasattr(self.storage, "retrieve_response_body"):
+            return response
+        return await maybe_deferred_to_future(
+            self._call(self.storage.retrieve_response_body, spider, request, response)
+        )
+
+    def store_response(
+        self, spider: Spider, request: Request, response: Response
+    ) -> Awaitable[None] | None:
+        full = 0 < self.write_queue_size <= self._pending_writes
+        self._pending_writes += 1
+        # Later middlewares may modify the headers in place while the
+        # response is waiting to be stored.
+        response = response.replace(headers=response.headers.copy())
+        d = self._call(self.storage.store_response, spider, request, response)
+        d.addErrback(self._store_failed, spider, request)
+        d.addBoth(self._store_done)
+        if full:
+            # Make the caller wait, so that pending writes cannot pile up.
+            return maybe_deferred_to_future(d)
+        return None
+
+    def _store_failed(self, failure: Failure, spider: Spider, request: Request) -> None:
+        logger.error(
+            "Error storing %(request)s in the HTTP cache",
+            {"request": request},
+            exc_info=failure_to_exc_info(failure),
+            extra={"spider": spider},
+        )
+
+    def _store_done(self, _: Any) -> None:
+        self._pending_writes -= 1
+
+
+def _get_cache_name(spider: Spider, shared: bool) -> str:
+    """Return the name under which the responses of *spider* are cached."""
+    return _SHARED_CACHE_NAME if shared else spider.name
+
+
+def _get_eviction(settings: BaseSettings) -> str:
+    eviction: str = settings["HTTPCACHE_EVICTION"]
+    if eviction not in {"lru", "age"}:
+        raise ValueError(
+            f"Invalid HTTPCACHE_EVICTION value: {eviction!r}, expected 'lru' or 'age'"
+        )
+    return eviction
+
+
+class _GarbageCollectionSchedule:
+    """Tell a storage to collect garbage while it stores responses, every
+    time the responses stored since the last time reach a tenth of
+    :setting:`HTTPCACHE_MAX_SIZE` or :setting:`HTTPCACHE_MAX_ENTRIES`."""
+
+    def __init__(self, max_size: int, max_entries: int):
+        self.max_size: int = max_size
+        self.max_entries: int = max_entries
+        self.size: int = 0
+        self.entries: int = 0
+
+    def stored(self, size: int) -> bool:
+        """Count a stored response of *size* bytes, and return whether to
+        collect garbage."""
+        self.size += size
+        self.entries += 1
+        if (self.max_size and self.size * 10 >= self.max_size) or (
+            self.max_entries and self.entries * 10 >= self.max_entries
+        ):
+            self.size = self.entries = 0
+            return True
+        return False
+
+
+def _select_garbage(
+    entries: list[tuple[_T, bool, float, int, tuple[Path, ...]]],
+    shared_sizes: dict[Path, int],
+    max_size: int,
+    max_entries: int,
+) -> tuple[list[_T], list[Path]]:
+    """Return the keys of the cache entries to remove, and the shared files
+    that no remaining entry uses.
+
+    *entries* are (key, expired, rank, size, shared files) tuples, and
+    *shared_sizes* are the sizes of all shared files. Expired entries are
+    removed, and then entries with the lowest rank, until the remaining
+    entries and the shared files that they use fit in *max_size* bytes and
+    *max_entries* entries. A zero maximum means no limit.
+    """
+    refs = dict.fromkeys(shared_sizes, 0)
+    for *_, shared in entries:
+        for path in shared:
+            if path in refs:
+                refs[path] += 1
+    size = sum(entry[3] for entry in entries)
+    size += sum(shared_sizes[path] for path, count in refs.items() if count)
+    count = len(entries)
+    removed = []
+
+    def remove(key: _T, entry_size: int, shared: tuple[Path, ...]) -> None:
+        nonlocal size, count
+        removed.append(key)
+        size -= entry_size
+        count -= 1
+        for path in shared:
+            if path in refs:
+                refs[path] -= 1
+                if not refs[path]:
+                    size -= shared_sizes[path]
+
+    live = []
+    for key, expired, rank, entry_size, shared in entries:
+        if expired:
+            remove(key, entry_size, shared)
+        else:
+            live.append((rank, entry_size, shared, key))
+    live.sort(key=lambda entry: entry[0])
+    for _, entry_size, shared, key in live:
+        if (not max_size or size <= max_size) and (
+            not max_entries or count <= max_entries
+        ):
+            break
+        remove(key, entry_size, shared)
+    return removed, [path for path, count in refs.items() if not count]
 
 
 def parse_cachecontrol(header: bytes) -> dict[bytes, bytes | None]:
@@ -415,3 +1311,22 @@ def rfc1123_to_epoch(date_str: str | bytes | None) -> int | None:
         return mktime_tz(parsedate_tz(date_str))  # type: ignore[arg-type]
     except Exception:
         return None
+
+
+#: Number of distinct header values whose parsing results are cached.
+_HEADER_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=_HEADER_CACHE_SIZE)
+def _parse_cachecontrol_cached(
+    header: bytes, ignored: tuple[bytes, ...] = ()
+) -> dict[bytes, bytes | None]:
+    """Return :func:`parse_cachecontrol` of *header* without the *ignored*
+    directives. The result is shared, and must not be modified."""
+    directives = parse_cachecontrol(header)
+    for key in ignored:
+        directives.pop(key, None)
+    return directives
+
+
+_rfc1123_to_epoch_cached = lru_cache(maxsize=_HEADER_CACHE_SIZE)(rfc1123_to_epoch)
@@ -0,0 +1,202 @@
+"""
+Extension that tracks download latency, response size and response status
+percentiles per download slot.
+
+See documentation in docs/topics/extensions.rst
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+from scrapy import Request, Spider, signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.asyncio import AsyncioLoopingCall, create_looping_call
+from scrapy.utils.serialize import ScrapyJSONEncoder
+
+if TYPE_CHECKING:
+    from json import JSONEncoder
+
+    from twisted.internet.task import LoopingCall
+
+    # typing.Self requires Python 3.11
+    from typing_extensions import Self
+
+    from scrapy.crawler import Crawler
+    from scrapy.http import Response
+    from scrapy.statscollectors import StatsCollector
+
+
+logger = logging.getLogger(__name__)
+
+
+class QuantileSketch:
+    """Streaming quantile estimator with bounded memory.
+
+    Values are counted in buckets whose bounds grow exponentially, so that any
+    quantile is estimated with a relative error of at most
+    *relative_accuracy*. If more than *max_buckets* buckets are needed, the
+    lowest buckets are merged, which only affects the accuracy of the lowest
+    quantiles.
+    """
+
+    __slots__ = ("_buckets", "_gamma_log", "count", "max_buckets", "zero_count")
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._gamma_log: float = math.log(gamma)
+        self._buckets: dict[int, int] = {}
+        self.max_buckets: int = max_buckets
+        self.count: int = 0
+        self.zero_count: int = 0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._gamma_log)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        if len(self._buckets) > self.max_buckets:
+            lowest, second = sorted(self._buckets)[:2]
+            self._buckets[second] += self._buckets.pop(lowest)
+
+    def quantile(self, q: float) -> float | None:
+        """Return an estimate of the *q* quantile (0 <= q <= 1), or ``None``
+        if no value has been added."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if rank < seen:
+                gamma = math.exp(self._gamma_log)
+                return 2 * gamma**index / (gamma + 1)
+        return None  # pragma: no cover
+
+
+class _SlotData:
+    __slots__ = ("latency", "response_bytes", "status")
+
+    def __init__(self) -> None:
+        self.latency: QuantileSketch = QuantileSketch()
+        self.response_bytes: QuantileSketch = QuantileSketch()
+        self.status: dict[str, int] = {}
+
+
+class SlotStats:
+    """Track download latency, response size and status class statistics per
+    download slot, and report them periodically."""
+
+    QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+    def __init__(
+        self,
+        stats: StatsCollector,
+        interval: float = 60.0,
+        top_slots: int = 10,
+        max_slots: int = 10000,
+    ):
+        self.stats: StatsCollector = stats
+        self.interval: float = interval
+        self.top_slots: int = top_slots
+        self.max_slots: int = max_slots
+        self.slots: OrderedDict[str, _SlotData] = OrderedDict()
+        self.task: AsyncioLoopingCall | LoopingCall | None = None
+        self.encoder: JSONEncoder = ScrapyJSONEncoder(sort_keys=True, indent=4)
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> Self:
+        if not crawler.settings.getbool("SLOTSTATS_ENABLED"):
+            raise NotConfigured
+        assert crawler.stats
+        o = cls(
+            crawler.stats,
+            crawler.settings.getfloat("SLOTSTATS_INTERVAL"),
+            crawler.settings.getint("SLOTSTATS_TOP_SLOTS"),
+            crawler.settings.getint("SLOTSTATS_MAX_SLOTS"),
+        )
+        crawler.signals.connect(o.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(o.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(
+            o.response_downloaded, signal=signals.response_downloaded
+        )
+        return o
+
+    def spider_opened(self, spider: Spider) -> None:
+        if self.interval:
+            self.task = create_looping_call(self.log)
+            self.task.start(self.interval, now=False)
+
+    def response_downloaded(
+        self, response: Response, request: Request, spider: Spider
+    ) -> None:
+        key = request.meta.get("download_slot")
+        if key is None:
+            return
+        data = self.slots.get(key)
+        if data is None:
+            data = self.slots[key] = _SlotData()
+            if len(self.slots) > self.max_slots:
+                self.slots.popitem(last=False)
+        else:
+            self.slots.move_to_end(key)
+        latency = request.meta.get("download_latency")
+        if latency is not None:
+            data.latency.add(latency)
+        data.response_bytes.add(len(response.body))
+        status_class = f"{response.status // 100}xx"
+        data.status[status_class] = data.status.get(status_class, 0) + 1
+
+    def slot_stats(self) -> dict[str, dict[str, Any]]:
+        """Return the statistics of the slots with the highest p95 latency,
+        up to ``top_slots`` slots."""
+        slots = sorted(
+            self.slots.items(),
+            key=lambda item: item[1].latency.quantile(0.95) or 0.0,
+            reverse=True,
+        )
+        if self.top_slots:
+            slots = slots[: self.top_slots]
+        result = {}
+        for key, data in slots:
+            slot_result: dict[str, Any] = {
+                "response_count": data.response_bytes.count,
+                "status": dict(data.status),
+            }
+            for name, q in self.QUANTILES.items():
+                latency = data.latency.quantile(q)
+                if latency is not None:
+                    slot_result[f"latency/{name}"] = round(latency, 3)
+                response_bytes = data.response_bytes.quantile(q)
+                if response_bytes is not None:
+                    slot_result[f"response_bytes/{name}"] = round(response_bytes)
+            result[key] = slot_result
+        return result
+
+    def update_stats(self, slot_stats: dict[str, dict[str, Any]]) -> None:
+        for slot, values in slot_stats.items():
+            for name, value in values.items():
+                if name == "status":
+                    for status_class, count in value.items():
+                        self.stats.set_value(
+                            f"slotstats/{slot}/status/{status_class}", count
+                        )
+                else:
+                    self.stats.set_value(f"slotstats/{slot}/{name}", value)
+
+    def log(self) -> None:
+        slot_stats = self.slot_stats()
+        if slot_stats:
+            logger.info("Slot stats: %s", self.encoder.encode(slot_stats))
+
+    def spider_closed(self, spider: Spider, reason: str) -> None:
+        if self.task and self.task.running:
+            self.task.stop()
+        self.update_stats(self.slot_stats())
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import logging
+from time import monotonic
 from typing import TYPE_CHECKING
+from weakref import WeakKeyDictionary
 
 from scrapy import Request, Spider, signals
 from scrapy.exceptions import NotConfigured
@@ -18,6 +20,18 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+class _SlotState:
+    """Per-slot data used to adjust the concurrency of a download slot."""
+
+    __slots__ = ("decreased_at", "healthy", "latency", "min_latency")
+
+    def __init__(self) -> None:
+        self.min_latency: float | None = None
+        self.latency: float | None = None
+        self.healthy: int = 0
+        self.decreased_at: float = float("-inf")
+
+
 class AutoThrottle:
     def __init__(self, crawler: Crawler):
         self.crawler: Crawler = crawler
@@ -33,10 +47,27 @@ class AutoThrottle:
                 f"AUTOTHROTTLE_TARGET_CONCURRENCY "
                 f"({self.target_concurrency!r}) must be higher than 0."
             )
+        self.adjust_concurrency: bool = crawler.settings.getbool(
+            "AUTOTHROTTLE_ADJUST_CONCURRENCY"
+        )
+        self.max_concurrency: int = crawler.settings.getint(
+            "AUTOTHROTTLE_MAX_CONCURRENCY"
+        ) or crawler.settings.getint("CONCURRENT_REQUESTS")
+        self.backoff_http_codes: set[int] = {
+            int(code)
+            for code in crawler.settings.getlist("AUTOTHROTTLE_BACKOFF_HTTP_CODES")
+        }
+        self.download_timeout: float = crawler.settings.getfloat("DOWNLOAD_TIMEOUT")
+        self._slot_states: WeakKeyDictionary[Slot, _SlotState] = WeakKeyDictionary()
+        self._responses: WeakKeyDictionary[Request, bool] = WeakKeyDictionary()
         crawler.signals.connect(self._spider_opened, signal=signals.spider_opened)
         crawler.signals.connect(
             self._response_downloaded, signal=signals.response_downloaded
         )
+        if self.adjust_concurrency:
+            crawler.signals.connect(
+                self._request_left_downloader, signal=signals.request_left_downloader
+            )
 
     @classmethod
     def from_crawler(cls, crawler: Crawler) -> Self:
@@ -62,6 +93,8 @@ class AutoThrottle:
     def _response_downloaded(
         self, response: Response, request: Request, spider: Spider
     ) -> None:
+        if self.adjust_concurrency:
+            self._responses[request] = True
         key, slot = self._get_slot(request, spider)
         latency = request.meta.get("download_latency")
         if (
@@ -72,6 +105,8 @@ class AutoThrottle:
             return
 
         olddelay = slot.delay
+        if self.adjust_concurrency:
+            self._adjust_concurrency(key, slot, latency, response)
         self._adjust_delay(slot, latency, response)
         if self.debug:
             diff = slot.delay - olddelay
@@ -107,7 +142,10 @@ class AutoThrottle:
         # If a server needs `latency` seconds to respond then
         # we should send a request each `latency/N` seconds
         # to have N requests processed in parallel
-        target_delay = latency / self.target_concurrency
+        target_concurrency = (
+            slot.concurrency if self.adjust_concurrency else self.target_concurrency
+        )
+        target_delay = latency / target_concurrency
 
         # Adjust the delay to make it closer to target_delay
         new_delay = (slot.delay + target_delay) / 2.0
@@ -127,3 +165,71 @@ class AutoThrottle:
             return
 
         slot.delay = new_delay
+
+    def _request_left_downloader(self, request: Request, spider: Spider) -> None:
+        if self._responses.pop(request, False) or request.meta.get(
+            "autothrottle_dont_adjust_delay", False
+        ):
+            return
+        # The download failed, e.g. it timed out.
+        key, slot = self._get_slot(request, spider)
+        if slot is not None:
+            self._decrease_concurrency(
+                key,
+                slot,
+                request.meta.get("download_latency"),
+                request.meta.get("download_timeout", self.download_timeout),
+            )
+
+    def _adjust_concurrency(
+        self, key: str | None, slot: Slot, latency: float, response: Response
+    ) -> None:
+        """Adjust the concurrency of *slot* (additive increase, multiplicative
+        decrease)."""
+        if response.status in self.backoff_http_codes:
+            self._decrease_concurrency(key, slot, latency)
+            return
+        state = self._slot_states.setdefault(slot, _SlotState())
+        state.latency = latency
+        if state.min_latency is None or latency < state.min_latency:
+            state.min_latency = latency
+        # Responses that take more than twice the lowest latency seen suggest
+        # that requests are queuing up on the server.
+        if response.status >= 400 or latency > 2 * state.min_latency:
+            state.healthy = 0
+            return
+        state.healthy += 1
+        # Grow by 1 once every request allowed in parallel got a healthy
+        # response.
+        if state.healthy >= slot.concurrency:
+            state.healthy = 0
+            slot.concurrency = min(slot.concurrency + 1, self.max_concurrency)
+
+    def _decrease_concurrency(
+        self,
+        key: str | None,
+        slot: Slot,
+        latency: float | None,
+        timeout: float | None = None,
+    ) -> None:
+        state = self._slot_states.setdefault(slot, _SlotState())
+        state.healthy = 0
+        now = monotonic()
+        # Decrease at most once per round trip, so that a burst of errors
+        # from requests sent in parallel counts as a single decrease. Failed
+        # downloads have no latency, so the latest latency of the slot is
+        # used, or the download timeout if no response was received yet.
+        round_trip = max(latency or 0.0, state.latency or 0.0, slot.delay)
+        if not round_trip:
+            round_trip = timeout or self.download_timeout
+        if now - state.decreased_at < round_trip:
+            return
+        state.decreased_at = now
+        oldconcurrency = slot.concurrency
+        slot.concurrency = max(slot.concurrency // 2, 1)
+        if self.debug and slot.concurrency != oldconcurrency:
+            logger.info(
+                "slot: %(slot)s | concurrency: %(old)d -> %(new)d",
+                {"slot": key, "old": oldconcurrency, "new": slot.concurrency},
+                extra={"spider": self.crawler.spider},
+            )
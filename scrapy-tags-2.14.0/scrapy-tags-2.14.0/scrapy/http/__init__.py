@@ -13,6 +13,7 @@ from scrapy.http.request.rpc import XmlRpcRequest
 from scrapy.http.response import Response
 from scrapy.http.response.html import HtmlResponse
 from scrapy.http.response.json import JsonResponse
+from scrapy.http.response.stream import StreamingResponse
 from scrapy.http.response.text import TextResponse
 from scrapy.http.response.xml import XmlResponse
 
@@ -24,6 +25,7 @@ __all__ = [
     "JsonResponse",
     "Request",
     "Response",
+    "StreamingResponse",
     "TextResponse",
     "XmlResponse",
     "XmlRpcRequest",
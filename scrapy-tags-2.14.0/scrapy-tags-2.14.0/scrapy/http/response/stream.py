@@ -0,0 +1,211 @@
+"""
+This module implements the StreamingResponse class, used for responses whose
+body is delivered to the spider as it is downloaded.
+
+See documentation in docs/topics/request-response.rst
+"""
+
+from __future__ import annotations
+
+import weakref
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+from twisted.internet.defer import Deferred
+
+from scrapy.http.response import Response
+from scrapy.utils.defer import maybe_deferred_to_future
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    # typing.Self requires Python 3.11
+    from typing_extensions import Self
+
+    from scrapy.utils._compression import _Decompressor
+
+
+#: Number of received bytes that can be waiting to be read before the
+#: download is paused.
+_MAX_BUFFER_SIZE = 1024 * 1024
+
+
+class ResponseBodyStream:
+    """Asynchronous iterator over the body chunks of a
+    :class:`StreamingResponse`, in the order in which they are received.
+
+    The download is paused while too much received data is waiting to be
+    read, and it is cancelled when the stream is closed or garbage-collected
+    before the whole body is received.
+
+    .. versionadded:: VERSION
+    """
+
+    def __init__(
+        self,
+        *,
+        pause: Callable[[], None] | None = None,
+        resume: Callable[[], None] | None = None,
+        cancel: Callable[[], Any] | None = None,
+        max_buffer_size: int = _MAX_BUFFER_SIZE,
+    ):
+        self._pause: Callable[[], None] | None = pause
+        self._resume: Callable[[], None] | None = resume
+        self._max_buffer_size: int = max_buffer_size
+        self._chunks: deque[bytes] = deque()
+        self._buffer_size: int = 0
+        self._paused: bool = False
+        self._output: deque[bytes] = deque()
+        self._decompressor: _Decompressor | None = None
+        self._done: bool = False
+        self._error: BaseException | None = None
+        self._waiter: Deferred[None] | None = None
+        # Fired once the download of the body ends, successfully or not, so
+        # that the downloader counts the request until then.
+        self._downloaded: Deferred[None] = Deferred()
+        # Holding no reference to the stream, so that the download is
+        # cancelled if the stream is dropped before it is fully read.
+        self._cancel: weakref.finalize | None = (
+            weakref.finalize(self, cancel) if cancel else None
+        )
+
+    def _feed(self, data: bytes) -> None:
+        """Add a received body chunk."""
+        if self._done:
+            return
+        self._chunks.append(data)
+        self._buffer_size += len(data)
+        if (
+            self._pause
+            and not self._paused
+            and self._buffer_size > self._max_buffer_size
+        ):
+            self._paused = True
+            self._pause()
+        self._wake()
+
+    def _finish(self, error: BaseException | None = None) -> None:
+        """Mark the end of the body, or of the download if *error* is not
+        ``None``."""
+        if self._done:
+            return
+        self._done = True
+        self._error = error
+        if self._cancel:
+            self._cancel.detach()
+        self._wake()
+        self._set_downloaded()
+
+    def _set_downloaded(self) -> None:
+        if not self._downloaded.called:
+            self._downloaded.callback(None)
+
+    def _add_decompressor(self, decompressor: _Decompressor) -> None:
+        self._decompressor = decompressor
+
+    def _wake(self) -> None:
+        if self._waiter is not None:
+            waiter, self._waiter = self._waiter, None
+            waiter.callback(None)
+
+    def _decompress(self, chunk: bytes) -> list[bytes]:
+        if self._decompressor is None:
+            return [chunk]
+        try:
+            return self._decompressor.decompress(chunk)
+        except Exception:
+            self.close()
+            raise
+
+    def _flush(self) -> list[bytes]:
+        if self._decompressor is None:
+            return []
+        decompressor, self._decompressor = self._decompressor, None
+        return decompressor.flush()
+
+    def __aiter__(self) -> Self:
+        return self
+
+    async def __anext__(self) -> bytes:
+        while True:
+            if self._output:
+                return self._output.popleft()
+            if self._chunks:
+                chunk = self._chunks.popleft()
+                self._buffer_size -= len(chunk)
+                if self._paused and self._buffer_size <= self._max_buffer_size // 2:
+                    self._paused = False
+                    assert self._resume
+                    self._resume()
+                self._output.extend(self._decompress(chunk))
+                continue
+            if self._done:
+                if self._error is not None:
+                    raise self._error
+                if self._decompressor is not None:
+                    self._output.extend(self._flush())
+                    continue
+                raise StopAsyncIteration
+            self._waiter = Deferred()
+            await maybe_deferred_to_future(self._waiter)
+
+    async def read(self) -> bytes:
+        """Wait for the rest of the body and return it."""
+        return b"".join([chunk async for chunk in self])
+
+    def close(self) -> None:
+        """Stop reading the body, cancelling its download if it is still in
+        progress."""
+        self._chunks.clear()
+        self._output.clear()
+        self._decompressor = None
+        if self._done:
+            return
+        self._done = True
+        if self._cancel:
+            self._cancel()
+        self._wake()
+        self._set_downloaded()
+
+
+class StreamingResponse(Response):
+    """A response returned before its body is downloaded, when the
+    :reqmeta:`download_stream` request meta key is ``True``.
+
+    Its :attr:`~scrapy.http.Response.body` is always empty. Iterate over its
+    :attr:`stream` to get the body chunks as they are received.
+
+    .. versionadded:: VERSION
+    """
+
+    attributes: tuple[str, ...] = (*Response.attributes, "stream")
+
+    def __init__(self, *args: Any, stream: ResponseBodyStream, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        #: The :class:`ResponseBodyStream` of the response body.
+        self.stream: ResponseBodyStream = stream
+
+    async def read(self) -> Response:
+        """Wait for the rest of the body and return a regular response with
+        it, of the class that matches its headers and body."""
+        from scrapy.responsetypes import responsetypes  # noqa: PLC0415
+
+        kwargs = {name: getattr(self, name) for name in Response.attributes}
+        kwargs["body"] = await self.stream.read()
+        respcls = responsetypes.from_args(
+            headers=self.headers, url=self.url, body=kwargs["body"]
+        )
+        return respcls(**kwargs)
+
+
+def _when_downloaded(response: object, callback: Callable[[], object]) -> bool:
+    """Call *callback* once the body of *response* is downloaded, and return
+    ``True``, if *response* is a :class:`StreamingResponse` whose body is
+    still being downloaded. Otherwise, return ``False``."""
+    if not isinstance(response, StreamingResponse):
+        return False
+    downloaded = response.stream._downloaded
+    if downloaded.called:
+        return False
+    downloaded.addBoth(lambda _: callback())
+    return True
@@ -11,6 +11,7 @@ import functools
 import hashlib
 import logging
 import mimetypes
+import shutil
 import time
 import warnings
 from collections import defaultdict
@@ -18,6 +19,7 @@ from contextlib import suppress
 from ftplib import FTP
 from io import BytesIO
 from pathlib import Path
+from tempfile import TemporaryFile
 from typing import IO, TYPE_CHECKING, Any, NoReturn, Protocol, TypedDict, cast
 from urllib.parse import urlparse
 
@@ -26,11 +28,12 @@ from twisted.internet.defer import Deferred, maybeDeferred
 from twisted.internet.threads import deferToThread
 
 from scrapy.exceptions import IgnoreRequest, NotConfigured, ScrapyDeprecationWarning
-from scrapy.http import Request, Response
+from scrapy.http import Request, Response, StreamingResponse
 from scrapy.http.request import NO_CALLBACK
 from scrapy.pipelines.media import FileInfo, FileInfoOrError, MediaPipeline
 from scrapy.utils.boto import is_botocore_available
 from scrapy.utils.datatypes import CaseInsensitiveDict
+from scrapy.utils.defer import maybe_deferred_to_future
 from scrapy.utils.ftp import ftp_store_file
 from scrapy.utils.log import failure_to_exc_info
 from scrapy.utils.python import to_bytes
@@ -87,7 +90,7 @@ class FilesStoreProtocol(Protocol):
     def persist_file(
         self,
         path: str,
-        buf: BytesIO,
+        buf: IO[bytes],
         info: MediaPipeline.SpiderInfo,
         meta: dict[str, Any] | None = None,
         headers: dict[str, str] | None = None,
@@ -112,14 +115,18 @@ class FSFilesStore:
     def persist_file(
         self,
         path: str | PathLike[str],
-        buf: BytesIO,
+        buf: IO[bytes],
         info: MediaPipeline.SpiderInfo,
         meta: dict[str, Any] | None = None,
         headers: dict[str, str] | None = None,
     ) -> None:
         absolute_path = self._get_filesystem_path(path)
         self._mkdir(absolute_path.parent, info)
-        absolute_path.write_bytes(buf.getvalue())
+        if isinstance(buf, BytesIO):
+            absolute_path.write_bytes(buf.getvalue())
+            return
+        with absolute_path.open("wb") as f:
+            shutil.copyfileobj(buf, f)
 
     def stat_file(
         self, path: str | PathLike[str], info: MediaPipeline.SpiderInfo
@@ -208,7 +215,7 @@ class S3FilesStore:
     def persist_file(
         self,
         path: str,
-        buf: BytesIO,
+        buf: IO[bytes],
         info: MediaPipeline.SpiderInfo,
         meta: dict[str, Any] | None = None,
         headers: dict[str, str] | None = None,
@@ -329,7 +336,7 @@ class GCSFilesStore:
     def persist_file(
         self,
         path: str,
-        buf: BytesIO,
+        buf: IO[bytes],
         info: MediaPipeline.SpiderInfo,
         meta: dict[str, Any] | None = None,
         headers: dict[str, str] | None = None,
@@ -338,6 +345,13 @@ class GCSFilesStore:
         blob = self.bucket.blob(blob_path)
         blob.cache_control = self.CACHE_CONTROL
         blob.metadata = {k: str(v) for k, v in (meta or {}).items()}
+        if not isinstance(buf, BytesIO):
+            return deferToThread(
+                blob.upload_from_file,
+                buf,
+                content_type=self._get_content_type(headers),
+                predefined_acl=self.POLICY,
+            )
         return deferToThread(
             blob.upload_from_string,
             data=buf.getvalue(),
@@ -369,7 +383,7 @@ class FTPFilesStore:
     def persist_file(
         self,
         path: str,
-        buf: BytesIO,
+        buf: IO[bytes],
         info: MediaPipeline.SpiderInfo,
         meta: dict[str, Any] | None = None,
         headers: dict[str, str] | None = None,
@@ -482,6 +496,7 @@ class FilesPipeline(MediaPipeline):
         self.files_result_field: str = settings.get(
             resolve("FILES_RESULT_FIELD"), self.FILES_RESULT_FIELD
         )
+        self.files_stream: bool = settings.getbool(resolve("FILES_STREAM"))
 
         super().__init__(crawler=crawler)
 
@@ -657,6 +672,86 @@ class FilesPipeline(MediaPipeline):
             "status": status,
         }
 
+    def _can_stream(self) -> bool:
+        """Return ``True`` if downloaded files can be written to the store as
+        they are received, instead of being read into memory first.
+
+        That is not the case if :meth:`media_downloaded`,
+        :meth:`file_downloaded` or :meth:`file_path` are overridden, since
+        they get a response that may be expected to have a body.
+        """
+        cls = type(self)
+        return (
+            cls.media_downloaded is FilesPipeline.media_downloaded
+            and cls.file_downloaded is FilesPipeline.file_downloaded
+            and cls.file_path is FilesPipeline.file_path
+        )
+
+    def _modify_media_request(self, request: Request) -> None:
+        super()._modify_media_request(request)
+        if self.files_stream and self._can_stream():
+            request.meta.setdefault("download_stream", True)
+
+    async def media_streamed(
+        self,
+        response: StreamingResponse,
+        request: Request,
+        info: MediaPipeline.SpiderInfo,
+        *,
+        item: Any = None,
+    ) -> FileInfo:
+        if response.status != 200 or not self._can_stream():
+            # media_downloaded() logs and raises download errors.
+            return await super().media_streamed(response, request, info, item=item)
+
+        referer = referer_str(request)
+        with TemporaryFile() as buf:
+            m = hashlib.md5()  # noqa: S324
+            async for chunk in response.stream:
+                m.update(chunk)
+                buf.write(chunk)
+
+            if not buf.tell():
+                logger.warning(
+                    "File (empty-content): Empty file from %(request)s referred "
+                    "in <%(referer)s>: no-content",
+                    {"request": request, "referer": referer},
+                    extra={"spider": info.spider},
+                )
+                raise FileException("empty-content")
+
+            logger.debug(
+                "File (downloaded): Downloaded file from %(request)s referred in "
+                "<%(referer)s>",
+                {"request": request, "referer": referer},
+                extra={"spider": info.spider},
+            )
+            self.inc_stats("downloaded")
+
+            try:
+                path = self.file_path(request, response=response, info=info, item=item)
+                buf.seek(0)
+                result = self.store.persist_file(path, buf, info)
+                if isinstance(result, Deferred):
+                    # The file must not be closed before it is persisted.
+                    await maybe_deferred_to_future(result)
+            except Exception as exc:
+                logger.error(
+                    "File (unknown-error): Error processing file from %(request)s "
+                    "referred in <%(referer)s>",
+                    {"request": request, "referer": referer},
+                    exc_info=True,
+                    extra={"spider": info.spider},
+                )
+                raise FileException(str(exc))
+
+        return {
+            "url": request.url,
+            "path": path,
+            "checksum": m.hexdigest(),
+            "status": "downloaded",
+        }
+
     def inc_stats(self, status: str) -> None:
         assert self.crawler.stats
         self.crawler.stats.inc_value("file_count")
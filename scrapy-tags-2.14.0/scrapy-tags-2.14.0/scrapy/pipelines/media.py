@@ -14,6 +14,7 @@ from twisted.python.failure import Failure
 from twisted.python.versions import Version
 
 from scrapy.exceptions import ScrapyDeprecationWarning
+from scrapy.http import StreamingResponse
 from scrapy.http.request import NO_CALLBACK, Request
 from scrapy.utils.asyncio import call_later, is_asyncio_available
 from scrapy.utils.datatypes import SequenceExclude
@@ -209,6 +210,8 @@ class MediaPipeline(ABC):
             self._modify_media_request(request)
             assert self.crawler.engine
             response = await self.crawler.engine.download_async(request)
+            if isinstance(response, StreamingResponse):
+                return await self.media_streamed(response, request, info, item=item)
             return self.media_downloaded(response, request, info, item=item)
         except Exception:
             failure = self.media_failed(Failure(), request, info)
@@ -285,6 +288,22 @@ class MediaPipeline(ABC):
         """Handler for success downloads"""
         raise NotImplementedError
 
+    async def media_streamed(
+        self,
+        response: StreamingResponse,
+        request: Request,
+        info: SpiderInfo,
+        *,
+        item: Any = None,
+    ) -> FileInfo:
+        """Handler for successful downloads of :ref:`streaming responses
+        <streaming-responses>`.
+
+        By default, it waits for the whole body and calls
+        :meth:`media_downloaded` with a regular response.
+        """
+        return self.media_downloaded(await response.read(), request, info, item=item)
+
     @abstractmethod
     def media_failed(
         self, failure: Failure, request: Request, info: SpiderInfo
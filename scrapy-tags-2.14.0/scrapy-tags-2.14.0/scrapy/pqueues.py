@@ -1,10 +1,19 @@
 from __future__ import annotations
 
 import hashlib
+import heapq
 import logging
+import pickle
+import sqlite3
+from pathlib import Path
 from typing import TYPE_CHECKING, Protocol, cast
 
+from queuelib import queue
+
+from scrapy import signals
+from scrapy.squeues import _compact_request_dict, _pickle_serialize
 from scrapy.utils.misc import build_from_crawler
+from scrapy.utils.request import request_from_dict
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
@@ -12,7 +21,7 @@ if TYPE_CHECKING:
     # typing.Self requires Python 3.11
     from typing_extensions import Self
 
-    from scrapy import Request
+    from scrapy import Request, Spider
     from scrapy.core.downloader import Downloader
     from scrapy.crawler import Crawler
 
@@ -37,6 +46,14 @@ def _path_safe(text: str) -> str:
     return f"{pathable_slot}-{unique_slot}"
 
 
+def _is_lifo(queue_cls: type[QueueProtocol]) -> bool:
+    """Return ``True`` if ``queue_cls`` pops the last pushed object first."""
+    return getattr(queue_cls, "_lifo", False) or issubclass(
+        queue_cls,
+        (queue.LifoDiskQueue, queue.LifoMemoryQueue, queue.LifoSQLiteQueue),
+    )
+
+
 class QueueProtocol(Protocol):
     """Protocol for downstream queues of ``ScrapyPriorityQueue``."""
 
@@ -233,6 +250,59 @@ class ScrapyPriorityQueue:
         )
 
 
+class HeapPriorityQueue(ScrapyPriorityQueue):
+    """A :class:`ScrapyPriorityQueue` that keeps its priorities in a heap.
+
+    :class:`ScrapyPriorityQueue` looks for the next priority by iterating
+    over all its internal queues whenever a queue runs out of requests,
+    which is slow when there are many different priority values. This
+    class keeps a heap of priorities instead, and drops the priorities of
+    empty queues from the top of the heap lazily, so that both ``push``
+    and ``pop`` are O(log n) on the number of priority values.
+    """
+
+    def __init__(
+        self,
+        crawler: Crawler,
+        downstream_queue_cls: type[QueueProtocol],
+        key: str,
+        startprios: Iterable[int] = (),
+        *,
+        start_queue_cls: type[QueueProtocol] | None = None,
+    ):
+        self._prio_heap: list[int] = []
+        self._prio_set: set[int] = set()
+        super().__init__(
+            crawler,
+            downstream_queue_cls,
+            key,
+            startprios,
+            start_queue_cls=start_queue_cls,
+        )
+
+    def init_prios(self, startprios: Iterable[int]) -> None:
+        super().init_prios(startprios)
+        self._prio_set = {*self.queues, *self._start_queues}
+        self._prio_heap = list(self._prio_set)
+        heapq.heapify(self._prio_heap)
+        self._update_curprio()
+
+    def push(self, request: Request) -> None:
+        super().push(request)
+        priority = self.priority(request)
+        if priority not in self._prio_set:
+            self._prio_set.add(priority)
+            heapq.heappush(self._prio_heap, priority)
+
+    def _update_curprio(self) -> None:
+        heap = self._prio_heap
+        while heap and not (
+            self.queues.get(heap[0]) or self._start_queues.get(heap[0])
+        ):
+            self._prio_set.discard(heapq.heappop(heap))
+        self.curprio = heap[0] if heap else None
+
+
 class DownloaderInterface:
     def __init__(self, crawler: Crawler):
         assert crawler.engine
@@ -255,6 +325,12 @@ class DownloaderAwarePriorityQueue:
     """PriorityQueue which takes Downloader activity into account:
     domains (slots) with the least amount of active downloads are dequeued
     first.
+
+    The number of active downloads per slot is kept up to date from the
+    :signal:`request_reached_downloader` and
+    :signal:`request_left_downloader` signals, and slots with pending
+    requests are kept in a heap ordered by that number, so finding the next
+    slot does not require checking every slot.
     """
 
     @classmethod
@@ -306,9 +382,28 @@ class DownloaderAwarePriorityQueue:
         self.key: str = key
         self.crawler: Crawler = crawler
 
+        # slot -> number of active downloads, for slots with active downloads
+        self._active_downloads: dict[str, int] = {
+            slot: n
+            for n, slot in self._downloader_interface.stats(
+                self._downloader_interface.downloader.slots
+            )
+            if n
+        }
+        # (active downloads, slot) entries, outdated entries are skipped in
+        # _next_slot()
+        self._slot_heap: list[tuple[int, str]] = []
+        crawler.signals.connect(
+            self._request_reached_downloader, signals.request_reached_downloader
+        )
+        crawler.signals.connect(
+            self._request_left_downloader, signals.request_left_downloader
+        )
+
         self.pqueues: dict[str, ScrapyPriorityQueue] = {}  # slot -> priority queue
         for slot, startprios in (slot_startprios or {}).items():
             self.pqueues[slot] = self.pqfactory(slot, startprios)
+            self._push_slot(slot)
 
     def pqfactory(
         self, slot: str, startprios: Iterable[int] = ()
@@ -322,12 +417,9 @@ class DownloaderAwarePriorityQueue:
         )
 
     def pop(self) -> Request | None:
-        stats = self._downloader_interface.stats(self.pqueues)
-
-        if not stats:
+        slot = self._next_slot()
+        if slot is None:
             return None
-
-        slot = min(stats)[1]
         queue = self.pqueues[slot]
         request = queue.pop()
         if len(queue) == 0:
@@ -338,6 +430,7 @@ class DownloaderAwarePriorityQueue:
         slot = self._downloader_interface.get_slot_key(request)
         if slot not in self.pqueues:
             self.pqueues[slot] = self.pqfactory(slot)
+            self._push_slot(slot)
         queue = self.pqueues[slot]
         queue.push(request)
 
@@ -348,16 +441,22 @@ class DownloaderAwarePriorityQueue:
         Raises :exc:`NotImplementedError` if the underlying queue class does
         not implement a ``peek`` method, which is optional for queues.
         """
-        stats = self._downloader_interface.stats(self.pqueues)
-        if not stats:
+        slot = self._next_slot()
+        if slot is None:
             return None
-        slot = min(stats)[1]
         queue = self.pqueues[slot]
         return queue.peek()
 
     def close(self) -> dict[str, list[int]]:
         active = {slot: queue.close() for slot, queue in self.pqueues.items()}
         self.pqueues.clear()
+        self._slot_heap.clear()
+        self.crawler.signals.disconnect(
+            self._request_reached_downloader, signals.request_reached_downloader
+        )
+        self.crawler.signals.disconnect(
+            self._request_left_downloader, signals.request_left_downloader
+        )
         return active
 
     def __len__(self) -> int:
@@ -365,3 +464,205 @@ class DownloaderAwarePriorityQueue:
 
     def __contains__(self, slot: str) -> bool:
         return slot in self.pqueues
+
+    def _next_slot(self) -> str | None:
+        """Return the slot with pending requests and the least active
+        downloads, or ``None`` if there are no pending requests."""
+        heap = self._slot_heap
+        while heap:
+            active, slot = heap[0]
+            if slot in self.pqueues and self._active_downloads.get(slot, 0) == active:
+                return slot
+            heapq.heappop(heap)
+        return None
+
+    def _push_slot(self, slot: str) -> None:
+        heap = self._slot_heap
+        if len(heap) > 2 * len(self.pqueues) + 64:
+            # Drop outdated entries.
+            heap[:] = [(self._active_downloads.get(s, 0), s) for s in self.pqueues]
+            heapq.heapify(heap)
+            if slot in self.pqueues:
+                return
+        heapq.heappush(heap, (self._active_downloads.get(slot, 0), slot))
+
+    def add_pending_download(self, request: Request) -> None:
+        """Count *request* as an active download of its slot, until
+        :meth:`remove_pending_download` is called.
+
+        Used to pop several requests at once, choosing the slot of each
+        request as if the previous ones had already reached the downloader.
+        """
+        self._update_active_downloads(request, 1)
+
+    def remove_pending_download(self, request: Request) -> None:
+        """Undo :meth:`add_pending_download`."""
+        self._update_active_downloads(request, -1)
+
+    def _update_active_downloads(self, request: Request, delta: int) -> None:
+        slot = self._downloader_interface.get_slot_key(request)
+        active = self._active_downloads.get(slot, 0) + delta
+        if active > 0:
+            self._active_downloads[slot] = active
+        else:
+            self._active_downloads.pop(slot, None)
+        if slot in self.pqueues:
+            self._push_slot(slot)
+
+    def _request_reached_downloader(self, request: Request) -> None:
+        self._update_active_downloads(request, 1)
+
+    def _request_left_downloader(self, request: Request) -> None:
+        self._update_active_downloads(request, -1)
+
+
+class SQLitePriorityQueue:
+    """Disk priority queue that stores all requests in a single SQLite
+    database, ``requests.sqlite``, instead of one disk queue per priority.
+
+    Requests are popped ordered by priority and then by push order, which
+    is FIFO or LIFO depending on whether ``downstream_queue_cls`` (or
+    ``start_queue_cls`` for :ref:`start requests <start-requests>`) is a
+    FIFO or a LIFO queue; no instance of those classes is created. As with
+    :class:`ScrapyPriorityQueue`, given the same priority, other requests
+    are popped before start requests.
+
+    Writes are committed in transactions of
+    :setting:`SCHEDULER_DISK_QUEUE_BATCH_SIZE` operations, and when the
+    queue is closed.
+
+    The scheduler also builds its memory queue from
+    :setting:`SCHEDULER_PRIORITY_QUEUE`, with an empty ``key``. Requests in
+    that queue are those that cannot be serialized, so a
+    :class:`ScrapyPriorityQueue` is returned instead in that case.
+    """
+
+    _sql_create = (
+        "CREATE TABLE IF NOT EXISTS requests ("
+        "id INTEGER PRIMARY KEY, priority INTEGER NOT NULL, "
+        "start INTEGER NOT NULL, ord INTEGER NOT NULL, data BLOB NOT NULL)"
+    )
+    _sql_create_index = (
+        "CREATE INDEX IF NOT EXISTS requests_order ON requests (priority, start, ord)"
+    )
+    _sql_push = (
+        "INSERT INTO requests (id, priority, start, ord, data) VALUES (?, ?, ?, ?, ?)"
+    )
+    _sql_peek = "SELECT id, data FROM requests ORDER BY priority, start, ord LIMIT 1"
+    _sql_del = "DELETE FROM requests WHERE id = ?"
+    _sql_size = "SELECT COUNT(*), MAX(id) FROM requests"
+    _sql_prios = "SELECT DISTINCT priority FROM requests"
+
+    @classmethod
+    def from_crawler(
+        cls,
+        crawler: Crawler,
+        downstream_queue_cls: type[QueueProtocol],
+        key: str,
+        startprios: Iterable[int] = (),
+        *,
+        start_queue_cls: type[QueueProtocol] | None = None,
+    ) -> Self | ScrapyPriorityQueue:
+        if not key:
+            return ScrapyPriorityQueue(
+                crawler,
+                downstream_queue_cls,
+                key,
+                startprios,
+                start_queue_cls=start_queue_cls,
+            )
+        return cls(
+            crawler,
+            downstream_queue_cls,
+            key,
+            startprios,
+            start_queue_cls=start_queue_cls,
+        )
+
+    def __init__(
+        self,
+        crawler: Crawler,
+        downstream_queue_cls: type[QueueProtocol],
+        key: str,
+        startprios: Iterable[int] = (),
+        *,
+        start_queue_cls: type[QueueProtocol] | None = None,
+    ):
+        self.crawler: Crawler = crawler
+        self.spider: Spider | None = crawler.spider
+        self.key: str = key
+        self._lifo: bool = _is_lifo(downstream_queue_cls)
+        self._start_lifo: bool | None = (
+            _is_lifo(start_queue_cls) if start_queue_cls else None
+        )
+        self._batch_size: int = max(
+            1, crawler.settings.getint("SCHEDULER_DISK_QUEUE_BATCH_SIZE")
+        )
+        self._pending_writes: int = 0
+        Path(key).mkdir(parents=True, exist_ok=True)
+        self._path = Path(key, "requests.sqlite")
+        self._db = sqlite3.connect(self._path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.execute(self._sql_create)
+            self._db.execute(self._sql_create_index)
+        size, last_id = self._db.execute(self._sql_size).fetchone()
+        self._size: int = size
+        self._last_id: int = last_id or 0
+
+    def priority(self, request: Request) -> int:
+        return -request.priority
+
+    def push(self, request: Request) -> None:
+        data = _pickle_serialize(_compact_request_dict(request, self.spider))
+        is_start_request = request.meta.get("is_start_request", False)
+        start = is_start_request and self._start_lifo is not None
+        lifo = self._start_lifo if start else self._lifo
+        self._last_id += 1
+        order = -self._last_id if lifo else self._last_id
+        self._db.execute(
+            self._sql_push,
+            (self._last_id, self.priority(request), int(start), order, data),
+        )
+        self._size += 1
+        self._wrote()
+
+    def pop(self) -> Request | None:
+        row = self._db.execute(self._sql_peek).fetchone()
+        if row is None:
+            return None
+        self._db.execute(self._sql_del, (row[0],))
+        self._size -= 1
+        self._wrote()
+        return self._decode(row[1])
+
+    def peek(self) -> Request | None:
+        """Returns the next object to be returned by :meth:`pop`,
+        but without removing it from the queue.
+        """
+        row = self._db.execute(self._sql_peek).fetchone()
+        if row is None:
+            return None
+        return self._decode(row[1])
+
+    def close(self) -> list[int]:
+        self._db.commit()
+        active = [row[0] for row in self._db.execute(self._sql_prios)]
+        self._db.close()
+        if not self._size:
+            self._path.unlink(missing_ok=True)
+        return active
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _decode(self, data: bytes) -> Request:
+        d = pickle.loads(data)  # noqa: S301
+        return request_from_dict(d, spider=self.spider)
+
+    def _wrote(self) -> None:
+        self._pending_writes += 1
+        if self._pending_writes >= self._batch_size:
+            self._db.commit()
+            self._pending_writes = 0
@@ -3,7 +3,9 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Any
 
 from twisted.internet import defer
+from twisted.internet.abstract import isIPAddress
 from twisted.internet.base import ReactorBase, ThreadedResolver
+from twisted.internet.error import DNSLookupError
 from twisted.internet.interfaces import (
     IAddress,
     IHostnameResolver,
@@ -11,14 +13,18 @@ from twisted.internet.interfaces import (
     IResolutionReceiver,
     IResolverSimple,
 )
+from twisted.names import client, dns
+from twisted.names.error import DNSNameError
 from zope.interface.declarations import implementer, provider
 
 from scrapy.utils.datatypes import LocalCache
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import Callable, Sequence
 
     from twisted.internet.defer import Deferred
+    from twisted.internet.interfaces import IResolver
+    from twisted.python.failure import Failure
 
     # typing.Self requires Python 3.11
     from typing_extensions import Self
@@ -146,3 +152,208 @@ class CachingHostnameResolver:
             resolutionReceiver.addressResolved(addr)
         resolutionReceiver.resolutionComplete()
         return resolutionReceiver
+
+
+#: Maximum number of CNAME records followed by :class:`CachingDNSResolver`.
+_MAX_CNAME_DEPTH = 8
+
+#: Maximum number of concurrent lookups started by
+#: :meth:`CachingDNSResolver.prefetch`.
+_MAX_PREFETCHES = 100
+
+
+def _get_query_timeouts(timeout: float) -> tuple[float, ...]:
+    """Split *timeout* into the timeouts of successive attempts of a DNS
+    query, growing like the Twisted defaults, (1, 3, 11, 45)."""
+    timeouts: list[float] = []
+    for attempt in (1, 3, 11):
+        if attempt >= timeout:
+            break
+        timeouts.append(attempt)
+        timeout -= attempt
+    timeouts.append(timeout)
+    return tuple(timeouts)
+
+
+@implementer(IResolverSimple)
+class CachingDNSResolver:
+    """
+    Caching resolver that sends DNS queries itself, without threads. IPv4
+    only, supports setting a timeout value for DNS requests.
+
+    Addresses are cached for the TTL of their DNS records, and names that do
+    not exist for ``DNSCACHE_NEGATIVE_TTL`` seconds. Concurrent lookups of the
+    same name share a single DNS query.
+    """
+
+    def __init__(
+        self,
+        reactor: ReactorBase,
+        cache_size: int,
+        timeout: float,
+        negative_ttl: float,
+        resolver: IResolver | None = None,
+    ):
+        self.reactor: ReactorBase = reactor
+        self.timeout: float = timeout
+        self.negative_ttl: float = negative_ttl
+        self.resolver: IResolver = resolver or client.createResolver()
+        # Name: (address, or None if the name does not exist, expiration time)
+        self.cache: LocalCache[str, tuple[str | None, float]] = LocalCache(cache_size)
+        # Names being looked up, and the deferreds waiting for them.
+        self._pending: dict[str, list[Deferred[str]]] = {}
+        # Number of lookups started by prefetch() that have not finished.
+        self._prefetching: int = 0
+        self._stats_listeners: list[Callable[[str, float], None]] = []
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler, reactor: ReactorBase) -> Self:
+        if crawler.settings.getbool("DNSCACHE_ENABLED"):
+            cache_size = crawler.settings.getint("DNSCACHE_SIZE")
+        else:
+            cache_size = 0
+        return cls(
+            reactor,
+            cache_size,
+            crawler.settings.getfloat("DNS_TIMEOUT"),
+            crawler.settings.getfloat("DNSCACHE_NEGATIVE_TTL"),
+        )
+
+    def install_on_reactor(self) -> None:
+        self.reactor.installResolver(self)
+
+    def add_stats_listener(self, listener: Callable[[str, float], None]) -> None:
+        """Call *listener* with the name and value of every stat reported by
+        the resolver: ``cache/hit``, ``cache/negative_hit``, ``cache/miss``,
+        ``prefetch`` and ``lookup/error`` with ``1``, and ``lookup/time``
+        with the duration of a DNS lookup, in seconds."""
+        self._stats_listeners.append(listener)
+
+    def remove_stats_listener(self, listener: Callable[[str, float], None]) -> None:
+        self._stats_listeners.remove(listener)
+
+    def _report(self, name: str, value: float = 1) -> None:
+        for listener in self._stats_listeners:
+            listener(name, value)
+
+    def _get_cached(self, name: str) -> tuple[str | None, float] | None:
+        entry = self.cache.get(name)
+        if entry is not None and entry[1] <= self.reactor.seconds():
+            del self.cache[name]
+            return None
+        return entry
+
+    def getHostByName(self, name: str, timeout: Sequence[int] = ()) -> Deferred[str]:
+        # The timeout argument is ignored, to enforce the DNS_TIMEOUT setting.
+        if isIPAddress(name):
+            return defer.succeed(name)
+        entry = self._get_cached(name)
+        if entry is not None:
+            address = entry[0]
+            if address is None:
+                self._report("cache/negative_hit")
+                return defer.fail(DNSLookupError(f"address {name!r} not found"))
+            self._report("cache/hit")
+            return defer.succeed(address)
+        self._report("cache/miss")
+        d: Deferred[str] = defer.Deferred()
+        waiters = self._pending.get(name)
+        if waiters is None:
+            self._start_lookup(name, [d])
+        else:
+            waiters.append(d)
+        return d
+
+    def prefetch(self, name: str) -> None:
+        """Look up *name* in the background, unless it is cached or being
+        looked up already.
+
+        Nothing is looked up if the cache is disabled or full, since the
+        result could not be kept until it is used, or if
+        ``_MAX_PREFETCHES`` prefetches are running already.
+        """
+        if (
+            not self.cache.limit
+            or len(self.cache) >= self.cache.limit
+            or self._prefetching >= _MAX_PREFETCHES
+            or isIPAddress(name)
+            or name in self._pending
+            or self._get_cached(name)
+        ):
+            return
+        self._report("prefetch")
+        self._prefetching += 1
+        self._start_lookup(name, []).addBoth(self._prefetch_done)
+
+    def _prefetch_done(self, _: None) -> None:
+        self._prefetching -= 1
+
+    def _start_lookup(self, name: str, waiters: list[Deferred[str]]) -> Deferred[None]:
+        """Look up *name* for *waiters*, and return a deferred that fires
+        with ``None`` once they have been called."""
+        self._pending[name] = waiters
+        start = self.reactor.seconds()
+        d = self._lookup(name)
+        return d.addCallbacks(
+            self._lookup_done,
+            self._lookup_failed,
+            callbackArgs=(name, start),
+            errbackArgs=(name, start),
+        )
+
+    def _lookup(self, name: str, depth: int = 0) -> Deferred[tuple[str, int]]:
+        """Return the address of *name* and for how long it can be cached."""
+        d = self.resolver.lookupAddress(name, timeout=_get_query_timeouts(self.timeout))
+        return d.addCallback(self._get_address, name, depth)
+
+    def _get_address(
+        self,
+        result: tuple[list[dns.RRHeader], list[dns.RRHeader], list[dns.RRHeader]],
+        name: str,
+        depth: int,
+    ) -> tuple[str, int] | Deferred[tuple[str, int]]:
+        answers = result[0]
+        for record in answers:
+            if record.type == dns.A:
+                assert isinstance(record.payload, dns.Record_A)
+                ttl = min(answer.ttl for answer in answers)
+                return record.payload.dottedQuad(), ttl
+        cnames = [record for record in answers if record.type == dns.CNAME]
+        if cnames and depth < _MAX_CNAME_DEPTH:
+            # The DNS server did not follow the alias for us.
+            ttl = min(answer.ttl for answer in answers)
+            payload = cnames[-1].payload
+            assert isinstance(payload, dns.Record_CNAME)
+            target = payload.name.name.decode()
+            d = self._lookup(target, depth + 1)
+            return d.addCallback(lambda result: (result[0], min(result[1], ttl)))
+        raise DNSLookupError(f"address {name!r} not found")
+
+    def _lookup_done(self, result: tuple[str, int], name: str, start: float) -> None:
+        now = self.reactor.seconds()
+        self._report("lookup/time", now - start)
+        address, ttl = result
+        if self.cache.limit:
+            # Used by Downloader.get_slot_key() with CONCURRENT_REQUESTS_PER_IP.
+            dnscache[name] = address
+            if ttl > 0:
+                self.cache[name] = (address, now + ttl)
+        for d in self._pending.pop(name):
+            d.callback(address)
+
+    def _lookup_failed(self, failure: Failure, name: str, start: float) -> None:
+        now = self.reactor.seconds()
+        self._report("lookup/time", now - start)
+        self._report("lookup/error")
+        if failure.check(DNSNameError, DNSLookupError):
+            error = DNSLookupError(f"address {name!r} not found")
+            # Only cache names that do not exist, not timeouts and server
+            # failures.
+            if self.cache.limit and self.negative_ttl > 0:
+                self.cache[name] = (None, now + self.negative_ttl)
+        else:
+            error = DNSLookupError(
+                f"address {name!r} not found: {failure.getErrorMessage()}"
+            )
+        for d in self._pending.pop(name):
+            d.errback(error)
@@ -22,8 +22,11 @@ __all__ = [
     "AJAXCRAWL_ENABLED",
     "AJAXCRAWL_MAXSIZE",
     "ASYNCIO_EVENT_LOOP",
+    "AUTOTHROTTLE_ADJUST_CONCURRENCY",
+    "AUTOTHROTTLE_BACKOFF_HTTP_CODES",
     "AUTOTHROTTLE_DEBUG",
     "AUTOTHROTTLE_ENABLED",
+    "AUTOTHROTTLE_MAX_CONCURRENCY",
     "AUTOTHROTTLE_MAX_DELAY",
     "AUTOTHROTTLE_START_DELAY",
     "AUTOTHROTTLE_TARGET_CONCURRENCY",
@@ -47,7 +50,9 @@ __all__ = [
     "DEPTH_PRIORITY",
     "DEPTH_STATS_VERBOSE",
     "DNSCACHE_ENABLED",
+    "DNSCACHE_NEGATIVE_TTL",
     "DNSCACHE_SIZE",
+    "DNS_PREFETCH",
     "DNS_RESOLVER",
     "DNS_TIMEOUT",
     "DOWNLOADER",
@@ -64,6 +69,10 @@ __all__ = [
     "DOWNLOAD_HANDLERS",
     "DOWNLOAD_HANDLERS_BASE",
     "DOWNLOAD_MAXSIZE",
+    "DOWNLOAD_POOL_IDLE_TIMEOUT",
+    "DOWNLOAD_POOL_MAXSIZE_PER_HOST",
+    "DOWNLOAD_SLOTS_GC_AGE",
+    "DOWNLOAD_SLOTS_GC_INTERVAL",
     "DOWNLOAD_TIMEOUT",
     "DOWNLOAD_WARNSIZE",
     "DUPEFILTER_CLASS",
@@ -88,23 +97,35 @@ __all__ = [
     "FEED_URI_PARAMS",
     "FILES_STORE_GCS_ACL",
     "FILES_STORE_S3_ACL",
+    "FILES_STREAM",
     "FORCE_CRAWLER_PROCESS",
     "FTP_PASSIVE_MODE",
     "FTP_PASSWORD",
     "FTP_USER",
     "GCS_PROJECT_ID",
     "HTTPCACHE_ALWAYS_STORE",
+    "HTTPCACHE_COMPACT_RATIO",
     "HTTPCACHE_DBM_MODULE",
+    "HTTPCACHE_DICT_SIZE",
     "HTTPCACHE_DIR",
     "HTTPCACHE_ENABLED",
+    "HTTPCACHE_EVICTION",
     "HTTPCACHE_EXPIRATION_SECS",
     "HTTPCACHE_GZIP",
     "HTTPCACHE_IGNORE_HTTP_CODES",
     "HTTPCACHE_IGNORE_MISSING",
     "HTTPCACHE_IGNORE_RESPONSE_CACHE_CONTROLS",
     "HTTPCACHE_IGNORE_SCHEMES",
+    "HTTPCACHE_MAX_ENTRIES",
+    "HTTPCACHE_MAX_SIZE",
+    "HTTPCACHE_MEMORY_SIZE",
     "HTTPCACHE_POLICY",
+    "HTTPCACHE_REPLAY",
+    "HTTPCACHE_SEGMENT_SIZE",
+    "HTTPCACHE_SHARED",
     "HTTPCACHE_STORAGE",
+    "HTTPCACHE_THREADED_STORAGE",
+    "HTTPCACHE_WRITE_QUEUE_SIZE",
     "HTTPPROXY_AUTH_ENCODING",
     "HTTPPROXY_ENABLED",
     "IMAGES_STORE_GCS_ACL",
@@ -163,11 +184,22 @@ __all__ = [
     "SCHEDULER",
     "SCHEDULER_DEBUG",
     "SCHEDULER_DISK_QUEUE",
+    "SCHEDULER_DISK_QUEUE_BATCH_SIZE",
+    "SCHEDULER_DISK_QUEUE_COMPRESSION",
     "SCHEDULER_MEMORY_QUEUE",
+    "SCHEDULER_MEMORY_QUEUE_MAX_BYTES",
+    "SCHEDULER_MEMORY_QUEUE_MAX_REQUESTS",
     "SCHEDULER_PRIORITY_QUEUE",
     "SCHEDULER_START_DISK_QUEUE",
     "SCHEDULER_START_MEMORY_QUEUE",
+    "SCRAPER_ADAPTIVE_ITEMPROC_ENABLED",
+    "SCRAPER_ADAPTIVE_ITEMPROC_TARGET_LATENCY",
+    "SCRAPER_PROCESS_POOL_SIZE",
     "SCRAPER_SLOT_MAX_ACTIVE_SIZE",
+    "SLOTSTATS_ENABLED",
+    "SLOTSTATS_INTERVAL",
+    "SLOTSTATS_MAX_SLOTS",
+    "SLOTSTATS_TOP_SLOTS",
     "SPIDER_CONTRACTS",
     "SPIDER_CONTRACTS_BASE",
     "SPIDER_LOADER_CLASS",
@@ -198,7 +230,10 @@ AJAXCRAWL_MAXSIZE = 32768
 ASYNCIO_EVENT_LOOP = None
 
 AUTOTHROTTLE_ENABLED = False
+AUTOTHROTTLE_ADJUST_CONCURRENCY = False
+AUTOTHROTTLE_BACKOFF_HTTP_CODES = [429, 503]
 AUTOTHROTTLE_DEBUG = False
+AUTOTHROTTLE_MAX_CONCURRENCY = 0
 AUTOTHROTTLE_MAX_DELAY = 60.0
 AUTOTHROTTLE_START_DELAY = 5.0
 AUTOTHROTTLE_TARGET_CONCURRENCY = 1.0
@@ -238,7 +273,9 @@ DEPTH_PRIORITY = 0
 DEPTH_STATS_VERBOSE = False
 
 DNSCACHE_ENABLED = True
+DNSCACHE_NEGATIVE_TTL = 60
 DNSCACHE_SIZE = 10000
+DNS_PREFETCH = True
 DNS_RESOLVER = "scrapy.resolver.CachingThreadedResolver"
 DNS_TIMEOUT = 60
 
@@ -259,6 +296,12 @@ DOWNLOAD_HANDLERS_BASE = {
 DOWNLOAD_MAXSIZE = 1024 * 1024 * 1024  # 1024m
 DOWNLOAD_WARNSIZE = 32 * 1024 * 1024  # 32m
 
+DOWNLOAD_POOL_IDLE_TIMEOUT = 240
+DOWNLOAD_POOL_MAXSIZE_PER_HOST = None
+
+DOWNLOAD_SLOTS_GC_AGE = 60
+DOWNLOAD_SLOTS_GC_INTERVAL = 60
+
 DOWNLOAD_TIMEOUT = 180  # 3mins
 
 DOWNLOADER = "scrapy.core.downloader.Downloader"
@@ -316,6 +359,8 @@ EXTENSIONS_BASE = {
     "scrapy.extensions.logstats.LogStats": 0,
     "scrapy.extensions.spiderstate.SpiderState": 0,
     "scrapy.extensions.throttle.AutoThrottle": 0,
+    "scrapy.extensions.slotstats.SlotStats": 0,
+    "scrapy.extensions.dnsprefetch.DNSPrefetch": 0,
 }
 
 FEEDS = {}
@@ -353,6 +398,7 @@ FEED_URI_PARAMS = None  # a function to extend uri arguments
 
 FILES_STORE_GCS_ACL = ""
 FILES_STORE_S3_ACL = "private"
+FILES_STREAM = False
 
 FORCE_CRAWLER_PROCESS = False
 
@@ -364,16 +410,27 @@ GCS_PROJECT_ID = None
 
 HTTPCACHE_ENABLED = False
 HTTPCACHE_ALWAYS_STORE = False
+HTTPCACHE_COMPACT_RATIO = 0.5
 HTTPCACHE_DBM_MODULE = "dbm"
+HTTPCACHE_DICT_SIZE = 110 * 1024  # 110k
 HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_EVICTION = "lru"
 HTTPCACHE_EXPIRATION_SECS = 0
 HTTPCACHE_GZIP = False
 HTTPCACHE_IGNORE_HTTP_CODES = []
 HTTPCACHE_IGNORE_MISSING = False
 HTTPCACHE_IGNORE_RESPONSE_CACHE_CONTROLS = []
 HTTPCACHE_IGNORE_SCHEMES = ["file"]
+HTTPCACHE_MAX_ENTRIES = 0
+HTTPCACHE_MAX_SIZE = 0
+HTTPCACHE_MEMORY_SIZE = 0
 HTTPCACHE_POLICY = "scrapy.extensions.httpcache.DummyPolicy"
+HTTPCACHE_REPLAY = False
+HTTPCACHE_SEGMENT_SIZE = 64 * 1024 * 1024  # 64m
+HTTPCACHE_SHARED = False
 HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+HTTPCACHE_THREADED_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+HTTPCACHE_WRITE_QUEUE_SIZE = 100
 
 HTTPPROXY_ENABLED = True
 HTTPPROXY_AUTH_ENCODING = "latin-1"
@@ -478,13 +535,25 @@ ROBOTSTXT_USER_AGENT = None
 SCHEDULER = "scrapy.core.scheduler.Scheduler"
 SCHEDULER_DEBUG = False
 SCHEDULER_DISK_QUEUE = "scrapy.squeues.PickleLifoDiskQueue"
+SCHEDULER_DISK_QUEUE_BATCH_SIZE = 100
+SCHEDULER_DISK_QUEUE_COMPRESSION = False
 SCHEDULER_MEMORY_QUEUE = "scrapy.squeues.LifoMemoryQueue"
+SCHEDULER_MEMORY_QUEUE_MAX_BYTES = 0
+SCHEDULER_MEMORY_QUEUE_MAX_REQUESTS = 0
 SCHEDULER_PRIORITY_QUEUE = "scrapy.pqueues.DownloaderAwarePriorityQueue"
 SCHEDULER_START_DISK_QUEUE = "scrapy.squeues.PickleFifoDiskQueue"
 SCHEDULER_START_MEMORY_QUEUE = "scrapy.squeues.FifoMemoryQueue"
 
+SCRAPER_ADAPTIVE_ITEMPROC_ENABLED = False
+SCRAPER_ADAPTIVE_ITEMPROC_TARGET_LATENCY = 1.0
+SCRAPER_PROCESS_POOL_SIZE = 0
 SCRAPER_SLOT_MAX_ACTIVE_SIZE = 5000000
 
+SLOTSTATS_ENABLED = False
+SLOTSTATS_INTERVAL = 60.0
+SLOTSTATS_MAX_SLOTS = 10000
+SLOTSTATS_TOP_SLOTS = 10
+
 SPIDER_CONTRACTS = {}
 SPIDER_CONTRACTS_BASE = {
     "scrapy.contracts.default.UrlContract": 1,
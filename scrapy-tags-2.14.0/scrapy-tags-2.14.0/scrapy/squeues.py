@@ -6,21 +6,26 @@ from __future__ import annotations
 
 import marshal
 import pickle
+import sys
+import zlib
+from collections import deque
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
 from queuelib import queue
 
+from scrapy.utils.job import job_dir
 from scrapy.utils.request import request_from_dict
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Iterable
+    from io import BufferedWriter
     from os import PathLike
 
     # typing.Self requires Python 3.11
     from typing_extensions import Self
 
-    from scrapy import Request
+    from scrapy import Request, Spider
     from scrapy.crawler import Crawler
 
 
@@ -174,3 +179,282 @@ MarshalFifoDiskQueue = _scrapy_serialization_queue(_MarshalFifoSerializationDisk
 MarshalLifoDiskQueue = _scrapy_serialization_queue(_MarshalLifoSerializationDiskQueue)
 FifoMemoryQueue = _scrapy_non_serialization_queue(queue.FifoMemoryQueue)  # type: ignore[arg-type]
 LifoMemoryQueue = _scrapy_non_serialization_queue(queue.LifoMemoryQueue)  # type: ignore[arg-type]
+
+
+# Values that Request.to_dict() reports for a request built only from a URL.
+# The compact codec leaves them out, request_from_dict() restores them.
+_REQUEST_DICT_DEFAULTS: dict[str, Any] = {
+    "callback": None,
+    "errback": None,
+    "headers": {},
+    "method": "GET",
+    "body": b"",
+    "cookies": {},
+    "meta": {},
+    "encoding": "utf-8",
+    "priority": 0,
+    "dont_filter": False,
+    "flags": [],
+    "cb_kwargs": {},
+}
+
+
+def _compact_request_dict(request: Request, spider: Spider | None) -> dict[str, Any]:
+    """Return :meth:`Request.to_dict() <scrapy.Request.to_dict>` without the
+    fields that have default values."""
+    d = request.to_dict(spider=spider)
+    return {
+        key: value
+        for key, value in d.items()
+        if key not in _REQUEST_DICT_DEFAULTS
+        or value != _REQUEST_DICT_DEFAULTS[key]
+        # Request subclasses may use a different default method
+        or (key == "method" and "_class" in d)
+    }
+
+
+_RAW_BATCH = b"\x00"
+_ZLIB_BATCH = b"\x01"
+
+
+class _RequestBatch:
+    """A group of encoded requests that is stored as a single disk queue
+    record, sharing one table of callback and errback names."""
+
+    __slots__ = ("_index", "blobs", "names")
+
+    def __init__(self, names: list[str] | None = None, blobs: Iterable[bytes] = ()):
+        self.names: list[str] = names or []
+        self._index: dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self.blobs: deque[bytes] = deque(blobs)
+
+    def intern(self, name: str) -> int:
+        try:
+            return self._index[name]
+        except KeyError:
+            self._index[name] = len(self.names)
+            self.names.append(name)
+            return self._index[name]
+
+    def encode(self, request: Request, spider: Spider | None) -> bytes:
+        d = _compact_request_dict(request, spider)
+        for key in ("callback", "errback"):
+            if key in d:
+                d[key] = self.intern(d[key])
+        return _pickle_serialize(d)
+
+    def decode(self, blob: bytes, spider: Spider | None) -> Request:
+        d = pickle.loads(blob)  # noqa: S301
+        for key in ("callback", "errback"):
+            if key in d:
+                d[key] = self.names[d[key]]
+        return request_from_dict(d, spider=spider)
+
+    def dumps(self, compress: bool) -> bytes:
+        data = marshal.dumps((self.names, list(self.blobs)))
+        if compress:
+            return _ZLIB_BATCH + zlib.compress(data)
+        return _RAW_BATCH + data
+
+    @classmethod
+    def loads(cls, data: bytes) -> Self:
+        if data[:1] == _ZLIB_BATCH:
+            names, blobs = marshal.loads(zlib.decompress(data[1:]))  # noqa: S302
+        else:
+            names, blobs = marshal.loads(data[1:])  # noqa: S302
+        return cls([sys.intern(name) for name in names], blobs)
+
+    def __len__(self) -> int:
+        return len(self.blobs)
+
+
+class _CompactDiskQueue:
+    """Disk queue of requests that uses a compact request codec.
+
+    Requests are encoded without the fields that have default values, and
+    the callback and errback names are stored once per batch. Pushed
+    requests are buffered in memory and written to disk in batches of
+    :setting:`SCHEDULER_DISK_QUEUE_BATCH_SIZE` requests, optionally
+    compressed (:setting:`SCHEDULER_DISK_QUEUE_COMPRESSION`), and a batch
+    read from disk is decoded one request at a time as requests are popped.
+
+    Buffered requests are written to disk when the queue is closed. The
+    total number of requests, and for FIFO queues the requests left in a
+    batch that was already read from disk, are kept in a ``<key>.state``
+    file next to the queue.
+
+    If :setting:`JOBDIR` is set, buffered requests are also appended to a
+    ``<key>.tail`` file as they are pushed and popped, so that they are not
+    lost if the queue is not closed, e.g. if the process is killed.
+    """
+
+    _queue_class: Callable[[str], queue.BaseQueue]
+    _lifo: bool
+
+    def __init__(self, crawler: Crawler, key: str):
+        self.spider: Spider | None = crawler.spider
+        self._batch_size: int = max(
+            1, crawler.settings.getint("SCHEDULER_DISK_QUEUE_BATCH_SIZE")
+        )
+        self._compress: bool = crawler.settings.getbool(
+            "SCHEDULER_DISK_QUEUE_COMPRESSION"
+        )
+        self._queue = self._queue_class(key)
+        self._state_path = Path(f"{key}.state")
+        # _head: batch read from disk, _tail: batch not yet written to disk
+        self._head = _RequestBatch()
+        self._tail = _RequestBatch()
+        self._size: int
+        if self._state_path.exists():
+            state = marshal.loads(self._state_path.read_bytes())  # noqa: S302
+            self._size = state["size"]
+            if state["head"]:
+                self._head = _RequestBatch.loads(state["head"])
+        else:
+            self._size = self._count_requests()
+        self._tail_path = Path(f"{key}.tail")
+        self._tail_file: BufferedWriter | None = None
+        # Number of names of _tail already written to _tail_file.
+        self._tail_file_names: int = 0
+        if job_dir(crawler.settings):
+            if self._tail_path.exists():
+                self._read_tail()
+                self._size += len(self._tail)
+            self._tail_file = self._tail_path.open("ab")
+            self._tail_file_names = len(self._tail.names)
+
+    @classmethod
+    def from_crawler(
+        cls, crawler: Crawler, key: str, *args: Any, **kwargs: Any
+    ) -> Self:
+        return cls(crawler, key)
+
+    def push(self, request: Request) -> None:
+        blob = self._tail.encode(request, self.spider)
+        self._tail.blobs.append(blob)
+        self._size += 1
+        if len(self._tail) >= self._batch_size:
+            self._flush()
+        elif self._tail_file is not None:
+            self._write_tail((self._tail.names[self._tail_file_names :], blob))
+            self._tail_file_names = len(self._tail.names)
+
+    def pop(self) -> Request | None:
+        batch = self._next_batch()
+        if batch is None:
+            return None
+        blob = batch.blobs.pop() if self._lifo else batch.blobs.popleft()
+        self._size -= 1
+        if batch is self._tail and self._tail_file is not None:
+            self._write_tail(None)
+        return batch.decode(blob, self.spider)
+
+    def peek(self) -> Request | None:
+        """Returns the next object to be returned by :meth:`pop`,
+        but without removing it from the queue.
+        """
+        batch = self._next_batch()
+        if batch is None:
+            return None
+        blob = batch.blobs[-1] if self._lifo else batch.blobs[0]
+        return batch.decode(blob, self.spider)
+
+    def close(self) -> None:
+        self._flush()
+        if self._size:
+            head = self._head.dumps(self._compress) if self._head else None
+            self._state_path.write_bytes(
+                marshal.dumps({"size": self._size, "head": head})
+            )
+        else:
+            self._state_path.unlink(missing_ok=True)
+        if self._tail_file is not None:
+            self._tail_file.close()
+            self._tail_path.unlink()
+        self._queue.close()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _count_requests(self) -> int:
+        """Return the number of requests in the batches on disk.
+
+        Used when there is no state file, e.g. if the queue was not closed
+        properly. The batches are read and pushed back in the same order.
+        """
+        batches: list[bytes] = []
+        while data := self._queue.pop():
+            batches.append(data)
+        if self._lifo:
+            batches.reverse()
+        for data in batches:
+            self._queue.push(data)
+        return sum(len(_RequestBatch.loads(data)) for data in batches)
+
+    def _next_batch(self) -> _RequestBatch | None:
+        """Return the batch that holds the next request to pop."""
+        if self._lifo and self._tail:
+            return self._tail
+        while not self._head:
+            data = self._queue.pop()
+            if not data:
+                break
+            self._head = _RequestBatch.loads(data)
+        if self._head:
+            return self._head
+        if self._tail:
+            return self._tail
+        return None
+
+    def _flush(self) -> None:
+        if self._lifo and self._head:
+            # Requests pushed after this batch was read must be popped
+            # before it, so it goes back to disk first.
+            self._queue.push(self._head.dumps(self._compress))
+            self._head = _RequestBatch()
+        if self._tail:
+            self._queue.push(self._tail.dumps(self._compress))
+            self._tail = _RequestBatch()
+        if self._tail_file is not None:
+            self._tail_file.seek(0)
+            self._tail_file.truncate()
+            self._tail_file_names = 0
+
+    def _read_tail(self) -> None:
+        """Read the requests that were not written to disk in a batch before
+        the queue was last used."""
+        with self._tail_path.open("rb") as f:
+            while True:
+                try:
+                    entry = marshal.load(f)  # noqa: S302
+                except (EOFError, TypeError, ValueError):
+                    break  # end of file, or partially written entry
+                if entry is None:  # popped request
+                    if not self._tail:
+                        break
+                    if self._lifo:
+                        self._tail.blobs.pop()
+                    else:
+                        self._tail.blobs.popleft()
+                    continue
+                names, blob = entry
+                for name in names:
+                    self._tail.intern(sys.intern(name))
+                self._tail.blobs.append(blob)
+
+    def _write_tail(self, entry: tuple[list[str], bytes] | None) -> None:
+        """Append *entry*, a pushed request and the names it added, or
+        ``None`` for a request popped from :attr:`_tail`, to the tail file."""
+        assert self._tail_file is not None
+        self._tail_file.write(marshal.dumps(entry))
+        self._tail_file.flush()
+
+
+class CompactFifoDiskQueue(_CompactDiskQueue):
+    _queue_class = _with_mkdir(queue.FifoDiskQueue)  # type: ignore[arg-type]
+    _lifo = False
+
+
+class CompactLifoDiskQueue(_CompactDiskQueue):
+    _queue_class = _with_mkdir(queue.LifoDiskQueue)  # type: ignore[arg-type]
+    _lifo = True
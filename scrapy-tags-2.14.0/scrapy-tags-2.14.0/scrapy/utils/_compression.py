@@ -1,19 +1,41 @@
+from __future__ import annotations
+
 import contextlib
+import struct
 import zlib
-from io import BytesIO
+from gzip import BadGzipFile
+from itertools import chain
+from typing import IO, TYPE_CHECKING, cast
+
+#: Content encodings supported by :func:`_get_decompressor` in this
+#: environment.
+_SUPPORTED_ENCODINGS: set[bytes] = {b"gzip", b"x-gzip", b"deflate"}
 
 with contextlib.suppress(ImportError):
     try:
         import brotli
     except ImportError:
         import brotlicffi as brotli
+    if hasattr(brotli.Decompressor, "can_accept_more_data"):
+        _SUPPORTED_ENCODINGS.add(b"br")
 
 with contextlib.suppress(ImportError):
     import zstandard
 
+    _SUPPORTED_ENCODINGS.add(b"zstd")
+
+if TYPE_CHECKING:
+    from collections.abc import Container, Iterable
+
 
 _CHUNK_SIZE = 65536  # 64 KiB
 
+_GZIP_MAGIC = b"\x1f\x8b"
+_GZIP_FEXTRA = 4
+_GZIP_FNAME = 8
+_GZIP_FCOMMENT = 16
+_GZIP_FHCRC = 2
+
 
 class _DecompressionMaxSizeExceeded(ValueError):
     def __init__(self, decompressed_size: int, max_size: int) -> None:
@@ -33,58 +55,315 @@ def _check_max_size(decompressed_size: int, max_size: int) -> None:
         raise _DecompressionMaxSizeExceeded(decompressed_size, max_size)
 
 
-def _inflate(data: bytes, *, max_size: int = 0) -> bytes:
-    decompressor = zlib.decompressobj()
-    try:
-        first_chunk = decompressor.decompress(data, max_length=_CHUNK_SIZE)
-    except zlib.error:
-        # to work with raw deflate content that may be sent by microsoft servers.
-        decompressor = zlib.decompressobj(wbits=-15)
-        first_chunk = decompressor.decompress(data, max_length=_CHUNK_SIZE)
-    decompressed_size = len(first_chunk)
-    _check_max_size(decompressed_size, max_size)
-    output_stream = BytesIO()
-    output_stream.write(first_chunk)
-    while decompressor.unconsumed_tail:
-        output_chunk = decompressor.decompress(
-            decompressor.unconsumed_tail, max_length=_CHUNK_SIZE
+class _Decompressor:
+    """Base class for incremental decompressors.
+
+    Compressed data is fed with :meth:`decompress` as it arrives, and
+    :meth:`flush` is called once after the last compressed chunk. Both return
+    the decompressed data as a list of chunks of at most ``_CHUNK_SIZE``
+    bytes, so that callers can join all chunks once at the end.
+
+    :exc:`_DecompressionMaxSizeExceeded` is raised as soon as the
+    decompressed size exceeds *max_size*.
+    """
+
+    def __init__(self, *, max_size: int = 0):
+        self.max_size: int = max_size
+        self.decompressed_size: int = 0
+
+    def _add(self, chunks: list[bytes], chunk: bytes) -> None:
+        if not chunk:
+            return
+        self.decompressed_size += len(chunk)
+        _check_max_size(self.decompressed_size, self.max_size)
+        chunks.append(chunk)
+
+    def decompress(self, data: bytes) -> list[bytes]:
+        raise NotImplementedError
+
+    def flush(self) -> list[bytes]:
+        return []
+
+
+def _zlib_decompress(
+    decompressor: _Decompressor,
+    zlib_decompressor: zlib._Decompress,
+    data: bytes,
+    chunks: list[bytes],
+) -> None:
+    output_chunk = zlib_decompressor.decompress(data, _CHUNK_SIZE)
+    decompressor._add(chunks, output_chunk)
+    while not zlib_decompressor.eof and (
+        zlib_decompressor.unconsumed_tail or len(output_chunk) == _CHUNK_SIZE
+    ):
+        output_chunk = zlib_decompressor.decompress(
+            zlib_decompressor.unconsumed_tail, _CHUNK_SIZE
+        )
+        decompressor._add(chunks, output_chunk)
+
+
+class _DeflateDecompressor(_Decompressor):
+    def __init__(self, *, max_size: int = 0):
+        super().__init__(max_size=max_size)
+        self._decompressor = zlib.decompressobj()
+        # Compressed data received before any output, kept to retry it as
+        # raw deflate if it turns out not to be zlib-wrapped.
+        self._head: bytes | None = b""
+
+    def decompress(self, data: bytes) -> list[bytes]:
+        chunks: list[bytes] = []
+        if self._head is None:
+            _zlib_decompress(self, self._decompressor, data, chunks)
+            return chunks
+        self._head += data
+        try:
+            _zlib_decompress(self, self._decompressor, data, chunks)
+        except zlib.error:
+            # to work with raw deflate content that may be sent by microsoft servers.
+            self._decompressor = zlib.decompressobj(wbits=-15)
+            data, self._head = self._head, None
+            _zlib_decompress(self, self._decompressor, data, chunks)
+        if chunks:
+            self._head = None
+        return chunks
+
+    def flush(self) -> list[bytes]:
+        chunks: list[bytes] = []
+        self._add(chunks, self._decompressor.flush())
+        return chunks
+
+
+class _GzipDecompressor(_Decompressor):
+    """Incremental gzip decompressor.
+
+    Like :func:`scrapy.utils.gz.gunzip`, it is resilient to CRC checksum
+    errors and truncated data: once some data has been decompressed, those
+    errors stop the decompression instead of being raised.
+    """
+
+    def __init__(self, *, max_size: int = 0):
+        super().__init__(max_size=max_size)
+        self._decompressor: zlib._Decompress | None = None
+        # Received data that is not part of a compressed member body: member
+        # headers and trailers, and padding between members.
+        self._buffer: bytes = b""
+        self._trailer_pending: bool = False
+        self._crc: int = 0
+        self._size: int = 0
+        self._members: int = 0
+        self._stopped: bool = False
+
+    def _error(self, exception: Exception) -> None:
+        if not self.decompressed_size:
+            raise exception
+        self._stopped = True
+        self._buffer = b""
+
+    def _header_size(self) -> int | None:
+        """Return the size of the member header at the start of the buffer,
+        or ``None`` if the buffer does not contain the whole header yet."""
+        buffer = self._buffer
+        if len(buffer) >= 2 and buffer[:2] != _GZIP_MAGIC:
+            raise BadGzipFile(f"Not a gzipped file ({buffer[:2]!r})")
+        if len(buffer) < 10:
+            return None
+        if buffer[2] != 8:
+            raise BadGzipFile("Unknown compression method")
+        flags = buffer[3]
+        size = 10
+        if flags & _GZIP_FEXTRA:
+            if len(buffer) < size + 2:
+                return None
+            (extra_size,) = struct.unpack("<H", buffer[size : size + 2])
+            size += 2 + extra_size
+        for flag in (_GZIP_FNAME, _GZIP_FCOMMENT):
+            if flags & flag:
+                end = buffer.find(b"\x00", size)
+                if end == -1:
+                    return None
+                size = end + 1
+        if flags & _GZIP_FHCRC:
+            size += 2
+        return size if len(buffer) >= size else None
+
+    def decompress(self, data: bytes) -> list[bytes]:
+        chunks: list[bytes] = []
+        while not self._stopped:
+            if self._decompressor is not None:
+                if not data:
+                    break
+                start = len(chunks)
+                _zlib_decompress(self, self._decompressor, data, chunks)
+                for chunk in chunks[start:]:
+                    self._crc = zlib.crc32(chunk, self._crc)
+                    self._size += len(chunk)
+                if not self._decompressor.eof:
+                    break
+                data, self._decompressor = self._decompressor.unused_data, None
+                self._trailer_pending = True
+            self._buffer += data
+            data = b""
+            if self._trailer_pending:
+                if len(self._buffer) < 8:
+                    break
+                crc, size = struct.unpack("<II", self._buffer[:8])
+                if crc != self._crc or size != self._size & 0xFFFFFFFF:
+                    self._error(BadGzipFile("CRC check failed"))
+                    break
+                self._buffer = self._buffer[8:]
+                self._trailer_pending = False
+            if self._members:
+                # Gzip files can be padded with zeroes.
+                self._buffer = self._buffer.lstrip(b"\x00")
+            try:
+                header_size = self._header_size()
+            except BadGzipFile as e:
+                self._error(e)
+                break
+            if header_size is None:
+                break
+            data, self._buffer = self._buffer[header_size:], b""
+            self._decompressor = zlib.decompressobj(wbits=-zlib.MAX_WBITS)
+            self._crc = self._size = 0
+            self._members += 1
+        return chunks
+
+    def flush(self) -> list[bytes]:
+        chunks: list[bytes] = []
+        if self._stopped:
+            return chunks
+        if self._decompressor is not None:
+            self._add(chunks, self._decompressor.flush())
+        if self._decompressor is not None or self._trailer_pending or self._buffer:
+            self._error(
+                EOFError(
+                    "Compressed file ended before the end-of-stream marker was reached"
+                )
+            )
+        return chunks
+
+
+class _BrotliDecompressor(_Decompressor):
+    def __init__(self, *, max_size: int = 0):
+        super().__init__(max_size=max_size)
+        self._decompressor = brotli.Decompressor()
+
+    def decompress(self, data: bytes) -> list[bytes]:
+        chunks: list[bytes] = []
+        self._add(
+            chunks, self._decompressor.process(data, output_buffer_limit=_CHUNK_SIZE)
+        )
+        while not self._decompressor.is_finished():
+            output_chunk = self._decompressor.process(
+                b"", output_buffer_limit=_CHUNK_SIZE
+            )
+            if not output_chunk:
+                break
+            self._add(chunks, output_chunk)
+        return chunks
+
+
+class _ZstdDecompressor(_Decompressor):
+    def __init__(self, *, max_size: int = 0):
+        super().__init__(max_size=max_size)
+        self._chunks: list[bytes] = []
+        # Only write() is called on the writer target.
+        self._writer = zstandard.ZstdDecompressor().stream_writer(
+            cast("IO[bytes]", self), write_size=_CHUNK_SIZE
+        )
+
+    def write(self, data: bytes) -> int:
+        """Receive decompressed data from the zstandard stream writer."""
+        self._add(self._chunks, data)
+        return len(data)
+
+    def decompress(self, data: bytes) -> list[bytes]:
+        self._writer.write(data)
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+class _DecompressorChain(_Decompressor):
+    """Apply several decompressors in order, passing the output of each one
+    to the next one as it is produced, so that no intermediate body is
+    materialized."""
+
+    def __init__(self, decompressors: Iterable[_Decompressor]):
+        super().__init__()
+        self.decompressors: list[_Decompressor] = list(decompressors)
+
+    def _process(self, chunks: list[bytes], start: int) -> list[bytes]:
+        for decompressor in self.decompressors[start:]:
+            chunks = [
+                output_chunk
+                for chunk in chunks
+                for output_chunk in decompressor.decompress(chunk)
+            ]
+        return chunks
+
+    def decompress(self, data: bytes) -> list[bytes]:
+        chunks = self._process([data], 0)
+        self.decompressed_size += sum(len(chunk) for chunk in chunks)
+        return chunks
+
+    def flush(self) -> list[bytes]:
+        chunks: list[bytes] = []
+        for i, decompressor in enumerate(self.decompressors):
+            chunks.extend(self._process(decompressor.flush(), i + 1))
+        self.decompressed_size += sum(len(chunk) for chunk in chunks)
+        return chunks
+
+
+def _split_encodings(
+    content_encoding: list[bytes], supported_encodings: Container[bytes]
+) -> tuple[list[bytes], list[bytes]]:
+    """Split the values of the ``Content-Encoding`` header of a response into
+    the encodings to decode, in decoding order, and the encodings to keep,
+    starting with the first one not in *supported_encodings*."""
+    to_keep: list[bytes] = [
+        encoding.strip().lower()
+        for encoding in chain.from_iterable(
+            encodings.split(b",") for encodings in content_encoding
         )
-        decompressed_size += len(output_chunk)
-        _check_max_size(decompressed_size, max_size)
-        output_stream.write(output_chunk)
-    if tail := decompressor.flush():
-        decompressed_size += len(tail)
-        _check_max_size(decompressed_size, max_size)
-        output_stream.write(tail)
-    return output_stream.getvalue()
+    ]
+    to_decode: list[bytes] = []
+    while to_keep:
+        encoding = to_keep.pop()
+        if encoding not in supported_encodings:
+            to_keep.append(encoding)
+            return to_decode, to_keep
+        to_decode.append(encoding)
+    return to_decode, to_keep
+
+
+def _get_decompressor(encoding: bytes, *, max_size: int = 0) -> _Decompressor:
+    """Return an incremental decompressor for the *encoding* value of a
+    ``Content-Encoding`` header."""
+    if encoding not in _SUPPORTED_ENCODINGS:
+        raise ValueError(f"Unsupported content encoding: {encoding!r}")
+    if encoding in {b"gzip", b"x-gzip"}:
+        return _GzipDecompressor(max_size=max_size)
+    if encoding == b"deflate":
+        return _DeflateDecompressor(max_size=max_size)
+    if encoding == b"br":
+        return _BrotliDecompressor(max_size=max_size)
+    assert encoding == b"zstd"
+    return _ZstdDecompressor(max_size=max_size)
+
+
+def _decompress(decompressor: _Decompressor, data: bytes) -> bytes:
+    chunks = decompressor.decompress(data)
+    chunks.extend(decompressor.flush())
+    return b"".join(chunks)
+
+
+def _inflate(data: bytes, *, max_size: int = 0) -> bytes:
+    return _decompress(_DeflateDecompressor(max_size=max_size), data)
 
 
 def _unbrotli(data: bytes, *, max_size: int = 0) -> bytes:
-    decompressor = brotli.Decompressor()
-    first_chunk = decompressor.process(data, output_buffer_limit=_CHUNK_SIZE)
-    decompressed_size = len(first_chunk)
-    _check_max_size(decompressed_size, max_size)
-    output_stream = BytesIO()
-    output_stream.write(first_chunk)
-    while not decompressor.is_finished():
-        output_chunk = decompressor.process(b"", output_buffer_limit=_CHUNK_SIZE)
-        if not output_chunk:
-            break
-        decompressed_size += len(output_chunk)
-        _check_max_size(decompressed_size, max_size)
-        output_stream.write(output_chunk)
-    return output_stream.getvalue()
+    return _decompress(_BrotliDecompressor(max_size=max_size), data)
 
 
 def _unzstd(data: bytes, *, max_size: int = 0) -> bytes:
-    decompressor = zstandard.ZstdDecompressor()
-    stream_reader = decompressor.stream_reader(BytesIO(data))
-    output_stream = BytesIO()
-    output_chunk = b"."
-    decompressed_size = 0
-    while output_chunk:
-        output_chunk = stream_reader.read(_CHUNK_SIZE)
-        decompressed_size += len(output_chunk)
-        _check_max_size(decompressed_size, max_size)
-        output_stream.write(output_chunk)
-    return output_stream.getvalue()
+    return _decompress(_ZstdDecompressor(max_size=max_size), data)
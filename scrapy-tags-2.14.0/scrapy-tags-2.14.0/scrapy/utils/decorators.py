@@ -69,6 +69,16 @@ def inthread(func: Callable[_P, _T]) -> Callable[_P, Deferred[_T]]:
     return wrapped
 
 
+def process_pool(func: Callable[_P, _T]) -> Callable[_P, _T]:
+    """Decorator to mark a spider callback to be called in a pool of worker
+    processes.
+
+    See :ref:`process-pool`.
+    """
+    func._scrapy_process_pool = True  # type: ignore[attr-defined]
+    return func
+
+
 @overload
 def _warn_spider_arg(
     func: Callable[_P, Coroutine[Any, Any, _T]],
@@ -0,0 +1,27 @@
+import sys
+
+import scrapy
+from scrapy.crawler import CrawlerProcess
+
+
+class CachingDNSResolverSpider(scrapy.Spider):
+    name = "caching_dns_resolver_spider"
+
+    async def start(self):
+        yield scrapy.Request(self.url)
+
+    def parse(self, response):
+        self.logger.info(repr(response.ip_address))
+
+
+if __name__ == "__main__":
+    process = CrawlerProcess(
+        settings={
+            "RETRY_ENABLED": False,
+            "DNS_RESOLVER": "scrapy.resolver.CachingDNSResolver",
+        }
+    )
+    process.crawl(
+        CachingDNSResolverSpider, url=sys.argv[1].replace("127.0.0.1", "localhost")
+    )
+    process.start()
@@ -325,6 +325,20 @@ class TestMiscCommands(TestProjectBase):
         subdir.mkdir(exist_ok=True)
         assert call("list", cwd=subdir) == 0
 
+    def test_compactcache(self, proj_path: Path) -> None:
+        _, out, _ = proc("compactcache", "example", cwd=proj_path)
+        assert "example: removed 0 cached responses" in out
+
+    def test_compactcache_shared(self, proj_path: Path) -> None:
+        _, out, _ = proc(
+            "compactcache", "-s", "HTTPCACHE_SHARED=1", "example", cwd=proj_path
+        )
+        assert "_shared: removed 0 cached responses" in out
+
+    def test_compactcache_no_spider(self, proj_path: Path) -> None:
+        _, _, err = proc("compactcache", cwd=proj_path)
+        assert "No spider given and no spider found in the project" in err
+
     def test_command_not_found(self) -> None:
         na_msg = """
 The list command is not available from this location.
@@ -389,6 +403,7 @@ class TestHelpMessage(TestProjectBase):
         "genspider",
         "check",
         "bench",
+        "compactcache",
     ]
 
     def test_help_messages(self, proj_path: Path) -> None:
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import heapq
 import warnings
+from time import time
 from typing import TYPE_CHECKING, Any, cast
+from unittest import mock
 
 import OpenSSL.SSL
 import pytest
@@ -17,6 +20,8 @@ from scrapy.core.downloader.contextfactory import (
 )
 from scrapy.core.downloader.handlers.http11 import _RequestBodyProducer
 from scrapy.exceptions import ScrapyDeprecationWarning
+from scrapy.http import Request, StreamingResponse
+from scrapy.http.response.stream import ResponseBodyStream
 from scrapy.settings import Settings
 from scrapy.utils.defer import deferred_f_from_coro_f, maybe_deferred_to_future
 from scrapy.utils.misc import build_from_crawler
@@ -36,6 +41,72 @@ class TestSlot:
         slot = Slot(concurrency=8, delay=0.1, randomize_delay=True)
         assert repr(slot) == "Slot(concurrency=8, delay=0.10, randomize_delay=True)"
 
+    def test_slots(self):
+        slot = Slot(concurrency=8, delay=0.1, randomize_delay=True)
+        with pytest.raises(AttributeError):
+            slot.foo = "bar"
+
+
+class TestSlotGC:
+    @staticmethod
+    def get_downloader(settings=None):
+        crawler = get_crawler(DefaultSpider, settings)
+        crawler.spider = crawler._create_spider()
+        downloader = Downloader(crawler)
+        downloader._slot_gc_loop.stop()  # Prevent an unclean reactor.
+        return downloader
+
+    @staticmethod
+    def add_idle_slot(downloader, key, lastseen):
+        slot = Slot(concurrency=1, delay=0, randomize_delay=False)
+        slot.lastseen = lastseen
+        downloader.slots[key] = slot
+        downloader._slot_gc_keys.add(key)
+        heapq.heappush(downloader._slot_gc_heap, (lastseen, key))
+        return slot
+
+    def test_expired(self):
+        downloader = self.get_downloader()
+        now = time()
+        self.add_idle_slot(downloader, "old", now - 120)
+        self.add_idle_slot(downloader, "new", now)
+        downloader._slot_gc()
+        assert list(downloader.slots) == ["new"]
+        assert downloader._slot_gc_keys == {"new"}
+        assert downloader._slot_gc_heap == [(now, "new")]
+
+    def test_used_again(self):
+        downloader = self.get_downloader()
+        now = time()
+        slot = self.add_idle_slot(downloader, "example.com", now - 120)
+        slot.lastseen = now
+        downloader._slot_gc()
+        assert list(downloader.slots) == ["example.com"]
+        assert downloader._slot_gc_heap == [(now, "example.com")]
+
+    def test_active(self):
+        downloader = self.get_downloader()
+        slot = self.add_idle_slot(downloader, "example.com", time() - 120)
+        slot.active.add(object())
+        downloader._slot_gc()
+        assert list(downloader.slots) == ["example.com"]
+        assert not downloader._slot_gc_keys
+        assert not downloader._slot_gc_heap
+
+    def test_age(self):
+        downloader = self.get_downloader()
+        self.add_idle_slot(downloader, "example.com", time() - 20)
+        downloader._slot_gc()
+        assert list(downloader.slots) == ["example.com"]
+        downloader._slot_gc(age=10)
+        assert not downloader.slots
+
+    def test_age_setting(self):
+        downloader = self.get_downloader({"DOWNLOAD_SLOTS_GC_AGE": 10})
+        self.add_idle_slot(downloader, "example.com", time() - 20)
+        downloader._slot_gc()
+        assert not downloader.slots
+
 
 class TestContextFactoryBase:
     context_factory = None
@@ -188,3 +259,22 @@ async def test_fetch_deprecated_spider_arg():
         match=r"The fetch\(\) method of .+\.CustomDownloader requires a spider argument",
     ):
         await crawler.crawl_async()
+
+
+@deferred_f_from_coro_f
+async def test_streaming_response_counted_until_downloaded():
+    downloader = TestSlotGC.get_downloader({"DOWNLOADER_MIDDLEWARES_BASE": {}})
+    stream = ResponseBodyStream()
+    response = StreamingResponse("https://example.com", stream=stream)
+    request = Request("https://example.com")
+    with mock.patch.object(
+        downloader.handlers, "download_request_async", return_value=response
+    ):
+        result = await maybe_deferred_to_future(downloader.fetch(request))
+    assert result is response
+    slot = downloader.slots["example.com"]
+    assert downloader.active == slot.active == slot.transferring == {request}
+    stream._finish()
+    assert not downloader.active
+    assert not slot.active
+    assert not slot.transferring
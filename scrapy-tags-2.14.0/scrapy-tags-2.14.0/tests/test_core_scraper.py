@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+import os
 from typing import TYPE_CHECKING
 
+from scrapy import Request, Spider, signals
+from scrapy.core.processpool import _spider_state
+from scrapy.core.scraper import Slot, _ItemProcessingController
+from scrapy.statscollectors import MemoryStatsCollector
+from scrapy.utils.decorators import process_pool
 from scrapy.utils.defer import deferred_f_from_coro_f
 from scrapy.utils.test import get_crawler
 from tests.spiders import SimpleSpider
@@ -25,3 +31,122 @@ async def test_scraper_exception(
     )
     await crawler.crawl_async(url=mockserver.url("/"))
     assert "Scraper bug processing" in caplog.text
+
+
+class ProcessPoolSpider(Spider):
+    name = "process_pool"
+
+    def __init__(self, url, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.url = url
+        self.items = []
+
+    async def start(self):
+        yield Request(self.url, callback=self.parse_page, cb_kwargs={"depth": 0})
+        yield Request(
+            self.url,
+            callback=self.parse_meta,
+            meta={"process_pool": True},
+            dont_filter=True,
+        )
+
+    @process_pool
+    def parse_page(self, response, depth):
+        yield {"pid": os.getpid(), "depth": depth, "url": self.url}
+        if depth == 0:
+            yield response.follow(
+                "/status?n=200",
+                callback=self.parse_page,
+                cb_kwargs={"depth": 1},
+            )
+
+    def parse_meta(self, response):
+        return [{"pid": os.getpid(), "depth": None, "url": self.url}]
+
+
+@deferred_f_from_coro_f
+async def test_process_pool(mockserver: MockServer) -> None:
+    crawler = get_crawler(ProcessPoolSpider, {"SCRAPER_PROCESS_POOL_SIZE": 1})
+    items = []
+
+    def _on_item_scraped(item):
+        items.append(item)
+
+    crawler.signals.connect(_on_item_scraped, signal=signals.item_scraped)
+    url = mockserver.url("/")
+    await crawler.crawl_async(url=url)
+    assert sorted(items, key=lambda item: str(item["depth"])) == [
+        {"pid": items[0]["pid"], "depth": 0, "url": url},
+        {"pid": items[0]["pid"], "depth": 1, "url": url},
+        {"pid": items[0]["pid"], "depth": None, "url": url},
+    ]
+    assert items[0]["pid"] != os.getpid()
+    assert crawler.stats
+    assert crawler.stats.get_value("scraper/process_pool/responses") == 3
+
+
+def test_process_pool_unpicklable_attribute(caplog: pytest.LogCaptureFixture) -> None:
+    spider = ProcessPoolSpider(url="data:,")
+    spider.items = [lambda: None]
+    assert _spider_state(spider) == {
+        key: value for key, value in vars(spider).items() if key != "items"
+    }
+    assert "Spider attribute 'items' cannot be pickled" in caplog.text
+
+
+def test_slot_needs_backout_offloaded() -> None:
+    slot = Slot(max_offloaded=2)
+    assert not slot.needs_backout()
+    slot.offloaded = 2
+    assert slot.needs_backout()
+
+
+def test_slot_needs_backout_itemproc() -> None:
+    slot = Slot()
+    slot.itemproc_size = 10
+    assert not slot.needs_backout()
+    slot.max_itemproc_size = 10
+    assert slot.needs_backout()
+
+
+def test_itemproc_controller() -> None:
+    stats = MemoryStatsCollector(get_crawler())
+    controller = _ItemProcessingController(8, 1.0, stats)
+    assert controller.item_processed(0.5) == 8
+    assert controller.item_processed(10.0) == 4
+    # Decreases happen at most once per average latency.
+    assert controller.item_processed(10.0) == 4
+    controller._decreased_at = float("-inf")
+    assert controller.item_processed(10.0) == 2
+    assert stats.get_value("scraper/itemproc/limit_decreased") == 2
+    assert stats.get_value("scraper/itemproc/limit_min") == 2
+    while controller.latency is not None and controller.latency > 1.0:
+        controller.item_processed(0.0)
+    assert controller.limit == 3
+    assert controller.item_processed(0.0) == 4
+    assert stats.get_value("scraper/itemproc/limit") == 4
+
+
+class ItemsSpider(Spider):
+    name = "items"
+
+    def __init__(self, url, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.start_urls = [url]
+
+    def parse(self, response):
+        for i in range(10):
+            yield {"i": i}
+
+
+@deferred_f_from_coro_f
+async def test_adaptive_itemproc(mockserver: MockServer) -> None:
+    crawler = get_crawler(
+        ItemsSpider,
+        {"SCRAPER_ADAPTIVE_ITEMPROC_ENABLED": True, "CONCURRENT_ITEMS": 5},
+    )
+    await crawler.crawl_async(url=mockserver.url("/"))
+    assert crawler.stats
+    assert crawler.stats.get_value("item_scraped_count") == 10
+    assert crawler.stats.get_value("scraper/itemproc/limit") == 5 * 16
+    assert crawler.stats.get_value("scraper/itemproc/latency") is not None
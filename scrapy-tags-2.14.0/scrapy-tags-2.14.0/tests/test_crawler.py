@@ -866,6 +866,13 @@ class TestCrawlerProcessSubprocessBase(ScriptRunnerMixin):
         assert "TimeoutError" not in log
         assert "twisted.internet.error.DNSLookupError" not in log
 
+    def test_caching_dns_resolver(self, mockserver: MockServer) -> None:
+        log = self.run_script("caching_dns_resolver.py", mockserver.url("/"))
+        assert "Spider closed (finished)" in log
+        assert "scrapy.extensions.dnsprefetch.DNSPrefetch" in log
+        assert "IPv4Address('127.0.0.1')" in log
+        assert "'dns/lookup/count': 1" in log
+
     def test_twisted_reactor_asyncio(self):
         log = self.run_script("twisted_reactor_asyncio.py")
         assert "Spider closed (finished)" in log
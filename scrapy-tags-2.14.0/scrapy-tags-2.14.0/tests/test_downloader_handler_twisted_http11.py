@@ -4,7 +4,21 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any
 
-from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+import pytest
+from twisted.internet import defer, error
+from twisted.internet.task import Clock
+from twisted.internet.testing import StringTransport
+
+from scrapy import Request
+from scrapy.core.downloader.handlers.http11 import (
+    HTTP11DownloadHandler,
+    _ScrapyHTTP11ClientProtocol,
+    _ScrapyHTTPConnectionPool,
+)
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import StreamingResponse
+from scrapy.utils.defer import deferred_f_from_coro_f, maybe_deferred_to_future
+from scrapy.utils.test import get_crawler
 from tests.test_downloader_handlers_http_base import (
     TestHttp11Base,
     TestHttpProxyBase,
@@ -16,9 +30,11 @@ from tests.test_downloader_handlers_http_base import (
     TestHttpWithCrawlerBase,
     TestSimpleHttpsBase,
 )
+from tests.utils import twisted_sleep
 
 if TYPE_CHECKING:
     from scrapy.core.downloader.handlers import DownloadHandlerProtocol
+    from tests.mockserver.http import MockServer
 
 
 class HTTP11DownloadHandlerMixin:
@@ -28,7 +44,129 @@ class HTTP11DownloadHandlerMixin:
 
 
 class TestHttp11(HTTP11DownloadHandlerMixin, TestHttp11Base):
-    pass
+    @deferred_f_from_coro_f
+    async def test_download_stream(self, mockserver: MockServer) -> None:
+        request = Request(
+            mockserver.url("/largechunkedfile"), meta={"download_stream": True}
+        )
+        async with self.get_dh() as download_handler:
+            response = await download_handler.download_request(request)
+            assert isinstance(response, StreamingResponse)
+            assert response.body == b""
+            chunks = [chunk async for chunk in response.stream]
+        assert len(chunks) > 1
+        assert b"".join(chunks) == b"x" * 1024 * 1024
+
+    @deferred_f_from_coro_f
+    async def test_download_stream_maxsize(self, mockserver: MockServer) -> None:
+        request = Request(
+            mockserver.url("/largechunkedfile"),
+            meta={"download_stream": True, "download_maxsize": 10_000},
+        )
+        async with self.get_dh() as download_handler:
+            response = await download_handler.download_request(request)
+            assert isinstance(response, StreamingResponse)
+            with pytest.raises((defer.CancelledError, error.ConnectionAborted)):
+                await response.stream.read()
+
+    @deferred_f_from_coro_f
+    async def test_download_stream_timeout(self, mockserver: MockServer) -> None:
+        request = Request(
+            mockserver.url("/delay?n=10&b=1"),
+            meta={"download_stream": True, "download_timeout": 0.5},
+        )
+        async with self.get_dh() as download_handler:
+            response = await download_handler.download_request(request)
+            assert isinstance(response, StreamingResponse)
+            with pytest.raises(error.TimeoutError):
+                await response.stream.read()
+
+    @deferred_f_from_coro_f
+    async def test_download_stream_close(self, mockserver: MockServer) -> None:
+        request = Request(
+            mockserver.url("/largechunkedfile"), meta={"download_stream": True}
+        )
+        async with self.get_dh() as download_handler:
+            response = await download_handler.download_request(request)
+            assert isinstance(response, StreamingResponse)
+            assert await response.stream.__anext__()
+            response.stream.close()
+            assert await response.stream.read() == b""
+            # The connection can be used for new requests.
+            response = await download_handler.download_request(
+                Request(mockserver.url("/text"))
+            )
+            assert response.body == b"Works"
+
+    @deferred_f_from_coro_f
+    async def test_download_decompress(self, mockserver: MockServer) -> None:
+        data = "compress-me" * 100
+        request = Request(
+            mockserver.url(f"/compress?data={data}"),
+            headers={"Accept-Encoding": "gzip"},
+            meta={"_decompress_body": True},
+        )
+        async with self.get_dh() as download_handler:
+            response = await download_handler.download_request(request)
+            assert isinstance(download_handler, HTTP11DownloadHandler)
+            stats = download_handler._crawler.stats
+        assert stats
+        assert response.body == data.encode()
+        assert b"Content-Encoding" not in response.headers
+        assert 0 < request.meta["_compressed_body_size"] < len(data)
+        assert stats.get_value("httpcompression/response_count") == 1
+        assert stats.get_value("httpcompression/response_bytes") == len(data)
+
+    @deferred_f_from_coro_f
+    async def test_download_decompress_maxsize(self, mockserver: MockServer) -> None:
+        request = Request(
+            mockserver.url(f"/compress?data={'x' * 5000}"),
+            headers={"Accept-Encoding": "gzip"},
+            meta={"_decompress_body": True, "download_maxsize": 1000},
+        )
+        async with self.get_dh() as download_handler:
+            with pytest.raises(IgnoreRequest, match="during decompression"):
+                await download_handler.download_request(request)
+
+    @deferred_f_from_coro_f
+    async def test_connection_stats(self, mockserver: MockServer) -> None:
+        async with self.get_dh() as download_handler:
+            for _ in range(2):
+                response = await download_handler.download_request(
+                    Request(mockserver.url("/text"))
+                )
+                assert response.body == b"Works"
+            assert isinstance(download_handler, HTTP11DownloadHandler)
+            stats = download_handler._crawler.stats
+        assert stats
+        assert stats.get_value("downloader/connections/new") == 1
+        assert stats.get_value("downloader/connections/reused") == 1
+        assert stats.get_value("downloader/tls_handshake_count") is None
+
+    @deferred_f_from_coro_f
+    async def test_pool_disabled(self, mockserver: MockServer) -> None:
+        async with self.get_dh({"DOWNLOAD_POOL_MAXSIZE_PER_HOST": 0}) as dh:
+            for _ in range(2):
+                response = await dh.download_request(Request(mockserver.url("/text")))
+                assert response.body == b"Works"
+            assert isinstance(dh, HTTP11DownloadHandler)
+            stats = dh._crawler.stats
+        assert stats
+        assert stats.get_value("downloader/connections/new") == 2
+        assert stats.get_value("downloader/connections/reused") is None
+
+    @deferred_f_from_coro_f
+    async def test_pool_idle_timeout(self, mockserver: MockServer) -> None:
+        async with self.get_dh({"DOWNLOAD_POOL_IDLE_TIMEOUT": 0.1}) as dh:
+            await dh.download_request(Request(mockserver.url("/text")))
+            await maybe_deferred_to_future(twisted_sleep(0.2))
+            await dh.download_request(Request(mockserver.url("/text")))
+            assert isinstance(dh, HTTP11DownloadHandler)
+            stats = dh._crawler.stats
+        assert stats
+        assert stats.get_value("downloader/connections/expired") == 1
+        assert stats.get_value("downloader/connections/new") == 2
+        assert stats.get_value("downloader/connections/reused") is None
 
 
 class TestHttps11(HTTP11DownloadHandlerMixin, TestHttps11Base):
@@ -65,3 +203,28 @@ class TestHttp11WithCrawler(TestHttpWithCrawlerBase):
 
 class TestHttp11Proxy(HTTP11DownloadHandlerMixin, TestHttpProxyBase):
     pass
+
+
+def test_tls_handshake_stats():
+    crawler = get_crawler()
+    protocol = _ScrapyHTTP11ClientProtocol(None, crawler.stats)
+    protocol.makeConnection(StringTransport())
+    protocol.handshakeCompleted()
+    protocol.handshakeCompleted()
+    assert crawler.stats.get_value("downloader/tls_handshake_count") == 2
+    assert crawler.stats.get_value("downloader/tls_handshake_time") >= 0
+    assert crawler.stats.get_value("downloader/tls_handshake_time_max") >= 0
+
+
+def test_pool_expired_stats():
+    crawler = get_crawler()
+    pool = _ScrapyHTTPConnectionPool(Clock(), stats=crawler.stats)
+    for state in ("QUIESCENT", "CONNECTION_LOST"):
+        protocol = _ScrapyHTTP11ClientProtocol(None, crawler.stats)
+        protocol.makeConnection(StringTransport())
+        protocol._state = state
+        pool._connections["key"] = [protocol]
+        pool._timeouts[protocol] = None
+        pool._removeConnection("key", protocol)
+    # Connections closed by the server are not counted.
+    assert crawler.stats.get_value("downloader/connections/expired") == 1
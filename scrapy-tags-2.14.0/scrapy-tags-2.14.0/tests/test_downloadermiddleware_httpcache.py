@@ -1,22 +1,31 @@
 from __future__ import annotations
 
 import email.utils
+import inspect
+import os
 import shutil
 import tempfile
 import time
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
 from typing import TYPE_CHECKING, Any
+from unittest import mock
 
 import pytest
+from twisted.internet.defer import Deferred
 
 from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
 from scrapy.exceptions import IgnoreRequest
-from scrapy.http import HtmlResponse, Request, Response
+from scrapy.extensions.httpcache import DummyPolicy
+from scrapy.http import HtmlResponse, Request, Response, StreamingResponse
+from scrapy.http.response.stream import ResponseBodyStream
 from scrapy.spiders import Spider
+from scrapy.utils.defer import deferred_f_from_coro_f, maybe_deferred_to_future
+from scrapy.utils.misc import load_object
 from scrapy.utils.test import get_crawler
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import AsyncGenerator, Generator
 
     from scrapy.crawler import Crawler
 
@@ -142,6 +151,112 @@ class StorageTestMixin:
             assert isinstance(cached_response, HtmlResponse)
             self.assertEqualResponse(response, cached_response)
 
+    def test_storage_shared(self):
+        for shared in (False, True):
+            with self._storage(HTTPCACHE_SHARED=shared) as (storage, crawler):
+                storage.store_response(crawler.spider, self.request, self.response)
+            crawler = get_crawler(Spider, self._get_settings(HTTPCACHE_SHARED=shared))
+            spider = crawler._create_spider("other.example")
+            storage = load_object(self.storage_class)(crawler.settings)
+            storage.open_spider(spider)
+            try:
+                response = storage.retrieve_response(spider, self.request)
+            finally:
+                storage.close_spider(spider)
+            if shared:
+                self.assertEqualResponse(self.response, response)
+            else:
+                assert response is None
+
+
+class GarbageCollectionTestMixin:
+    """Mixin containing tests of the garbage collection of storages."""
+
+    def _store(self, storage, crawler, *requests):
+        # Garbage is collected explicitly.
+        with mock.patch.object(storage._gc_schedule, "stored", return_value=False):
+            for request in requests:
+                response = self.response.replace(url=request.url)
+                storage.store_response(crawler.spider, request, response)
+                time.sleep(0.01)  # distinct store times
+
+    def test_collect_garbage_expired(self):
+        with self._storage() as (storage, crawler):
+            self._store(storage, crawler, self.request)
+            assert storage.collect_garbage(crawler.spider.name) == 0
+            with mock.patch(
+                "scrapy.extensions.httpcache.time", return_value=time.time() + 10
+            ):
+                assert storage.collect_garbage(crawler.spider.name) == 1
+            assert storage.retrieve_response(crawler.spider, self.request) is None
+
+    def test_collect_garbage_never_expire(self):
+        with self._storage(HTTPCACHE_EXPIRATION_SECS=0) as (storage, crawler):
+            self._store(storage, crawler, self.request)
+            with mock.patch(
+                "scrapy.extensions.httpcache.time", return_value=time.time() + 10
+            ):
+                assert storage.collect_garbage(crawler.spider.name) == 0
+
+    def test_collect_garbage_max_entries(self):
+        request2 = Request("http://www.example.com/2")
+        request3 = Request("http://www.example.com/3")
+        with self._storage(HTTPCACHE_MAX_ENTRIES=2) as (storage, crawler):
+            self._store(storage, crawler, self.request, request2, request3)
+            assert storage.retrieve_response(crawler.spider, self.request)
+            assert storage.collect_garbage(crawler.spider.name) == 1
+            # The least recently used response is removed.
+            assert storage.retrieve_response(crawler.spider, self.request)
+            assert storage.retrieve_response(crawler.spider, request2) is None
+            assert storage.retrieve_response(crawler.spider, request3)
+
+    def test_collect_garbage_age(self):
+        request2 = Request("http://www.example.com/2")
+        with self._storage(HTTPCACHE_MAX_ENTRIES=1, HTTPCACHE_EVICTION="age") as (
+            storage,
+            crawler,
+        ):
+            self._store(storage, crawler, self.request, request2)
+            assert storage.retrieve_response(crawler.spider, self.request)
+            assert storage.collect_garbage(crawler.spider.name) == 1
+            assert storage.retrieve_response(crawler.spider, self.request) is None
+            assert storage.retrieve_response(crawler.spider, request2)
+
+    def test_collect_garbage_max_size(self):
+        request2 = Request("http://www.example.com/2")
+        with self._storage(HTTPCACHE_MAX_SIZE=1) as (storage, crawler):
+            self._store(storage, crawler, self.request, request2)
+            assert storage.collect_garbage(crawler.spider.name) == 2
+            assert storage.retrieve_response(crawler.spider, request2) is None
+
+    def test_collect_garbage_open_spider(self):
+        request2 = Request("http://www.example.com/2")
+        with self._storage(HTTPCACHE_MAX_ENTRIES=1) as (storage, crawler):
+            self._store(storage, crawler, self.request, request2)
+        with self._storage(HTTPCACHE_MAX_ENTRIES=1) as (storage, crawler):
+            assert storage.retrieve_response(crawler.spider, self.request) is None
+            assert storage.retrieve_response(crawler.spider, request2)
+
+    def test_collect_garbage_store(self):
+        requests = [Request(f"http://www.example.com/{i}") for i in range(25)]
+        with self._storage(HTTPCACHE_MAX_ENTRIES=20) as (storage, crawler):
+            for request in requests:
+                response = self.response.replace(url=request.url)
+                storage.store_response(crawler.spider, request, response)
+                time.sleep(0.01)  # distinct store times
+            # Garbage is collected every 2 stored responses.
+            assert storage.retrieve_response(crawler.spider, requests[0]) is None
+            assert storage.retrieve_response(crawler.spider, requests[3]) is None
+            assert storage.retrieve_response(crawler.spider, requests[4])
+            assert storage.retrieve_response(crawler.spider, requests[-1])
+
+    def test_invalid_eviction(self):
+        with (
+            pytest.raises(ValueError, match="Invalid HTTPCACHE_EVICTION"),
+            self._storage(HTTPCACHE_EVICTION="foo"),
+        ):
+            pass
+
 
 class PolicyTestMixin:
     """Mixin containing policy-specific test methods."""
@@ -161,6 +276,32 @@ class PolicyTestMixin:
                     self.response.__class__,
                 )
 
+    def test_dont_cache_streaming_response(self):
+        with self._middleware() as mw:
+            response = self.response.replace(
+                cls=StreamingResponse, body=b"", stream=ResponseBodyStream()
+            )
+            assert mw.process_response(self.request, response) is response
+            assert mw.storage.retrieve_response(mw.crawler.spider, self.request) is None
+            assert mw.crawler.stats.get_value("httpcache/uncacheable") == 1
+
+    def test_replay(self):
+        response = self.response.replace(headers={"Cache-Control": "max-age=0"})
+        with self._middleware() as mw:
+            mw.process_response(self.request, response)
+        with self._middleware(HTTPCACHE_REPLAY=True) as mw:
+            # stale responses are not revalidated
+            cached = mw.process_request(self.request.copy())
+            self.assertEqualResponse(response, cached)
+            assert "cached" in cached.flags
+            with pytest.raises(IgnoreRequest):
+                mw.process_request(Request("http://www.example.com/missing"))
+            with pytest.raises(IgnoreRequest):
+                mw.process_request(self.request.replace(meta={"dont_cache": True}))
+            assert mw.process_request(Request("file:///tmp/foo.txt")) is None
+            assert mw.crawler.stats.get_value("httpcache/hit") == 1
+            assert mw.crawler.stats.get_value("httpcache/ignore") == 2
+
 
 class DummyPolicyTestMixin(PolicyTestMixin):
     """Mixin containing dummy policy specific test methods."""
@@ -563,16 +704,126 @@ class RFC2616PolicyTestMixin(PolicyTestMixin):
                 self.assertEqualResponse(res1, res2)
                 assert "cached" in res2.flags
 
+    def test_ignore_response_cache_controls_not_shared(self):
+        headers = {"Cache-Control": "no-store"}
+        with self._middleware(
+            HTTPCACHE_IGNORE_RESPONSE_CACHE_CONTROLS=["no-store"]
+        ) as mw:
+            request = Request("http://example.com", headers=headers)
+            response = Response(request.url, headers=headers)
+            assert mw.policy._parse_cachecontrol(response) == {}
+            assert mw.policy._parse_cachecontrol(request) == {b"no-store": None}
+            assert not mw.policy.should_cache_request(request)
+
+    def test_freshness_lifetime_cached(self):
+        headers = {"Date": self.yesterday, "Expires": self.tomorrow}
+        now = time.time()
+        with self._middleware() as mw:
+            request = Request("http://example.com")
+            lifetimes = []
+            for _ in range(3):
+                response = Response(request.url, headers=headers)
+                lifetimes.append(
+                    mw.policy._compute_freshness_lifetime(response, request, now)
+                )
+            assert lifetimes == [2 * 86400] * 3
+            info = mw.policy._freshness_lifetimes.cache_info()
+            assert (info.hits, info.misses) == (2, 1)
+
+    def test_freshness_lifetime_without_date(self):
+        headers = {"Expires": self.tomorrow}
+        now = time.time()
+        with self._middleware() as mw:
+            request = Request("http://example.com")
+            response = Response(request.url, headers=headers)
+            lifetime = mw.policy._compute_freshness_lifetime(response, request, now)
+            assert lifetime == pytest.approx(86400, abs=2)
+            later = mw.policy._compute_freshness_lifetime(response, request, now + 3600)
+            assert later == pytest.approx(86400 - 3600, abs=2)
+            assert mw.policy._freshness_lifetimes.cache_info().currsize == 0
+
 
 # Concrete test classes that combine storage and policy mixins
 
 
 class TestFilesystemStorageWithDummyPolicy(
-    TestBase, StorageTestMixin, DummyPolicyTestMixin
+    TestBase, StorageTestMixin, GarbageCollectionTestMixin, DummyPolicyTestMixin
 ):
     storage_class = "scrapy.extensions.httpcache.FilesystemCacheStorage"
     policy_class = "scrapy.extensions.httpcache.DummyPolicy"
 
+    def test_store_replace(self):
+        with self._storage(HTTPCACHE_SHARED=True) as (storage, crawler):
+            storage.store_response(crawler.spider, self.request, self.response)
+            response = self.response.replace(body=b"new body")
+            storage.store_response(crawler.spider, self.request, response)
+            cached = storage.retrieve_response(crawler.spider, self.request)
+            self.assertEqualResponse(response, cached)
+            tmpdir = Path(self.tmpdir, "_shared", "tmp")
+            assert list(tmpdir.iterdir()) == []
+
+    def test_tmp_dirs_removed_on_open(self):
+        with self._storage() as (storage, crawler):
+            storage.store_response(crawler.spider, self.request, self.response)
+        tmpdirs = [Path(self.tmpdir, "example.com", "tmp", name) for name in "ab"]
+        for tmpdir in tmpdirs:
+            tmpdir.mkdir()
+        # Only directories left behind long ago are removed.
+        old = time.time() - 3601
+        os.utime(tmpdirs[0], (old, old))
+        with self._storage() as (storage, crawler):
+            assert not tmpdirs[0].exists()
+            assert tmpdirs[1].exists()
+
+    def test_removed_while_reading(self):
+        with self._storage() as (storage, crawler):
+            storage.store_response(crawler.spider, self.request, self.response)
+            rpath = Path(storage._get_request_path(crawler.spider, self.request))
+            read_meta = storage._read_meta
+
+            def remove_after_reading_meta(*args):
+                metadata = read_meta(*args)
+                shutil.rmtree(rpath)
+                return metadata
+
+            with mock.patch.object(
+                storage, "_read_meta", side_effect=remove_after_reading_meta
+            ):
+                assert (
+                    storage.retrieve_response_metadata(crawler.spider, self.request)
+                    is None
+                )
+            assert storage.retrieve_response(crawler.spider, self.request) is None
+            assert storage.collect_garbage("example.com") == 0
+
+    @pytest.mark.parametrize("replay", [False, True])
+    def test_body_removed_after_hit(self, replay):
+        with self._middleware(HTTPCACHE_REPLAY=replay, HTTPCACHE_MEMORY_SIZE=0) as mw:
+            assert mw._two_phase_storage
+            mw.process_response(self.request, self.response)
+            with mock.patch.object(
+                mw.storage, "retrieve_response_body", return_value=None
+            ):
+                if replay:
+                    with pytest.raises(IgnoreRequest):
+                        mw.process_request(self.request)
+                else:
+                    assert mw.process_request(self.request) is None
+            assert mw.crawler.stats.get_value("httpcache/hit") is None
+            assert mw.crawler.stats.get_value("httpcache/miss") == 1
+            assert mw.process_request(self.request)
+            assert mw.crawler.stats.get_value("httpcache/hit") == 1
+
+    def test_policy_not_headers_only(self):
+        class BodyPolicy(DummyPolicy):
+            headers_only = False
+
+        with self._middleware(HTTPCACHE_POLICY=BodyPolicy) as mw:
+            assert not mw._two_phase_storage
+            mw.process_response(self.request, self.response)
+            response = mw.process_request(self.request)
+            self.assertEqualResponse(self.response, response)
+
 
 class TestFilesystemStorageWithRFC2616Policy(
     TestBase, StorageTestMixin, RFC2616PolicyTestMixin
@@ -580,11 +831,75 @@ class TestFilesystemStorageWithRFC2616Policy(
     storage_class = "scrapy.extensions.httpcache.FilesystemCacheStorage"
     policy_class = "scrapy.extensions.httpcache.RFC2616Policy"
 
+    def test_retrieve_response_metadata(self):
+        with self._storage() as (storage, crawler):
+            storage.store_response(crawler.spider, self.request, self.response)
+            response = storage.retrieve_response_metadata(crawler.spider, self.request)
+            assert response.status == self.response.status
+            assert response.headers == self.response.headers
+            assert response.body == b""
+            response = storage.retrieve_response_body(
+                crawler.spider, self.request, response
+            )
+            assert isinstance(response, HtmlResponse)
+            self.assertEqualResponse(self.response, response)
+
+    def _stale_response(self):
+        return Response(
+            "http://www.example.com",
+            headers={"Cache-Control": "max-age=0", "ETag": "foo"},
+            body=b"test body",
+        )
 
-class TestDbmStorageWithDummyPolicy(TestBase, StorageTestMixin, DummyPolicyTestMixin):
+    def test_stale_body_not_read(self):
+        response = self._stale_response()
+        with self._middleware() as mw:
+            mw.process_response(Request("http://www.example.com"), response)
+            request = Request("http://www.example.com")
+            with mock.patch.object(
+                mw.storage,
+                "retrieve_response_body",
+                wraps=mw.storage.retrieve_response_body,
+            ) as retrieve_body:
+                assert mw.process_request(request) is None
+                retrieve_body.assert_not_called()
+                assert request.headers[b"If-None-Match"] == b"foo"
+                cached = mw.process_response(
+                    request, response.replace(status=304, body=b"")
+                )
+                retrieve_body.assert_called_once()
+            assert cached.status == 200
+            assert cached.body == b"test body"
+            assert "cached" in cached.flags
+
+    def test_stale_body_removed(self):
+        response = self._stale_response()
+        with self._middleware() as mw:
+            mw.process_response(Request("http://www.example.com"), response)
+            request = Request("http://www.example.com")
+            assert mw.process_request(request) is None
+            response304 = response.replace(status=304, body=b"")
+            with mock.patch.object(
+                mw.storage, "retrieve_response_body", return_value=None
+            ):
+                assert mw.process_response(request, response304) is response304
+
+
+class TestDbmStorageWithDummyPolicy(
+    TestBase, StorageTestMixin, GarbageCollectionTestMixin, DummyPolicyTestMixin
+):
     storage_class = "scrapy.extensions.httpcache.DbmCacheStorage"
     policy_class = "scrapy.extensions.httpcache.DummyPolicy"
 
+    def test_read_times_batched(self):
+        with self._storage(HTTPCACHE_MAX_ENTRIES=100) as (storage, crawler):
+            self._store(storage, crawler, self.request)
+            key = crawler.request_fingerprinter.fingerprint(self.request).hex()
+            assert storage.retrieve_response(crawler.spider, self.request)
+            assert f"{key}_used" not in storage.db
+            storage.collect_garbage(crawler.spider.name)
+            assert f"{key}_used" in storage.db
+
 
 class TestDbmStorageWithRFC2616Policy(
     TestBase, StorageTestMixin, RFC2616PolicyTestMixin
@@ -610,3 +925,418 @@ class TestFilesystemStorageGzipWithDummyPolicy(TestFilesystemStorageWithDummyPol
     def _get_settings(self, **new_settings) -> dict[str, Any]:
         new_settings.setdefault("HTTPCACHE_GZIP", True)
         return super()._get_settings(**new_settings)
+
+
+class TestDeduplicatingStorageWithDummyPolicy(TestFilesystemStorageWithDummyPolicy):
+    storage_class = "scrapy.extensions.httpcache.DeduplicatingCacheStorage"
+
+    @staticmethod
+    def _body_files(storage):
+        return sorted(path.name for path in storage._bodies_path.glob("*/*"))
+
+    def test_deduplicated(self):
+        request2 = Request("http://www.example.com/2")
+        with self._storage() as (storage, crawler):
+            storage.store_response(crawler.spider, self.request, self.response)
+            storage.store_response(crawler.spider, request2, self.response)
+            assert len(self._body_files(storage)) == 1
+            for request in (self.request, request2):
+                response = storage.retrieve_response(crawler.spider, request)
+                self.assertEqualResponse(self.response, response)
+
+    def test_dictionary(self):
+        pytest.importorskip("zstandard")
+        requests = [Request(f"http://www.example.com/{i}") for i in range(300)]
+        responses = [
+            self.response.replace(body=b"<html>" + b"boilerplate" * 40 + b"%d" % i)
+            for i in range(300)
+        ]
+        settings = {"HTTPCACHE_DICT_SIZE": 1024, "HTTPCACHE_EXPIRATION_SECS": 0}
+        with self._storage(**settings) as (storage, crawler):
+            for request, response in zip(requests, responses, strict=True):
+                storage.store_response(crawler.spider, request, response)
+            assert (storage._bodies_path / "dictionary").exists()
+            assert storage._dictionary is not None
+        with self._storage(**settings) as (storage, crawler):
+            assert storage._dictionary is not None
+            for request, response in zip(requests, responses, strict=True):
+                cached = storage.retrieve_response(crawler.spider, request)
+                self.assertEqualResponse(response, cached)
+
+    def test_dictionary_trained_by_other_process(self):
+        pytest.importorskip("zstandard")
+        requests = [Request(f"http://www.example.com/{i}") for i in range(300)]
+        responses = [
+            self.response.replace(body=b"<html>" + b"boilerplate" * 40 + b"%d" % i)
+            for i in range(300)
+        ]
+        settings = {"HTTPCACHE_DICT_SIZE": 1024, "HTTPCACHE_EXPIRATION_SECS": 0}
+        with (
+            self._storage(**settings) as (reader, reader_crawler),
+            self._storage(**settings) as (writer, writer_crawler),
+        ):
+            for request, response in zip(requests, responses, strict=True):
+                writer.store_response(writer_crawler.spider, request, response)
+            assert writer._dictionary is not None
+            assert reader._dictionary is None
+            cached = reader.retrieve_response(reader_crawler.spider, requests[-1])
+            self.assertEqualResponse(responses[-1], cached)
+            assert reader._dictionary is not None
+
+    def test_dictionary_trained_concurrently(self):
+        pytest.importorskip("zstandard")
+        requests = [Request(f"http://www.example.com/{i}") for i in range(300)]
+        responses = [
+            self.response.replace(body=b"<html>" + b"boilerplate" * 40 + b"%d" % i)
+            for i in range(300)
+        ]
+        settings = {"HTTPCACHE_DICT_SIZE": 1024, "HTTPCACHE_EXPIRATION_SECS": 0}
+        with (
+            self._storage(**settings) as (storage1, crawler1),
+            self._storage(**settings) as (storage2, crawler2),
+        ):
+            for request, response in zip(requests, responses, strict=True):
+                storage1.store_response(crawler1.spider, request, response)
+            for request, response in zip(requests, responses, strict=True):
+                storage2.store_response(
+                    crawler2.spider, request, response.replace(body=response.body * 2)
+                )
+            # Both processes use the dictionary trained first.
+            assert storage1._dictionary.dict_id() == storage2._dictionary.dict_id()
+            for request, response in zip(requests, responses, strict=True):
+                cached = storage1.retrieve_response(crawler1.spider, request)
+                self.assertEqualResponse(
+                    response.replace(body=response.body * 2), cached
+                )
+            assert not list(storage1._bodies_path.glob("*.tmp"))
+
+    def test_undecodable_body(self):
+        with self._storage() as (storage, crawler):
+            storage.store_response(crawler.spider, self.request, self.response)
+            (bodypath,) = storage._bodies_path.glob("*/*")
+            bodypath.write_bytes(b"corrupted")
+            assert storage.retrieve_response(crawler.spider, self.request) is None
+            assert not bodypath.exists()
+            storage.store_response(crawler.spider, self.request, self.response)
+            response = storage.retrieve_response(crawler.spider, self.request)
+            self.assertEqualResponse(self.response, response)
+
+    def test_collect_garbage_bodies(self):
+        request2 = Request("http://www.example.com/2")
+        with self._storage(HTTPCACHE_EXPIRATION_SECS=0) as (storage, crawler):
+            storage.store_response(crawler.spider, self.request, self.response)
+            storage.store_response(crawler.spider, request2, self.response)
+            response2 = self.response.replace(body=b"other body")
+            storage.store_response(crawler.spider, request2, response2)
+            assert len(self._body_files(storage)) == 2
+            assert storage.collect_garbage(crawler.spider.name) == 0
+            assert len(self._body_files(storage)) == 2
+            storage.store_response(crawler.spider, self.request, response2)
+            assert storage.collect_garbage(crawler.spider.name) == 0
+            # The first body is no longer used, but it is recent, so another
+            # process could be about to use it.
+            assert len(self._body_files(storage)) == 2
+            with mock.patch(
+                "scrapy.extensions.httpcache.time", return_value=time.time() + 3601
+            ):
+                assert storage.collect_garbage(crawler.spider.name) == 0
+            assert len(self._body_files(storage)) == 1
+
+    def test_collect_garbage_tmp_files(self):
+        with self._storage(HTTPCACHE_EXPIRATION_SECS=0) as (storage, crawler):
+            storage.store_response(crawler.spider, self.request, self.response)
+            (bodypath,) = storage._bodies_path.glob("*/*")
+            tmp_files = [
+                bodypath.with_name(f"{bodypath.name}.123.tmp"),
+                storage._bodies_path / "dictionary.123.tmp",
+            ]
+            for path in tmp_files:
+                path.write_bytes(b"partial")
+            tmpdir = Path(self.tmpdir, crawler.spider.name, "tmp", "0123.abc")
+            tmpdir.mkdir()
+            (tmpdir / "meta").write_bytes(b"partial")
+            assert storage.collect_garbage(crawler.spider.name) == 0
+            assert all(path.exists() for path in [*tmp_files, tmpdir])
+            with mock.patch(
+                "scrapy.extensions.httpcache.time", return_value=time.time() + 3601
+            ):
+                assert storage.collect_garbage(crawler.spider.name) == 0
+            assert not any(path.exists() for path in [*tmp_files, tmpdir])
+            assert storage.retrieve_response(crawler.spider, self.request)
+
+    def test_gzip(self):
+        with (
+            mock.patch.dict("sys.modules", {"zstandard": None}),
+            self._storage() as (storage, crawler),
+        ):
+            storage.store_response(crawler.spider, self.request, self.response)
+            assert self._body_files(storage)[0].endswith(".gz")
+            response = storage.retrieve_response(crawler.spider, self.request)
+            self.assertEqualResponse(self.response, response)
+
+
+class TestDeduplicatingStorageWithRFC2616Policy(TestFilesystemStorageWithRFC2616Policy):
+    storage_class = "scrapy.extensions.httpcache.DeduplicatingCacheStorage"
+
+
+class TestMemoryWithDummyPolicy(TestFilesystemStorageWithDummyPolicy):
+    def _get_settings(self, **new_settings) -> dict[str, Any]:
+        new_settings.setdefault("HTTPCACHE_MEMORY_SIZE", 1024 * 1024)
+        return super()._get_settings(**new_settings)
+
+    def test_memory_hit(self):
+        with self._middleware() as mw:
+            assert mw.process_request(self.request) is None
+            mw.process_response(self.request, self.response)
+            with mock.patch.object(
+                mw.storage, "retrieve_response_metadata"
+            ) as retrieve:
+                response = mw.process_request(self.request)
+            retrieve.assert_not_called()
+            assert isinstance(response, HtmlResponse)
+            self.assertEqualResponse(self.response, response)
+            assert "cached" in response.flags
+            assert mw.crawler.stats.get_value("httpcache/memory/hit") == 1
+            assert mw.crawler.stats.get_value("httpcache/memory/miss") == 1
+
+    def test_memory_retrieved(self):
+        with self._middleware(HTTPCACHE_MEMORY_SIZE=0) as mw:
+            mw.process_response(self.request, self.response)
+        with self._middleware() as mw:
+            response = mw.process_request(self.request)
+            self.assertEqualResponse(self.response, response)
+            with mock.patch.object(
+                mw.storage, "retrieve_response_metadata"
+            ) as retrieve:
+                response = mw.process_request(self.request)
+            retrieve.assert_not_called()
+            self.assertEqualResponse(self.response, response)
+
+    def test_memory_eviction(self):
+        request2 = Request("http://www.example.com/2")
+        with self._middleware(HTTPCACHE_MEMORY_SIZE=100) as mw:
+            mw.process_response(self.request, self.response)
+            mw.process_response(request2, self.response.replace(url=request2.url))
+            assert mw.crawler.stats.get_value("httpcache/memory/eviction") == 1
+            # Evicted responses are still retrieved from the storage.
+            response = mw.process_request(self.request)
+            self.assertEqualResponse(self.response, response)
+            assert mw.crawler.stats.get_value("httpcache/memory/miss") == 1
+            assert mw.crawler.stats.get_value("httpcache/memory/eviction") == 2
+
+    def test_memory_too_large(self):
+        with self._middleware(HTTPCACHE_MEMORY_SIZE=10) as mw:
+            mw.process_response(self.request, self.response)
+            assert mw._memory is not None
+            assert mw._memory.size == 0
+            response = mw.process_request(self.request)
+            self.assertEqualResponse(self.response, response)
+            assert mw.crawler.stats.get_value("httpcache/memory/miss") == 1
+
+    def test_memory_expired(self):
+        with self._middleware() as mw:
+            with mock.patch(
+                "scrapy.downloadermiddlewares.httpcache.time",
+                return_value=time.time() - 10,
+            ):
+                mw.process_response(self.request, self.response)
+            with mock.patch.object(
+                mw.storage, "retrieve_response_metadata", return_value=None
+            ) as retrieve:
+                assert mw.process_request(self.request) is None
+            retrieve.assert_called_once()
+            assert mw.crawler.stats.get_value("httpcache/memory/miss") == 1
+
+    def test_memory_retrieved_expired(self):
+        now = time.time()
+        with self._middleware(HTTPCACHE_MEMORY_SIZE=0) as mw:
+            mw.process_response(self.request, self.response)
+        with self._middleware() as mw:
+            with mock.patch(
+                "scrapy.downloadermiddlewares.httpcache.time", return_value=now + 0.9
+            ):
+                assert mw.process_request(self.request) is not None
+            # Responses read from the storage expire from memory when they
+            # expire from the storage.
+            with (
+                mock.patch(
+                    "scrapy.downloadermiddlewares.httpcache.time",
+                    return_value=now + 1.5,
+                ),
+                mock.patch.object(
+                    mw.storage, "retrieve_response_metadata", return_value=None
+                ) as retrieve,
+            ):
+                assert mw.process_request(self.request) is None
+            retrieve.assert_called_once()
+
+
+class TestMemoryWithRFC2616Policy(TestFilesystemStorageWithRFC2616Policy):
+    def _get_settings(self, **new_settings) -> dict[str, Any]:
+        new_settings.setdefault("HTTPCACHE_MEMORY_SIZE", 1024 * 1024)
+        return super()._get_settings(**new_settings)
+
+
+class TestPackedStorageWithDummyPolicy(
+    TestBase, StorageTestMixin, DummyPolicyTestMixin
+):
+    storage_class = "scrapy.extensions.httpcache.PackedCacheStorage"
+    policy_class = "scrapy.extensions.httpcache.DummyPolicy"
+
+    @staticmethod
+    def _segment_files(storage):
+        return sorted(path.name for path in storage._path.glob("*.seg"))
+
+    def test_storage_reopen(self):
+        with self._storage() as (storage, crawler):
+            storage.store_response(crawler.spider, self.request, self.response)
+        with self._storage() as (storage, crawler):
+            response = storage.retrieve_response(crawler.spider, self.request)
+            self.assertEqualResponse(self.response, response)
+
+    def test_compact_replaced(self):
+        with self._storage(HTTPCACHE_SEGMENT_SIZE=1) as (storage, crawler):
+            for i in range(5):
+                response = self.response.replace(body=f"body {i}".encode())
+                storage.store_response(crawler.spider, self.request, response)
+            # Each record starts a new segment, and previous segments only
+            # contain replaced records.
+            assert self._segment_files(storage) == ["00000005.seg"]
+            response = storage.retrieve_response(crawler.spider, self.request)
+            assert response.body == b"body 4"
+
+    def test_compact_kept(self):
+        request2 = Request("http://www.example.com/2")
+        with self._storage() as (storage, crawler):
+            storage.store_response(crawler.spider, self.request, self.response)
+            # Fit 2 records in each segment.
+            storage.segment_size = storage._segments[1]["size"] * 2 + 10
+            storage.store_response(crawler.spider, request2, self.response)
+            assert self._segment_files(storage) == ["00000001.seg"]
+            storage.store_response(crawler.spider, request2, self.response)
+            # Half of the first segment has been replaced, so its other record
+            # is moved to the second segment.
+            assert self._segment_files(storage) == ["00000002.seg"]
+            for request in (self.request, request2):
+                response = storage.retrieve_response(crawler.spider, request)
+                self.assertEqualResponse(self.response, response)
+
+    def test_compact_expired(self):
+        request2 = Request("http://www.example.com/2")
+        with self._storage(HTTPCACHE_SEGMENT_SIZE=1) as (storage, crawler):
+            with mock.patch(
+                "scrapy.extensions.httpcache.time", return_value=time.time() - 10
+            ):
+                storage.store_response(crawler.spider, self.request, self.response)
+            storage.store_response(crawler.spider, request2, self.response)
+            assert self._segment_files(storage) == ["00000002.seg"]
+            assert storage.retrieve_response(crawler.spider, self.request) is None
+            response = storage.retrieve_response(crawler.spider, request2)
+            self.assertEqualResponse(self.response, response)
+
+
+class TestPackedStorageWithRFC2616Policy(
+    TestBase, StorageTestMixin, RFC2616PolicyTestMixin
+):
+    storage_class = "scrapy.extensions.httpcache.PackedCacheStorage"
+    policy_class = "scrapy.extensions.httpcache.RFC2616Policy"
+
+
+class TestThreadedStorage(TestBase):
+    storage_class = "scrapy.extensions.httpcache.ThreadedCacheStorage"
+    policy_class = "scrapy.extensions.httpcache.DummyPolicy"
+
+    @asynccontextmanager
+    async def _async_middleware(
+        self, **new_settings: Any
+    ) -> AsyncGenerator[HttpCacheMiddleware]:
+        with self._get_crawler(**new_settings) as crawler:
+            assert crawler.spider
+            mw = HttpCacheMiddleware.from_crawler(crawler)
+            opened = mw.spider_opened(crawler.spider)
+            assert isinstance(opened, Deferred)
+            await maybe_deferred_to_future(opened)
+            try:
+                yield mw
+            finally:
+                closed = mw.spider_closed(crawler.spider)
+                assert closed is not None
+                await closed
+
+    @deferred_f_from_coro_f
+    async def test_storage(self):
+        async with self._async_middleware() as mw:
+            storage, spider = mw.storage, mw.crawler.spider
+            assert await storage.retrieve_response(spider, self.request) is None
+            storage.store_response(spider, self.request, self.response)
+            response = await storage.retrieve_response(spider, self.request)
+            assert isinstance(response, HtmlResponse)
+            self.assertEqualResponse(self.response, response)
+
+    @deferred_f_from_coro_f
+    async def test_threaded_storage_setting(self):
+        async with self._async_middleware(
+            HTTPCACHE_THREADED_STORAGE="scrapy.extensions.httpcache.DbmCacheStorage"
+        ) as mw:
+            assert type(mw.storage.storage).__name__ == "DbmCacheStorage"
+            mw.storage.store_response(mw.crawler.spider, self.request, self.response)
+            response = await mw.storage.retrieve_response(
+                mw.crawler.spider, self.request
+            )
+            self.assertEqualResponse(self.response, response)
+
+    @deferred_f_from_coro_f
+    async def test_middleware(self):
+        async with self._async_middleware() as mw:
+            assert await mw.process_request(self.request) is None
+            mw.process_response(self.request, self.response)
+            response = await mw.process_request(self.request)
+            assert isinstance(response, HtmlResponse)
+            self.assertEqualResponse(self.response, response)
+            assert "cached" in response.flags
+            assert mw.crawler.stats.get_value("httpcache/hit") == 1
+
+    @deferred_f_from_coro_f
+    async def test_middleware_not_two_phase(self):
+        async with self._async_middleware(
+            HTTPCACHE_THREADED_STORAGE="scrapy.extensions.httpcache.DbmCacheStorage"
+        ) as mw:
+            mw.process_response(self.request, self.response)
+            response = await mw.process_request(self.request)
+            self.assertEqualResponse(self.response, response)
+
+    @deferred_f_from_coro_f
+    async def test_write_queue_size(self):
+        request2 = Request("http://www.example.com/2")
+        async with self._async_middleware(HTTPCACHE_WRITE_QUEUE_SIZE=1) as mw:
+            storage, spider = mw.storage, mw.crawler.spider
+            assert storage.store_response(spider, self.request, self.response) is None
+            stored = storage.store_response(spider, request2, self.response)
+            assert stored is not None
+            await stored
+            assert storage._pending_writes == 0
+            assert await storage.retrieve_response(spider, self.request)
+            assert await storage.retrieve_response(spider, request2)
+
+    @deferred_f_from_coro_f
+    async def test_write_queue_size_middleware(self):
+        request2 = Request("http://www.example.com/2")
+        async with self._async_middleware(HTTPCACHE_WRITE_QUEUE_SIZE=1) as mw:
+            assert mw.process_response(self.request, self.response) is self.response
+            # The middleware waits for the response to be stored.
+            result = mw.process_response(request2, self.response)
+            assert inspect.iscoroutine(result)
+            assert await result is self.response
+            assert mw.storage._pending_writes == 0
+
+    @deferred_f_from_coro_f
+    async def test_store_error(self, caplog):
+        async with self._async_middleware() as mw:
+            storage, spider = mw.storage, mw.crawler.spider
+            with mock.patch.object(
+                storage.storage, "store_response", side_effect=ValueError("foo")
+            ):
+                storage.store_response(spider, self.request, self.response)
+                assert await storage.retrieve_response(spider, self.request) is None
+            assert storage._pending_writes == 0
+        assert "Error storing <GET http://www.example.com>" in caplog.text
@@ -12,9 +12,16 @@ from scrapy.downloadermiddlewares.httpcompression import (
     HttpCompressionMiddleware,
 )
 from scrapy.exceptions import IgnoreRequest, NotConfigured
-from scrapy.http import HtmlResponse, Request, Response
+from scrapy.http import HtmlResponse, Request, Response, StreamingResponse
+from scrapy.http.response.stream import ResponseBodyStream
 from scrapy.responsetypes import responsetypes
 from scrapy.spiders import Spider
+from scrapy.utils._compression import (
+    _DecompressionMaxSizeExceeded,
+    _DecompressorChain,
+    _get_decompressor,
+)
+from scrapy.utils.defer import deferred_f_from_coro_f
 from scrapy.utils.gz import gunzip
 from scrapy.utils.test import get_crawler
 from tests import tests_datadir
@@ -129,6 +136,23 @@ class TestHttpCompression:
         assert "Accept-Encoding" not in request.headers
         self.mw.process_request(request)
         assert request.headers.get("Accept-Encoding") == b", ".join(ACCEPTED_ENCODINGS)
+        assert request.meta["_decompress_body"] is True
+
+    def test_process_request_httpcache(self):
+        crawler = get_crawler(Spider, {"HTTPCACHE_ENABLED": True})
+        mw = HttpCompressionMiddleware.from_crawler(crawler)
+        request = Request("http://scrapytest.org", meta={"_compressed_body_size": 1})
+        mw.process_request(request)
+        assert "_decompress_body" not in request.meta
+        assert "_compressed_body_size" not in request.meta
+
+    def test_process_response_meta(self):
+        response = self._getresponse("gzip")
+        request = response.request
+        request.meta.update({"_decompress_body": True, "_compressed_body_size": 1})
+        self.mw.process_response(request, response)
+        assert "_decompress_body" not in request.meta
+        assert "_compressed_body_size" not in request.meta
 
     def test_process_response_gzip(self):
         response = self._getresponse("gzip")
@@ -766,3 +790,77 @@ class TestHttpCompression:
                 continue
             resp = self._get_truncated_response(check_key)
             assert len(resp.body) == 0
+
+    def _get_streaming_response(self, coding):
+        response = self._getresponse(coding)
+        stream = ResponseBodyStream()
+        for i in range(0, len(response.body), 100):
+            stream._feed(response.body[i : i + 100])
+        stream._finish()
+        return response.replace(cls=StreamingResponse, body=b"", stream=stream)
+
+    @deferred_f_from_coro_f
+    async def test_process_streaming_response(self):
+        response = self._get_streaming_response("gzip-deflate")
+        request = response.request
+        newresponse = self.mw.process_response(request, response)
+        assert newresponse is response
+        assert "Content-Encoding" not in newresponse.headers
+        body = await newresponse.stream.read()
+        assert body.startswith(b"<!DOCTYPE")
+        self.assertStatsEqual("httpcompression/response_count", 1)
+
+    @deferred_f_from_coro_f
+    async def test_process_streaming_response_max_size(self):
+        response = self._get_streaming_response("bomb-gzip")
+        request = response.request.replace(meta={"download_maxsize": 1_000_000})
+        newresponse = self.mw.process_response(request, response)
+        with pytest.raises(_DecompressionMaxSizeExceeded):
+            await newresponse.stream.read()
+
+
+def _get_chained_decompressor(format_id, max_size=0):
+    if "br" in format_id:
+        _skip_if_no_br()
+    if "zstd" in format_id:
+        _skip_if_no_zstd()
+    samplefile, content_encoding = FORMAT[format_id]
+    to_decode, _ = HttpCompressionMiddleware._split_encodings(
+        [content_encoding.encode()]
+    )
+    decompressor = _DecompressorChain(
+        _get_decompressor(encoding, max_size=max_size) for encoding in to_decode
+    )
+    return decompressor, (SAMPLEDIR / samplefile).read_bytes()
+
+
+@pytest.mark.parametrize(
+    "format_id", [format_id for format_id in FORMAT if "bomb" not in format_id]
+)
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_incremental_decompression(format_id, chunk_size):
+    decompressor, body = _get_chained_decompressor(format_id)
+    chunks = []
+    for i in range(0, len(body), chunk_size):
+        chunks.extend(decompressor.decompress(body[i : i + chunk_size]))
+    chunks.extend(decompressor.flush())
+    expected = HttpCompressionMiddleware()._handle_encoding(
+        body, [FORMAT[format_id][1].encode()], 0
+    )[0]
+    assert b"".join(chunks) == expected
+    assert decompressor.decompressed_size == len(expected)
+
+
+@pytest.mark.parametrize("format_id", ["br", "deflate", "gzip", "zstd"])
+def test_incremental_decompression_bomb(format_id):
+    decompressor, body = _get_chained_decompressor(
+        f"bomb-{format_id}", max_size=1_000_000
+    )
+
+    def decompress():
+        for i in range(0, len(body), 4096):
+            decompressor.decompress(body[i : i + 4096])
+
+    with pytest.raises(_DecompressionMaxSizeExceeded) as exc_info:
+        decompress()
+    assert exc_info.value.decompressed_size < 1_100_000
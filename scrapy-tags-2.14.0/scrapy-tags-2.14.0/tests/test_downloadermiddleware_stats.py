@@ -31,6 +31,14 @@ class TestDownloaderStats:
         self.mw.process_response(self.req, self.res)
         self.assertStatsEqual("downloader/response_count", 1)
 
+    def test_process_response_compressed_body_size(self):
+        response = Response("scrapytest.org", body=b"x" * 100)
+        self.mw.process_response(self.req, response)
+        decompressed = self.crawler.stats.get_value("downloader/response_bytes")
+        self.req.meta["_compressed_body_size"] = 10
+        self.mw.process_response(self.req, response)
+        self.assertStatsEqual("downloader/response_bytes", 2 * decompressed - 90)
+
     def test_process_exception(self):
         self.mw.process_exception(self.req, MyException())
         self.assertStatsEqual("downloader/exception_count", 1)
@@ -0,0 +1,91 @@
+from unittest import mock
+
+import pytest
+from twisted.internet.task import Clock
+
+from scrapy import Request
+from scrapy.exceptions import NotConfigured
+from scrapy.extensions.dnsprefetch import DNSPrefetch
+from scrapy.resolver import CachingDNSResolver
+from scrapy.utils.spider import DefaultSpider
+from scrapy.utils.test import get_crawler
+
+
+def test_disabled():
+    crawler = get_crawler()
+    with pytest.raises(NotConfigured):
+        DNSPrefetch.from_crawler(crawler)
+
+
+@pytest.fixture
+def resolver():
+    from twisted.internet import reactor
+
+    resolver = CachingDNSResolver(Clock(), 100, 60, 60, mock.Mock())
+    with mock.patch.object(reactor, "resolver", resolver, create=True):
+        yield resolver
+
+
+def _get_extension(**settings):
+    settings["DNS_RESOLVER"] = "scrapy.resolver.CachingDNSResolver"
+    crawler = get_crawler(settings_dict=settings)
+    crawler.stats.open_spider()
+    ext = DNSPrefetch.from_crawler(crawler)
+    ext.spider_opened(DefaultSpider())
+    return ext, crawler.stats
+
+
+def test_resolver_not_installed():
+    ext, stats = _get_extension()
+    assert ext.resolver is None
+    ext.request_scheduled(Request("https://example.com/a"), DefaultSpider())
+    ext.spider_closed(DefaultSpider(), "finished")
+    assert not any(key.startswith("dns/") for key in stats.get_stats())
+
+
+def test_resolver_installed_after_init():
+    from twisted.internet import reactor
+
+    crawler = get_crawler(
+        settings_dict={"DNS_RESOLVER": "scrapy.resolver.CachingDNSResolver"}
+    )
+    ext = DNSPrefetch.from_crawler(crawler)
+    resolver = CachingDNSResolver(Clock(), 100, 60, 60, mock.Mock())
+    with mock.patch.object(reactor, "resolver", resolver, create=True):
+        ext.spider_opened(DefaultSpider())
+    assert ext.resolver is resolver
+
+
+def test_prefetch(resolver):
+    ext, _ = _get_extension()
+    with mock.patch.object(resolver, "prefetch") as prefetch:
+        ext.request_scheduled(Request("https://example.com/a"), DefaultSpider())
+        ext.request_scheduled(
+            Request("https://example.org", meta={"proxy": "http://proxy"}),
+            DefaultSpider(),
+        )
+        ext.request_scheduled(Request("data:,foo"), DefaultSpider())
+    prefetch.assert_called_once_with("example.com")
+
+
+def test_prefetch_disabled(resolver):
+    ext, _ = _get_extension(DNS_PREFETCH=False)
+    assert not ext.prefetch
+
+
+def test_stats(resolver):
+    ext, stats = _get_extension()
+    for _ in range(3):
+        resolver._report("cache/hit")
+    resolver._report("cache/miss")
+    for i in range(1, 101):
+        resolver._report("lookup/time", i / 100)
+    ext.spider_closed(DefaultSpider(), "finished")
+    resolver._report("cache/miss")
+    assert stats.get_value("dns/cache/hit") == 3
+    assert isinstance(stats.get_value("dns/cache/hit"), int)
+    assert stats.get_value("dns/cache/miss") == 1
+    assert stats.get_value("dns/cache/hit_rate") == 0.75
+    assert stats.get_value("dns/lookup/count") == 100
+    assert stats.get_value("dns/lookup/time/p50") == pytest.approx(0.5, rel=0.02)
+    assert stats.get_value("dns/lookup/time/p99") == pytest.approx(0.99, rel=0.02)
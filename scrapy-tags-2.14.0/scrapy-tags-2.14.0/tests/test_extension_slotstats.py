@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from scrapy import Request
+from scrapy.exceptions import NotConfigured
+from scrapy.extensions.slotstats import QuantileSketch, SlotStats
+from scrapy.http import Response
+from scrapy.utils.spider import DefaultSpider
+from scrapy.utils.test import get_crawler
+
+
+def test_disabled():
+    crawler = get_crawler()
+    with pytest.raises(NotConfigured):
+        SlotStats.from_crawler(crawler)
+
+
+@pytest.mark.parametrize("q", [0.0, 0.5, 0.95, 0.99, 1.0])
+def test_quantile_sketch_accuracy(q):
+    rng = random.Random(q)
+    values = [rng.lognormvariate(0, 2) for _ in range(10000)]
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    expected = sorted(values)[int(q * (len(values) - 1))]
+    assert sketch.quantile(q) == pytest.approx(expected, rel=0.011)
+    assert sketch.count == len(values)
+
+
+def test_quantile_sketch_bounded():
+    sketch = QuantileSketch(max_buckets=10)
+    for i in range(1, 1000):
+        sketch.add(float(i))
+    assert len(sketch._buckets) <= 10
+    assert sketch.quantile(1.0) == pytest.approx(999, rel=0.011)
+
+
+def test_quantile_sketch_empty_and_zero():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) is None
+    sketch.add(0)
+    sketch.add(0)
+    sketch.add(10)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == pytest.approx(10, rel=0.011)
+
+
+def _response(ext, slot, latency, status=200, body=b""):
+    meta = {"download_slot": slot, "download_latency": latency}
+    request = Request(f"https://{slot}", meta=meta)
+    response = Response(request.url, status=status, body=body)
+    ext.response_downloaded(response, request, DefaultSpider())
+
+
+def test_stats():
+    crawler = get_crawler(settings_dict={"SLOTSTATS_ENABLED": True})
+    ext = SlotStats.from_crawler(crawler)
+    for i in range(100):
+        _response(ext, "a", 0.1 * (i + 1), body=b"a" * i)
+    _response(ext, "a", 1.0, status=404)
+    _response(ext, "b", 0.1, status=301)
+    ext.spider_closed(DefaultSpider(), "finished")
+
+    stats = crawler.stats
+    assert stats.get_value("slotstats/a/response_count") == 101
+    assert stats.get_value("slotstats/a/status/2xx") == 100
+    assert stats.get_value("slotstats/a/status/4xx") == 1
+    assert stats.get_value("slotstats/a/latency/p50") == pytest.approx(5.0, rel=0.02)
+    assert stats.get_value("slotstats/a/latency/p99") == pytest.approx(9.9, rel=0.02)
+    assert stats.get_value("slotstats/a/response_bytes/p95") == pytest.approx(
+        94, rel=0.02
+    )
+    assert stats.get_value("slotstats/b/status/3xx") == 1
+
+
+def test_top_slots():
+    crawler = get_crawler(
+        settings_dict={"SLOTSTATS_ENABLED": True, "SLOTSTATS_TOP_SLOTS": 1}
+    )
+    ext = SlotStats.from_crawler(crawler)
+    _response(ext, "fast", 0.1)
+    _response(ext, "slow", 2.0)
+    assert list(ext.slot_stats()) == ["slow"]
+    ext.log()
+    # Stats are only written when the spider closes.
+    assert crawler.stats.get_value("slotstats/slow/response_count") is None
+
+    _response(ext, "fast", 10.0)
+    _response(ext, "fast", 10.0)
+    ext.spider_closed(DefaultSpider(), "finished")
+    assert crawler.stats.get_value("slotstats/fast/response_count") == 3
+    assert crawler.stats.get_value("slotstats/slow/response_count") is None
+
+
+def test_max_slots():
+    crawler = get_crawler(
+        settings_dict={"SLOTSTATS_ENABLED": True, "SLOTSTATS_MAX_SLOTS": 2}
+    )
+    ext = SlotStats.from_crawler(crawler)
+    _response(ext, "a", 0.1)
+    _response(ext, "b", 0.1)
+    _response(ext, "a", 0.1)
+    _response(ext, "c", 0.1)
+    assert list(ext.slots) == ["a", "c"]
@@ -4,6 +4,7 @@ from unittest.mock import Mock
 import pytest
 
 from scrapy import Request, Spider
+from scrapy.core.downloader import Slot
 from scrapy.exceptions import NotConfigured
 from scrapy.extensions.throttle import AutoThrottle
 from scrapy.http.response import Response
@@ -343,3 +344,112 @@ def test_debug_disabled(caplog):
         at._response_downloaded(response, request, spider)
 
     assert caplog.record_tuples == []
+
+
+def _adjust_concurrency_setup(settings=None):
+    settings = {"AUTOTHROTTLE_ADJUST_CONCURRENCY": True, **(settings or {})}
+    crawler = get_crawler(settings)
+    at = build_from_crawler(AutoThrottle, crawler)
+    spider = DefaultSpider()
+    at._spider_opened(spider)
+    crawler.engine = Mock()
+    crawler.engine.downloader = Mock()
+    slot = Slot(concurrency=4, delay=0.0, randomize_delay=False)
+    crawler.engine.downloader.slots = {"foo": slot}
+    return at, spider, slot
+
+
+def _download(at, spider, latency=1.0, status=200):
+    meta = {"download_latency": latency, "download_slot": "foo"}
+    request = Request("https://example.com", meta=meta)
+    response = Response(request.url, status=status)
+    at._response_downloaded(response, request, spider)
+    at._request_left_downloader(request, spider)
+
+
+def test_concurrency_additive_increase():
+    at, spider, slot = _adjust_concurrency_setup()
+    for _ in range(3):
+        _download(at, spider)
+    assert slot.concurrency == 4
+    _download(at, spider)
+    assert slot.concurrency == 5
+    # Latency above twice the lowest latency seen does not count as healthy.
+    for _ in range(5):
+        _download(at, spider, latency=3.0)
+    assert slot.concurrency == 5
+
+
+def test_concurrency_max():
+    at, spider, slot = _adjust_concurrency_setup({"AUTOTHROTTLE_MAX_CONCURRENCY": 5})
+    for _ in range(20):
+        _download(at, spider)
+    assert slot.concurrency == 5
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_concurrency_multiplicative_decrease(status):
+    at, spider, slot = _adjust_concurrency_setup()
+    _download(at, spider, status=status)
+    assert slot.concurrency == 2
+    # Errors within the same round trip only decrease concurrency once.
+    _download(at, spider, status=status)
+    assert slot.concurrency == 2
+    at._slot_states[slot].decreased_at = float("-inf")
+    _download(at, spider, status=status)
+    assert slot.concurrency == 1
+    at._slot_states[slot].decreased_at = float("-inf")
+    _download(at, spider, status=status)
+    assert slot.concurrency == 1
+
+
+def test_concurrency_decrease_on_failure():
+    at, spider, slot = _adjust_concurrency_setup()
+    meta = {"download_slot": "foo"}
+    request = Request("https://example.com", meta=meta)
+    at._request_left_downloader(request, spider)
+    assert slot.concurrency == 2
+
+
+def _fail(at, spider, timeout=UNSET):
+    meta = {"download_slot": "foo"}
+    if timeout is not UNSET:
+        meta["download_timeout"] = timeout
+    request = Request("https://example.com", meta=meta)
+    at._request_left_downloader(request, spider)
+
+
+@pytest.mark.parametrize("latency", [None, 1.0])
+def test_concurrency_decrease_on_consecutive_timeouts(latency):
+    at, spider, slot = _adjust_concurrency_setup()
+    slot.concurrency = 16
+    if latency is not None:
+        _download(at, spider, latency=latency)
+        assert slot.concurrency == 16
+    # Timeouts of requests sent in parallel only decrease concurrency once.
+    for _ in range(5):
+        _fail(at, spider)
+    assert slot.concurrency == 8
+    # Until the latest latency or, without one, the timeout has passed.
+    state = at._slot_states[slot]
+    state.decreased_at -= latency or at.download_timeout
+    for _ in range(5):
+        _fail(at, spider)
+    assert slot.concurrency == 4
+
+
+def test_concurrency_decrease_on_timeout_meta():
+    at, spider, slot = _adjust_concurrency_setup()
+    _fail(at, spider, timeout=10.0)
+    assert slot.concurrency == 2
+    at._slot_states[slot].decreased_at -= 10.0
+    _fail(at, spider, timeout=10.0)
+    assert slot.concurrency == 1
+
+
+def test_concurrency_target_delay():
+    at, spider, slot = _adjust_concurrency_setup()
+    slot.delay = 1.0
+    _download(at, spider, latency=2.0)
+    # The target delay is latency / slot concurrency.
+    assert slot.delay == 0.75
@@ -0,0 +1,136 @@
+import gc
+import gzip
+from unittest import mock
+
+import pytest
+
+from scrapy.http import HtmlResponse, Response, StreamingResponse
+from scrapy.http.response.stream import ResponseBodyStream
+from scrapy.utils._compression import _DecompressionMaxSizeExceeded, _GzipDecompressor
+from scrapy.utils.defer import deferred_f_from_coro_f
+
+
+class TestResponseBodyStream:
+    @deferred_f_from_coro_f
+    async def test_read(self):
+        stream = ResponseBodyStream()
+        stream._feed(b"foo")
+        stream._feed(b"bar")
+        stream._finish()
+        assert [chunk async for chunk in stream] == [b"foo", b"bar"]
+        assert await stream.read() == b""
+
+    @deferred_f_from_coro_f
+    async def test_wait(self):
+        from twisted.internet import reactor
+
+        stream = ResponseBodyStream()
+        reactor.callLater(0, stream._feed, b"foo")
+        reactor.callLater(0, stream._finish)
+        assert await stream.read() == b"foo"
+
+    @deferred_f_from_coro_f
+    async def test_error(self):
+        stream = ResponseBodyStream()
+        stream._feed(b"foo")
+        stream._finish(ValueError("lost"))
+        assert await stream.__anext__() == b"foo"
+        with pytest.raises(ValueError, match="lost"):
+            await stream.__anext__()
+
+    @deferred_f_from_coro_f
+    async def test_pause_resume(self):
+        pause, resume = mock.Mock(), mock.Mock()
+        stream = ResponseBodyStream(pause=pause, resume=resume, max_buffer_size=4)
+        stream._feed(b"abc")
+        pause.assert_not_called()
+        stream._feed(b"def")
+        pause.assert_called_once_with()
+        stream._feed(b"ghi")
+        pause.assert_called_once_with()
+        assert await stream.__anext__() == b"abc"
+        resume.assert_not_called()
+        assert await stream.__anext__() == b"def"
+        resume.assert_not_called()
+        assert await stream.__anext__() == b"ghi"
+        resume.assert_called_once_with()
+
+    @deferred_f_from_coro_f
+    async def test_close(self):
+        cancel = mock.Mock()
+        stream = ResponseBodyStream(cancel=cancel)
+        stream._feed(b"foo")
+        stream.close()
+        cancel.assert_called_once_with()
+        assert await stream.read() == b""
+        stream._feed(b"bar")
+        assert await stream.read() == b""
+
+    def test_close_finished(self):
+        cancel = mock.Mock()
+        stream = ResponseBodyStream(cancel=cancel)
+        stream._finish()
+        stream.close()
+        cancel.assert_not_called()
+
+    def test_garbage_collected(self):
+        cancel = mock.Mock()
+        stream = ResponseBodyStream(cancel=cancel)
+        del stream
+        gc.collect()
+        cancel.assert_called_once_with()
+
+    @deferred_f_from_coro_f
+    async def test_decompressor(self):
+        body = gzip.compress(b"foo" * 1000)
+        stream = ResponseBodyStream()
+        stream._add_decompressor(_GzipDecompressor())
+        stream._feed(body[:10])
+        stream._feed(body[10:])
+        stream._finish()
+        assert await stream.read() == b"foo" * 1000
+
+    @deferred_f_from_coro_f
+    async def test_decompressor_max_size(self):
+        cancel = mock.Mock()
+        stream = ResponseBodyStream(cancel=cancel)
+        stream._add_decompressor(_GzipDecompressor(max_size=100))
+        stream._feed(gzip.compress(b"foo" * 1000))
+        with pytest.raises(_DecompressionMaxSizeExceeded):
+            await stream.read()
+        cancel.assert_called_once_with()
+
+
+class TestStreamingResponse:
+    def test_replace(self):
+        stream = ResponseBodyStream()
+        response = StreamingResponse("https://example.com", stream=stream)
+        assert response.body == b""
+        assert response.replace(status=404).stream is stream
+
+    @deferred_f_from_coro_f
+    async def test_read(self):
+        stream = ResponseBodyStream()
+        response = StreamingResponse(
+            "https://example.com",
+            headers={"Content-Type": "text/html"},
+            stream=stream,
+            flags=["foo"],
+        )
+        stream._feed(b"<html></html>")
+        stream._finish()
+        full_response = await response.read()
+        assert type(full_response) is HtmlResponse
+        assert full_response.body == b"<html></html>"
+        assert full_response.flags == ["foo"]
+        assert full_response.url == response.url
+
+    @deferred_f_from_coro_f
+    async def test_read_binary(self):
+        stream = ResponseBodyStream()
+        response = StreamingResponse("https://example.com/file", stream=stream)
+        stream._feed(b"\x00\x01")
+        stream._finish()
+        full_response = await response.read()
+        assert type(full_response) is Response
+        assert full_response.body == b"\x00\x01"
@@ -1,4 +1,5 @@
 import dataclasses
+import hashlib
 import os
 import random
 import time
@@ -22,15 +23,18 @@ from itemadapter import ItemAdapter
 from twisted.internet.defer import inlineCallbacks
 
 from scrapy.exceptions import NotConfigured
-from scrapy.http import Request, Response
+from scrapy.http import Request, Response, StreamingResponse
+from scrapy.http.response.stream import ResponseBodyStream
 from scrapy.item import Field, Item
 from scrapy.pipelines.files import (
+    FileException,
     FilesPipeline,
     FSFilesStore,
     FTPFilesStore,
     GCSFilesStore,
     S3FilesStore,
 )
+from scrapy.pipelines.media import MediaPipeline
 from scrapy.settings import Settings
 from scrapy.utils.defer import deferred_f_from_coro_f
 from scrapy.utils.spider import DefaultSpider
@@ -267,6 +271,75 @@ class TestFilesPipeline:
         request = Request("http://example.com")
         assert file_path(request, item=item) == "full/path-to-store-file"
 
+    @staticmethod
+    def _streaming_response(url, body, status=200):
+        stream = ResponseBodyStream()
+        stream._feed(body)
+        stream._finish()
+        return StreamingResponse(url, status=status, stream=stream)
+
+    @deferred_f_from_coro_f
+    async def test_media_streamed(self):
+        request = Request("http://example.com/file.pdf")
+        response = self._streaming_response(request.url, b"foo" * 1000)
+        info = MediaPipeline.SpiderInfo(self.pipeline.crawler.spider)
+        result = await self.pipeline.media_streamed(response, request, info)
+        assert result["checksum"] == hashlib.md5(b"foo" * 1000).hexdigest()
+        assert result["status"] == "downloaded"
+        path = Path(self.tempdir, result["path"])
+        assert path.read_bytes() == b"foo" * 1000  # noqa: ASYNC240
+
+    @deferred_f_from_coro_f
+    async def test_media_streamed_empty(self):
+        request = Request("http://example.com/file.pdf")
+        response = self._streaming_response(request.url, b"")
+        info = MediaPipeline.SpiderInfo(self.pipeline.crawler.spider)
+        with pytest.raises(FileException, match="empty-content"):
+            await self.pipeline.media_streamed(response, request, info)
+
+    @deferred_f_from_coro_f
+    async def test_media_streamed_overridden(self):
+        class CustomFilesPipeline(FilesPipeline):
+            def file_downloaded(self, response, request, info, *, item=None):
+                assert not isinstance(response, StreamingResponse)
+                return "custom"
+
+        pipeline = CustomFilesPipeline.from_crawler(self.pipeline.crawler)
+        request = Request("http://example.com/file.pdf")
+        response = self._streaming_response(request.url, b"foo")
+        info = MediaPipeline.SpiderInfo(self.pipeline.crawler.spider)
+        result = await pipeline.media_streamed(response, request, info)
+        assert result["checksum"] == "custom"
+
+    def test_files_stream_setting(self):
+        request = Request("http://example.com/file.pdf")
+        self.pipeline._modify_media_request(request)
+        assert "download_stream" not in request.meta
+
+        crawler = get_crawler(None, {"FILES_STORE": self.tempdir, "FILES_STREAM": True})
+        pipeline = FilesPipeline.from_crawler(crawler)
+        request = Request("http://example.com/file.pdf")
+        pipeline._modify_media_request(request)
+        assert request.meta["download_stream"] is True
+
+        class CustomFilesPipeline(FilesPipeline):
+            def file_downloaded(self, response, request, info, *, item=None):
+                return "custom"
+
+        pipeline = CustomFilesPipeline.from_crawler(crawler)
+        request = Request("http://example.com/file.pdf")
+        pipeline._modify_media_request(request)
+        assert "download_stream" not in request.meta
+
+        class CustomPathFilesPipeline(FilesPipeline):
+            def file_path(self, request, response=None, info=None, *, item=None):
+                return "custom"
+
+        pipeline = CustomPathFilesPipeline.from_crawler(crawler)
+        request = Request("http://example.com/file.pdf")
+        pipeline._modify_media_request(request)
+        assert "download_stream" not in request.meta
+
     @pytest.mark.parametrize(
         "bad_type",
         [
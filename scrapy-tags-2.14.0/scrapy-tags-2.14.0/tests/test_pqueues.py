@@ -1,12 +1,19 @@
+import random
 import tempfile
 
 import pytest
 import queuelib
 
+from scrapy import signals
 from scrapy.http.request import Request
-from scrapy.pqueues import DownloaderAwarePriorityQueue, ScrapyPriorityQueue
+from scrapy.pqueues import (
+    DownloaderAwarePriorityQueue,
+    HeapPriorityQueue,
+    ScrapyPriorityQueue,
+    SQLitePriorityQueue,
+)
 from scrapy.spiders import Spider
-from scrapy.squeues import FifoMemoryQueue
+from scrapy.squeues import FifoMemoryQueue, PickleFifoDiskQueue, PickleLifoDiskQueue
 from scrapy.utils.misc import build_from_crawler, load_object
 from scrapy.utils.test import get_crawler
 from tests.test_scheduler import MockDownloader, MockEngine
@@ -95,9 +102,181 @@ class TestPriorityQueue:
         assert set(queue.close()) == {-1, -2}
 
 
+class TestHeapPriorityQueue:
+    def setup_method(self):
+        self.crawler = get_crawler(Spider)
+
+    def test_queue_push_pop_priorities(self):
+        queue = HeapPriorityQueue.from_crawler(
+            self.crawler, FifoMemoryQueue, "", [-1, -2, -3]
+        )
+        assert queue.pop() is None
+        assert len(queue) == 0
+        req1 = Request("https://example.org/1", priority=1)
+        req2 = Request("https://example.org/2", priority=2)
+        req3 = Request("https://example.org/3", priority=3)
+        queue.push(req1)
+        queue.push(req2)
+        queue.push(req3)
+        assert len(queue) == 3
+        dequeued = queue.pop()
+        assert len(queue) == 2
+        assert dequeued.url == req3.url
+        assert dequeued.priority == req3.priority
+        assert set(queue.close()) == {-1, -2}
+
+    def test_peek(self):
+        if not hasattr(queuelib.queue.FifoMemoryQueue, "peek"):
+            pytest.skip("queuelib.queue.FifoMemoryQueue.peek is undefined")
+        queue = HeapPriorityQueue.from_crawler(self.crawler, FifoMemoryQueue, "")
+        assert queue.peek() is None
+        queue.push(Request("https://example.org/1", priority=1))
+        queue.push(Request("https://example.org/2", priority=2))
+        assert queue.peek().url == "https://example.org/2"
+        assert queue.pop().url == "https://example.org/2"
+        assert queue.peek().url == "https://example.org/1"
+        assert queue.pop().url == "https://example.org/1"
+        assert queue.peek() is None
+
+    def test_same_order_as_scrapy_priority_queue(self):
+        rng = random.Random(0)
+        queues = [
+            build_from_crawler(
+                pq_cls,
+                self.crawler,
+                downstream_queue_cls=FifoMemoryQueue,
+                key="",
+                start_queue_cls=FifoMemoryQueue,
+            )
+            for pq_cls in (ScrapyPriorityQueue, HeapPriorityQueue)
+        ]
+        outputs = [[], []]
+        for i in range(2000):
+            if rng.random() < 0.6:
+                meta = {"is_start_request": True} if rng.random() < 0.2 else {}
+                request = Request(
+                    f"https://example.org/{i}",
+                    priority=rng.randint(-50, 50),
+                    meta=meta,
+                )
+                for queue in queues:
+                    queue.push(request)
+            else:
+                for queue, output in zip(queues, outputs, strict=True):
+                    output.append(queue.pop())
+        for queue, output in zip(queues, outputs, strict=True):
+            while queue:
+                output.append(queue.pop())
+        assert outputs[0] == outputs[1]
+        assert len(queues[1]) == 0
+        assert queues[1].curprio is None
+
+    def test_startprios(self):
+        queue = HeapPriorityQueue.from_crawler(
+            self.crawler, FifoMemoryQueue, "", [-1, -2, -3]
+        )
+        assert queue.curprio is None
+        queue.push(Request("https://example.org/1", priority=1))
+        queue.push(Request("https://example.org/2", priority=2))
+        assert queue.pop().priority == 2
+        assert queue.pop().priority == 1
+        assert queue.pop() is None
+
+
+class TestSQLitePriorityQueue:
+    def setup_method(self):
+        self.crawler = get_crawler(Spider, {"SCHEDULER_DISK_QUEUE_BATCH_SIZE": 2})
+        self.crawler.spider = self.crawler._create_spider("foo")
+
+    def test_memory_queue(self):
+        queue = SQLitePriorityQueue.from_crawler(self.crawler, FifoMemoryQueue, "")
+        assert isinstance(queue, ScrapyPriorityQueue)
+
+    def test_push_pop_priorities(self, tmp_path):
+        key = str(tmp_path / "requests.queue")
+        queue = SQLitePriorityQueue.from_crawler(self.crawler, PickleFifoDiskQueue, key)
+        assert queue.pop() is None
+        assert queue.peek() is None
+        for priority in (1, 3, 2, 3):
+            queue.push(
+                Request(
+                    f"https://example.org/{priority}",
+                    priority=priority,
+                    callback=self.crawler.spider.parse,
+                )
+            )
+        assert len(queue) == 4
+        assert queue.peek().url == "https://example.org/3"
+        dequeued = queue.pop()
+        assert dequeued.url == "https://example.org/3"
+        assert dequeued.priority == 3
+        assert dequeued.callback == self.crawler.spider.parse
+        assert len(queue) == 3
+        assert sorted(queue.close()) == [-3, -2, -1]
+        assert list((tmp_path / "requests.queue").iterdir()) == [
+            tmp_path / "requests.queue" / "requests.sqlite"
+        ]
+
+        queue = SQLitePriorityQueue.from_crawler(self.crawler, PickleFifoDiskQueue, key)
+        assert len(queue) == 3
+        assert [queue.pop().priority for _ in range(3)] == [3, 2, 1]
+        assert queue.pop() is None
+        assert queue.close() == []
+        assert not list((tmp_path / "requests.queue").iterdir())
+
+    def test_same_order_as_scrapy_priority_queue(self, tmp_path):
+        rng = random.Random(0)
+        settings = self.crawler.settings
+        queues = [
+            build_from_crawler(
+                ScrapyPriorityQueue,
+                self.crawler,
+                downstream_queue_cls=load_object(settings["SCHEDULER_MEMORY_QUEUE"]),
+                key="",
+                start_queue_cls=load_object(settings["SCHEDULER_START_MEMORY_QUEUE"]),
+            ),
+            build_from_crawler(
+                SQLitePriorityQueue,
+                self.crawler,
+                downstream_queue_cls=load_object(settings["SCHEDULER_DISK_QUEUE"]),
+                key=str(tmp_path),
+                start_queue_cls=load_object(settings["SCHEDULER_START_DISK_QUEUE"]),
+            ),
+        ]
+        outputs = [[], []]
+        for i in range(500):
+            if rng.random() < 0.6:
+                meta = {"is_start_request": True} if rng.random() < 0.2 else {}
+                request = Request(
+                    f"https://example.org/{i}",
+                    priority=rng.randint(-5, 5),
+                    meta=meta,
+                )
+                for queue in queues:
+                    queue.push(request)
+            else:
+                for queue, output in zip(queues, outputs, strict=True):
+                    request = queue.pop()
+                    output.append(request and request.url)
+        for queue, output in zip(queues, outputs, strict=True):
+            while queue:
+                output.append(queue.pop().url)
+            queue.close()
+        assert outputs[0] == outputs[1]
+
+    def test_unserializable(self, tmp_path):
+        queue = SQLitePriorityQueue.from_crawler(
+            self.crawler, PickleLifoDiskQueue, str(tmp_path)
+        )
+        with pytest.raises(ValueError, match=r"Can't (get|pickle) local object"):
+            queue.push(Request("https://example.org", meta={"f": lambda _: None}))
+        assert len(queue) == 0
+        queue.close()
+
+
 class TestDownloaderAwarePriorityQueue:
     def setup_method(self):
-        crawler = get_crawler(Spider)
+        self.crawler = crawler = get_crawler(Spider)
         crawler.engine = MockEngine(downloader=MockDownloader())
         self.queue = DownloaderAwarePriorityQueue.from_crawler(
             crawler=crawler,
@@ -126,6 +305,79 @@ class TestDownloaderAwarePriorityQueue:
         assert len(self.queue) == 0
         assert self.queue.pop() is None
 
+    def test_active_downloads(self):
+        def send(signal, url):
+            self.crawler.signals.send_catch_log(
+                signal=signal, request=Request(url), spider=None
+            )
+
+        for host in ("a", "b", "c"):
+            for i in range(2):
+                self.queue.push(Request(f"http://{host}.example/{i}"))
+        send(signals.request_reached_downloader, "http://a.example/x")
+        send(signals.request_reached_downloader, "http://a.example/y")
+        send(signals.request_reached_downloader, "http://b.example/x")
+        # Unknown slots are tracked as well, for when requests reach the queue
+        send(signals.request_reached_downloader, "http://d.example/x")
+        assert self.queue.peek().url == "http://c.example/0"
+        assert self.queue.pop().url == "http://c.example/0"
+        send(signals.request_reached_downloader, "http://c.example/0")
+        send(signals.request_reached_downloader, "http://c.example/x")
+        assert self.queue.pop().url == "http://b.example/0"
+        send(signals.request_left_downloader, "http://a.example/x")
+        send(signals.request_left_downloader, "http://a.example/y")
+        assert self.queue.pop().url == "http://a.example/0"
+        assert self.queue.pop().url == "http://a.example/1"
+        assert self.queue.pop().url == "http://b.example/1"
+        self.queue.push(Request("http://d.example/0"))
+        assert self.queue.pop().url == "http://d.example/0"
+        assert self.queue.pop().url == "http://c.example/1"
+        assert self.queue.pop() is None
+
+    def test_initial_active_downloads(self):
+        self.queue.close()
+        downloader = MockDownloader()
+        downloader.increment("a.example")
+        self.crawler.engine = MockEngine(downloader=downloader)
+        self.queue = DownloaderAwarePriorityQueue.from_crawler(
+            crawler=self.crawler,
+            downstream_queue_cls=FifoMemoryQueue,
+            key="foo/bar",
+        )
+        assert self.queue._active_downloads == {"a.example": 1}
+        self.queue.push(Request("http://a.example/"))
+        self.queue.push(Request("http://b.example/"))
+        assert self.queue.pop().url == "http://b.example/"
+
+    def test_close_disconnects_signals(self):
+        self.queue.close()
+        self.crawler.signals.send_catch_log(
+            signal=signals.request_reached_downloader,
+            request=Request("http://a.example/"),
+            spider=None,
+        )
+        assert self.queue._active_downloads == {}
+        self.queue = DownloaderAwarePriorityQueue.from_crawler(
+            crawler=self.crawler,
+            downstream_queue_cls=FifoMemoryQueue,
+            key="foo/bar",
+        )
+
+    def test_many_slots(self):
+        for i in range(1000):
+            self.queue.push(Request(f"http://{i}.example/"))
+        for i in range(0, 1000, 2):
+            self.crawler.signals.send_catch_log(
+                signal=signals.request_reached_downloader,
+                request=Request(f"http://{i}.example/"),
+                spider=None,
+            )
+        urls = [self.queue.pop().url for _ in range(1000)]
+        assert len(set(urls[:500])) == 500
+        assert all(int(url[7:].split(".")[0]) % 2 for url in urls[:500])
+        assert self.queue.pop() is None
+        assert len(self.queue._slot_heap) <= 2 * len(self.queue.pqueues) + 65
+
     def test_no_peek_raises(self):
         if hasattr(queuelib.queue.FifoMemoryQueue, "peek"):
             pytest.skip("queuelib.queue.FifoMemoryQueue.peek is defined")
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+from unittest import mock
+
+import pytest
+from twisted.internet import defer
+from twisted.internet.error import DNSLookupError
+from twisted.internet.task import Clock
+from twisted.names import dns
+from twisted.names.error import DNSNameError, DNSQueryTimeoutError
+
+from scrapy.resolver import CachingDNSResolver, _get_query_timeouts
+from scrapy.utils.datatypes import LocalCache
+
+
+def _a(name, address, ttl):
+    return dns.RRHeader(name, type=dns.A, ttl=ttl, payload=dns.Record_A(address))
+
+
+def _cname(name, target, ttl):
+    return dns.RRHeader(name, type=dns.CNAME, ttl=ttl, payload=dns.Record_CNAME(target))
+
+
+class FakeResolver:
+    def __init__(self):
+        self.queries = []
+        self.results = {}
+
+    def lookupAddress(self, name, timeout=None):
+        d = defer.Deferred()
+        self.queries.append((name, d))
+        if name in self.results:
+            result = self.results[name]
+            if isinstance(result, Exception):
+                d.errback(result)
+            else:
+                d.callback((result, [], []))
+        return d
+
+
+@pytest.fixture(autouse=True)
+def dnscache():
+    with mock.patch("scrapy.resolver.dnscache", LocalCache()) as cache:
+        yield cache
+
+
+def _get_resolver(cache_size=100, negative_ttl=60):
+    clock = Clock()
+    fake = FakeResolver()
+    resolver = CachingDNSResolver(clock, cache_size, 60, negative_ttl, fake)
+    stats = []
+    resolver.add_stats_listener(lambda name, value: stats.append((name, value)))
+    return resolver, fake, clock, stats
+
+
+def _result(d):
+    results = []
+    d.addBoth(results.append)
+    assert results
+    return results[0]
+
+
+@pytest.mark.parametrize(
+    ("timeout", "expected"),
+    [
+        (60, (1, 3, 11, 45)),
+        (5, (1, 3, 1)),
+        (1, (1,)),
+        (0.5, (0.5,)),
+    ],
+)
+def test_get_query_timeouts(timeout, expected):
+    assert _get_query_timeouts(timeout) == expected
+
+
+def test_ttl():
+    resolver, fake, clock, stats = _get_resolver()
+    fake.results["example.com"] = [_a(b"example.com", "1.2.3.4", 30)]
+    assert _result(resolver.getHostByName("example.com")) == "1.2.3.4"
+    clock.advance(29)
+    assert _result(resolver.getHostByName("example.com")) == "1.2.3.4"
+    assert len(fake.queries) == 1
+    clock.advance(1)
+    assert _result(resolver.getHostByName("example.com")) == "1.2.3.4"
+    assert len(fake.queries) == 2
+    assert [name for name, _ in stats] == [
+        "cache/miss",
+        "lookup/time",
+        "cache/hit",
+        "cache/miss",
+        "lookup/time",
+    ]
+
+
+def test_cname():
+    resolver, fake, _, _ = _get_resolver()
+    fake.results["www.example.com"] = [_cname(b"www.example.com", b"example.com", 10)]
+    fake.results["example.com"] = [_a(b"example.com", "1.2.3.4", 300)]
+    assert _result(resolver.getHostByName("www.example.com")) == "1.2.3.4"
+    assert resolver.cache["www.example.com"] == ("1.2.3.4", 10)
+
+
+def test_ip_address():
+    resolver, fake, _, stats = _get_resolver()
+    assert _result(resolver.getHostByName("127.0.0.1")) == "127.0.0.1"
+    assert not fake.queries
+    assert not stats
+
+
+def test_negative():
+    resolver, fake, clock, stats = _get_resolver(negative_ttl=10)
+    fake.results["missing.example"] = DNSNameError()
+    failure = _result(resolver.getHostByName("missing.example"))
+    assert failure.check(DNSLookupError)
+    failure = _result(resolver.getHostByName("missing.example"))
+    assert failure.check(DNSLookupError)
+    assert len(fake.queries) == 1
+    clock.advance(10)
+    _result(resolver.getHostByName("missing.example")).trap(DNSLookupError)
+    assert len(fake.queries) == 2
+    assert ("cache/negative_hit", 1) in stats
+    assert stats.count(("lookup/error", 1)) == 2
+
+
+def test_no_address():
+    resolver, fake, _, _ = _get_resolver()
+    fake.results["example.com"] = []
+    _result(resolver.getHostByName("example.com")).trap(DNSLookupError)
+    assert resolver.cache["example.com"][0] is None
+
+
+def test_timeout_not_cached():
+    resolver, fake, _, _ = _get_resolver()
+    fake.results["example.com"] = DNSQueryTimeoutError("example.com")
+    _result(resolver.getHostByName("example.com")).trap(DNSLookupError)
+    assert "example.com" not in resolver.cache
+
+
+def test_cache_disabled():
+    resolver, fake, _, _ = _get_resolver(cache_size=0)
+    fake.results["example.com"] = [_a(b"example.com", "1.2.3.4", 30)]
+    assert _result(resolver.getHostByName("example.com")) == "1.2.3.4"
+    assert _result(resolver.getHostByName("example.com")) == "1.2.3.4"
+    assert len(fake.queries) == 2
+
+
+@pytest.mark.parametrize("cache_size", [0, 100])
+def test_dnscache(dnscache, cache_size):
+    resolver, fake, _, _ = _get_resolver(cache_size=cache_size)
+    fake.results["example.com"] = [_a(b"example.com", "1.2.3.4", 0)]
+    assert _result(resolver.getHostByName("example.com")) == "1.2.3.4"
+    # Used for download slot keys even if the TTL is too short to cache it.
+    if cache_size:
+        assert dnscache["example.com"] == "1.2.3.4"
+    else:
+        assert "example.com" not in dnscache
+
+
+def test_concurrent_lookups():
+    resolver, fake, _, _ = _get_resolver()
+    d1 = resolver.getHostByName("example.com")
+    d2 = resolver.getHostByName("example.com")
+    assert len(fake.queries) == 1
+    fake.queries[0][1].callback(([_a(b"example.com", "1.2.3.4", 30)], [], []))
+    assert _result(d1) == _result(d2) == "1.2.3.4"
+
+
+def test_prefetch():
+    resolver, fake, _, stats = _get_resolver()
+    resolver.prefetch("example.com")
+    resolver.prefetch("example.com")
+    assert len(fake.queries) == 1
+    d = resolver.getHostByName("example.com")
+    fake.queries[0][1].callback(([_a(b"example.com", "1.2.3.4", 30)], [], []))
+    assert _result(d) == "1.2.3.4"
+    resolver.prefetch("example.com")
+    assert len(fake.queries) == 1
+    assert stats.count(("prefetch", 1)) == 1
+
+
+def test_prefetch_error():
+    resolver, fake, _, _ = _get_resolver()
+    fake.results["example.com"] = DNSQueryTimeoutError("example.com")
+    resolver.prefetch("example.com")
+    assert not resolver._pending
+
+
+def test_prefetch_cache_disabled():
+    resolver, fake, _, stats = _get_resolver(cache_size=0)
+    resolver.prefetch("example.com")
+    assert not fake.queries
+    assert not stats
+
+
+def test_prefetch_cache_full():
+    resolver, fake, _, _ = _get_resolver(cache_size=1)
+    fake.results["example.com"] = [_a(b"example.com", "1.2.3.4", 30)]
+    resolver.prefetch("example.com")
+    assert len(fake.queries) == 1
+    resolver.prefetch("example.org")
+    assert len(fake.queries) == 1
+
+
+def test_prefetch_limit():
+    resolver, fake, _, _ = _get_resolver()
+    with mock.patch("scrapy.resolver._MAX_PREFETCHES", 2):
+        for name in ("a.example", "b.example", "c.example"):
+            resolver.prefetch(name)
+        assert [name for name, _ in fake.queries] == ["a.example", "b.example"]
+        fake.queries[0][1].callback(([_a(b"a.example", "1.2.3.4", 30)], [], []))
+        resolver.prefetch("c.example")
+        assert len(fake.queries) == 3
+        # Lookups that are not prefetches are not limited.
+        resolver.getHostByName("d.example")
+        assert len(fake.queries) == 4
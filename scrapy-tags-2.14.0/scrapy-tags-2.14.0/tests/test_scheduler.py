@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 import shutil
+import subprocess
+import sys
 import tempfile
 import warnings
 from abc import ABC, abstractmethod
 from collections import deque
+from pathlib import Path
 from typing import Any, NamedTuple
 
 import pytest
 from twisted.internet.defer import inlineCallbacks
 
+from scrapy import signals
 from scrapy.core.downloader import Downloader
 from scrapy.core.scheduler import BaseScheduler, Scheduler
 from scrapy.crawler import Crawler
@@ -63,8 +67,9 @@ class MockSlot(NamedTuple):
 
 
 class MockDownloader:
-    def __init__(self):
+    def __init__(self, signals=None):
         self.slots = {}
+        self.signals = signals
 
     def get_slot_key(self, request):
         if Downloader.DOWNLOAD_SLOT in request.meta:
@@ -75,17 +80,25 @@ class MockDownloader:
     def increment(self, slot_key):
         slot = self.slots.setdefault(slot_key, MockSlot(active=[]))
         slot.active.append(1)
+        self._send_signal(signals.request_reached_downloader, slot_key)
 
     def decrement(self, slot_key):
         slot = self.slots.get(slot_key)
         slot.active.pop()
+        self._send_signal(signals.request_left_downloader, slot_key)
+
+    def _send_signal(self, signal, slot_key):
+        if self.signals is None:
+            return
+        request = Request("data:,", meta={Downloader.DOWNLOAD_SLOT: slot_key})
+        self.signals.send_catch_log(signal=signal, request=request, spider=None)
 
     def close(self):
         pass
 
 
 class MockCrawler(Crawler):
-    def __init__(self, priority_queue_cls, jobdir):
+    def __init__(self, priority_queue_cls, jobdir, settings=None):
         settings = {
             "SCHEDULER_DEBUG": False,
             "SCHEDULER_DISK_QUEUE": "scrapy.squeues.PickleLifoDiskQueue",
@@ -93,14 +106,16 @@ class MockCrawler(Crawler):
             "SCHEDULER_PRIORITY_QUEUE": priority_queue_cls,
             "JOBDIR": jobdir,
             "DUPEFILTER_CLASS": "scrapy.dupefilters.BaseDupeFilter",
+            **(settings or {}),
         }
         super().__init__(Spider, settings)
-        self.engine = MockEngine(downloader=MockDownloader())
+        self.engine = MockEngine(downloader=MockDownloader(self.signals))
         self.stats = load_object(self.settings["STATS_CLASS"])(self)
 
 
 class SchedulerHandler(ABC):
     jobdir = None
+    settings: dict[str, Any] | None = None
 
     @property
     @abstractmethod
@@ -108,7 +123,9 @@ class SchedulerHandler(ABC):
         raise NotImplementedError
 
     def create_scheduler(self):
-        self.mock_crawler = MockCrawler(self.priority_queue_cls, self.jobdir)
+        self.mock_crawler = MockCrawler(
+            self.priority_queue_cls, self.jobdir, self.settings
+        )
         self.scheduler = Scheduler.from_crawler(self.mock_crawler)
         self.spider = Spider(name="spider")
         self.scheduler.open(self.spider)
@@ -225,6 +242,18 @@ class TestSchedulerInMemory(TestSchedulerInMemoryBase):
     def priority_queue_cls(self) -> str:
         return "scrapy.pqueues.ScrapyPriorityQueue"
 
+    def test_next_requests(self):
+        for url, priority in _PRIORITIES:
+            self.scheduler.enqueue_request(Request(url, priority=priority))
+
+        priorities = [r.priority for r in self.scheduler.next_requests(3)]
+        priorities += [r.priority for r in self.scheduler.next_requests(3)]
+        assert priorities == sorted([x[1] for x in _PRIORITIES], key=lambda x: -x)
+        assert self.scheduler.next_requests(3) == []
+        stats = self.mock_crawler.stats
+        assert stats.get_value("scheduler/dequeued") == len(_PRIORITIES)
+        assert stats.get_value("scheduler/dequeued/memory") == len(_PRIORITIES)
+
 
 class TestSchedulerOnDisk(TestSchedulerOnDiskBase):
     @property
@@ -232,6 +261,107 @@ class TestSchedulerOnDisk(TestSchedulerOnDiskBase):
         return "scrapy.pqueues.ScrapyPriorityQueue"
 
 
+class TestSchedulerMemoryLimitInMemory(TestSchedulerInMemoryBase):
+    settings = {"SCHEDULER_MEMORY_QUEUE_MAX_REQUESTS": 2}
+
+    @property
+    def priority_queue_cls(self) -> str:
+        return "scrapy.pqueues.ScrapyPriorityQueue"
+
+    def test_spill(self):
+        for url, priority in _PRIORITIES:
+            self.scheduler.enqueue_request(Request(url, priority=priority))
+
+        stats = self.mock_crawler.stats
+        assert len(self.scheduler.mqs) == 2
+        assert len(self.scheduler.dqs) == len(_PRIORITIES) - 2
+        assert stats.get_value("scheduler/enqueued/memory") == 2
+        assert stats.get_value("scheduler/enqueued/disk") == len(_PRIORITIES) - 2
+
+        # Memory is used again as soon as it has room.
+        self.scheduler.next_request()
+        self.scheduler.enqueue_request(Request("http://foo.com/f"))
+        assert len(self.scheduler.mqs) == 2
+
+    def test_tmp_dqdir_removed(self):
+        dqdir = self.scheduler.dqdir
+        assert dqdir
+        self.scheduler.enqueue_request(Request("http://foo.com/a"))
+        self.close_scheduler()
+        assert not Path(dqdir).exists()
+        self.create_scheduler()
+
+    def test_max_bytes(self):
+        self.close_scheduler()
+        self.settings = {"SCHEDULER_MEMORY_QUEUE_MAX_BYTES": 100}
+        self.create_scheduler()
+        self.scheduler.enqueue_request(Request("http://foo.com/a", body=b"a" * 100))
+        self.scheduler.enqueue_request(Request("http://foo.com/b"))
+        assert len(self.scheduler.mqs) == 1
+        assert len(self.scheduler.dqs) == 1
+        assert self.scheduler.next_request().url == "http://foo.com/a"
+        assert self.scheduler.next_request().url == "http://foo.com/b"
+        assert self.scheduler._mq_bytes == 0
+
+    def test_page_in(self):
+        for url in ("a", "b", "c", "d", "e"):
+            self.scheduler.enqueue_request(Request(f"http://foo.com/{url}"))
+        urls = [request.url[-1] for request in self.scheduler.next_requests(3)]
+        # The last 2 requests on disk are moved to memory at once, and
+        # read in the same order as from disk.
+        assert urls == ["b", "a", "e"]
+        assert len(self.scheduler.mqs) == 1
+        assert len(self.scheduler.dqs) == 1
+        stats = self.mock_crawler.stats
+        assert stats.get_value("scheduler/moved_to_memory") == 2
+        assert self.scheduler.next_request().url == "http://foo.com/d"
+        assert self.scheduler.next_request().url == "http://foo.com/c"
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="Uses os.kill()")
+    def test_stale_tmp_dqdir_removed(self):
+        # The PID of a process that has ended.
+        with subprocess.Popen([sys.executable, "-c", ""]) as process:
+            pass
+        stale = Path(tempfile.mkdtemp(prefix=f"scrapy-requests-{process.pid}-"))
+        self.close_scheduler()
+        self.create_scheduler()
+        assert not stale.exists()
+        assert Path(self.scheduler.dqdir).exists()
+
+    def test_downloader_aware_priority_queue(self):
+        with pytest.raises(ValueError, match="SCHEDULER_PRIORITY_QUEUE"):
+            Scheduler.from_crawler(
+                MockCrawler(
+                    "scrapy.pqueues.DownloaderAwarePriorityQueue",
+                    None,
+                    self.settings,
+                )
+            )
+
+    def test_unserializable(self):
+        for url, _ in _PRIORITIES:
+            self.scheduler.enqueue_request(Request(url, callback=lambda r: None))
+        assert len(self.scheduler.mqs) == len(_PRIORITIES)
+        assert not self.scheduler.dqs
+
+
+class TestSchedulerMemoryLimitOnDisk(TestSchedulerOnDiskBase):
+    settings = {
+        "SCHEDULER_DISK_QUEUE": "scrapy.squeues.CompactLifoDiskQueue",
+        "SCHEDULER_MEMORY_QUEUE_MAX_REQUESTS": 2,
+    }
+
+    @property
+    def priority_queue_cls(self) -> str:
+        return "scrapy.pqueues.ScrapyPriorityQueue"
+
+    def test_memory_first(self):
+        for url in _URLS:
+            self.scheduler.enqueue_request(Request(url))
+        assert len(self.scheduler.mqs) == 2
+        assert len(self.scheduler.dqs) == 1
+
+
 _URLS_WITH_SLOTS = [
     ("http://foo.com/a", "a"),
     ("http://foo.com/b", "a"),
@@ -331,6 +461,28 @@ class DownloaderAwareSchedulerTestMixin:
         assert _is_scheduling_fair([s for u, s in _URLS_WITH_SLOTS], dequeued_slots)
         assert sum(len(s.active) for s in downloader.slots.values()) == 0
 
+    def test_next_requests(self):
+        for url, slot in _URLS_WITH_SLOTS:
+            request = Request(url)
+            request.meta[Downloader.DOWNLOAD_SLOT] = slot
+            self.scheduler.enqueue_request(request)
+
+        if self.reopen:
+            self.close_scheduler()
+            self.create_scheduler()
+
+        downloader = self.mock_crawler.engine.downloader
+        for _ in range(2):
+            requests = self.scheduler.next_requests(3)
+            slots = [downloader.get_slot_key(request) for request in requests]
+            assert sorted(slots) == ["a", "b", "c"]
+            for slot in slots:
+                downloader.increment(slot)
+        assert not self.scheduler.has_pending_requests()
+        for slot in ["a", "b", "c"] * 2:
+            downloader.decrement(slot)
+        assert not self.scheduler.mqs._active_downloads
+
 
 class TestSchedulerWithDownloaderAwareInMemory(
     DownloaderAwareSchedulerTestMixin, TestSchedulerInMemoryBase
@@ -83,6 +83,28 @@ class TestBaseScheduler(InterfaceCheckMixin):
             self.scheduler.next_request()
 
 
+class TestBaseSchedulerNextRequests:
+    def test_next_requests(self):
+        class ListScheduler(BaseScheduler):
+            def __init__(self):
+                self.requests = [Request(url) for url in URLS]
+
+            def has_pending_requests(self):
+                return bool(self.requests)
+
+            def enqueue_request(self, request):
+                self.requests.append(request)
+                return True
+
+            def next_request(self):
+                return self.requests.pop(0) if self.requests else None
+
+        scheduler = ListScheduler()
+        assert [r.url for r in scheduler.next_requests(2)] == URLS[:2]
+        assert [r.url for r in scheduler.next_requests(2)] == URLS[2:]
+        assert scheduler.next_requests(2) == []
+
+
 class TestMinimalScheduler(InterfaceCheckMixin):
     def setup_method(self):
         self.scheduler = MinimalScheduler()
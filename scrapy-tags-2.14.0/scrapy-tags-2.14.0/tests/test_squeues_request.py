@@ -5,14 +5,17 @@ Queues that handle requests
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 import pytest
 import queuelib
 
-from scrapy.http import Request
+from scrapy.http import FormRequest, Request
 from scrapy.spiders import Spider
 from scrapy.squeues import (
+    CompactFifoDiskQueue,
+    CompactLifoDiskQueue,
     FifoMemoryQueue,
     LifoMemoryQueue,
     MarshalFifoDiskQueue,
@@ -165,3 +168,173 @@ class TestLifoMemoryQueueRequest(TestRequestQueueBase):
     @pytest.fixture
     def q(self, crawler):
         return LifoMemoryQueue.from_crawler(crawler=crawler)
+
+
+class TestCompactFifoDiskQueueRequest(TestRequestQueueBase):
+    is_fifo = True
+
+    @pytest.fixture
+    def q(self, crawler, tmp_path):
+        return CompactFifoDiskQueue.from_crawler(
+            crawler=crawler, key=str(tmp_path / "compact" / "fifo")
+        )
+
+
+class TestCompactLifoDiskQueueRequest(TestRequestQueueBase):
+    is_fifo = False
+
+    @pytest.fixture
+    def q(self, crawler, tmp_path):
+        return CompactLifoDiskQueue.from_crawler(
+            crawler=crawler, key=str(tmp_path / "compact" / "lifo")
+        )
+
+
+class TestCompactDiskQueue:
+    @staticmethod
+    def _crawler(**settings) -> Crawler:
+        crawler = get_crawler(Spider, settings)
+        crawler.spider = crawler._create_spider("foo")
+        return crawler
+
+    @pytest.mark.parametrize("compress", [True, False])
+    @pytest.mark.parametrize(
+        ("queue_cls", "is_fifo"),
+        [(CompactFifoDiskQueue, True), (CompactLifoDiskQueue, False)],
+    )
+    @pytest.mark.parametrize("batch_size", [1, 3, 100])
+    def test_order_across_reopen(
+        self, tmp_path, queue_cls, is_fifo, batch_size, compress
+    ):
+        crawler = self._crawler(
+            SCHEDULER_DISK_QUEUE_BATCH_SIZE=batch_size,
+            SCHEDULER_DISK_QUEUE_COMPRESSION=compress,
+        )
+        key = str(tmp_path / "q")
+        urls = [f"https://example.com/{i}" for i in range(10)]
+        expected = urls if is_fifo else [urls[6], *urls[:6:-1], *urls[5::-1]]
+        q = queue_cls.from_crawler(crawler, key)
+        for url in urls[:7]:
+            q.push(Request(url))
+        popped = [q.pop().url]
+        q.close()
+
+        q = queue_cls.from_crawler(crawler, key)
+        assert len(q) == 6
+        for url in urls[7:]:
+            q.push(Request(url))
+        assert len(q) == 9
+        while q:
+            popped.append(q.pop().url)
+        q.close()
+        assert popped == expected
+        assert not list(tmp_path.iterdir())
+
+    @pytest.mark.parametrize(
+        ("queue_cls", "is_fifo"),
+        [(CompactFifoDiskQueue, True), (CompactLifoDiskQueue, False)],
+    )
+    def test_size_without_state(self, tmp_path, queue_cls, is_fifo):
+        crawler = self._crawler(SCHEDULER_DISK_QUEUE_BATCH_SIZE=3)
+        key = str(tmp_path / "q")
+        urls = [f"https://example.com/{i}" for i in range(7)]
+        q = queue_cls.from_crawler(crawler, key)
+        for url in urls:
+            q.push(Request(url))
+        q.close()
+        Path(f"{key}.state").unlink()
+
+        q = queue_cls.from_crawler(crawler, key)
+        assert len(q) == 7
+        popped = [q.pop().url for _ in range(len(q))]
+        q.close()
+        assert popped == (urls if is_fifo else urls[::-1])
+
+    @pytest.mark.parametrize(
+        ("queue_cls", "is_fifo"),
+        [(CompactFifoDiskQueue, True), (CompactLifoDiskQueue, False)],
+    )
+    def test_tail_not_closed(self, tmp_path, queue_cls, is_fifo):
+        crawler = self._crawler(
+            JOBDIR=str(tmp_path), SCHEDULER_DISK_QUEUE_BATCH_SIZE=100
+        )
+        key = str(tmp_path / "q")
+        urls = [f"https://example.com/{i}" for i in range(4)]
+        q = queue_cls.from_crawler(crawler, key)
+        for url in urls:
+            q.push(Request(url, callback=crawler.spider.parse))
+        q.pop()
+        # Stop using the queue without closing it, as if the process died.
+        q._tail_file.close()
+        q._queue.close()
+
+        q = queue_cls.from_crawler(crawler, key)
+        assert len(q) == 3
+        popped = [q.pop() for _ in range(len(q))]
+        q.close()
+        assert [request.url for request in popped] == (
+            urls[1:] if is_fifo else urls[-2::-1]
+        )
+        assert all(request.callback == crawler.spider.parse for request in popped)
+        assert not Path(f"{key}.tail").exists()
+
+    def test_lifo_order(self, tmp_path):
+        crawler = self._crawler(SCHEDULER_DISK_QUEUE_BATCH_SIZE=2)
+        q = CompactLifoDiskQueue.from_crawler(crawler, str(tmp_path / "q"))
+        for i in range(5):
+            q.push(Request(f"https://example.com/{i}"))
+        assert q.pop().url == "https://example.com/4"
+        assert q.pop().url == "https://example.com/3"
+        assert q.pop().url == "https://example.com/2"
+        q.push(Request("https://example.com/5"))
+        q.push(Request("https://example.com/6"))
+        assert [q.pop().url for _ in range(len(q))] == [
+            "https://example.com/6",
+            "https://example.com/5",
+            "https://example.com/1",
+            "https://example.com/0",
+        ]
+        assert q.pop() is None
+        q.close()
+
+    def test_roundtrip(self, tmp_path):
+        crawler = self._crawler(SCHEDULER_DISK_QUEUE_BATCH_SIZE=2)
+        spider = crawler.spider
+        q = CompactFifoDiskQueue.from_crawler(crawler, str(tmp_path / "q"))
+        requests = [
+            Request(
+                "https://example.com/a",
+                callback=spider.parse,
+                errback=spider.parse,
+                method="POST",
+                body=b"body",
+                headers={"X-Foo": "bar"},
+                meta={"depth": 1},
+                cb_kwargs={"key": "value"},
+                priority=5,
+                dont_filter=True,
+                flags=["flag"],
+            ),
+            Request("https://example.com/b", callback=spider.parse),
+            FormRequest("https://example.com/c", method="GET"),
+        ]
+        for request in requests:
+            q.push(request)
+        q.close()
+        q = CompactFifoDiskQueue.from_crawler(crawler, str(tmp_path / "q"))
+        for request in requests:
+            result = q.pop()
+            assert type(result) is type(request)
+            assert result.to_dict(spider=spider) == request.to_dict(spider=spider)
+        q.close()
+
+    def test_unserializable(self, tmp_path):
+        crawler = self._crawler()
+        q = CompactFifoDiskQueue.from_crawler(crawler, str(tmp_path / "q"))
+        with pytest.raises(ValueError, match=r"Function .* is not an instance method"):
+            q.push(Request("https://example.com", callback=lambda _: None))
+        with pytest.raises(ValueError, match=r"Can't (get|pickle) local object"):
+            q.push(Request("https://example.com", meta={"f": lambda _: None}))
+        assert len(q) == 0
+        assert q.pop() is None
+        q.close()